@@ -1,7 +1,16 @@
 # bot.py
+import time
+PROCESS_STARTED = time.perf_counter()  # cold start is measured from here
+
+import asyncio
 import os
 from dotenv import load_dotenv
-from telegram.ext import Application, CommandHandler
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes, TypeHandler
+from utils.helpers import remember_username
+import storage
+from utils import aio, log_sink, metrics, metrics_server, profiling, startup
+from utils.locks import serialized_per_user
 from commands.start import start
 from commands.daily import daily
 from commands.gainxp import gainxp
@@ -14,6 +23,8 @@ from commands.showloan import showloan
 from commands.rps import rps
 from commands.aviator import aviator
 from commands.spin import spin
+from commands.stats import stats
+from commands.profile import profile
 from commands.betrewards import (
     check_betting_rewards, 
     betting_rewards_info, 
@@ -34,36 +45,106 @@ from commands.admin_reset import (
 
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# how many updates may be processed at once; one user's commands still run one by one
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
 
-if __name__ == "__main__":
-    app = Application.builder().token(BOT_TOKEN).build()
+COMMANDS = [
+    ("start", start),
+    ("balance", start),  # quick: reuse start for now or implement separate
+    ("daily", daily),
+    ("gainxp", gainxp),
+    ("makeadmin", makeadmin),
+    ("setcoin", setcoin),
+    ("setxp", setxp),
+    ("loan", loan),
+    ("rpay", rpay),
+    ("showloan", showloan),
+    ("rps", rps),
+    ("aviator", aviator),
+    ("spin", spin),
+    ("checkrewards", check_betting_rewards),
+    ("rewards", betting_rewards_info),
+    ("rewards_table", show_rewards_table),
+    ("addmilestone", add_milestone),
+    ("editmilestone", edit_milestone),
+    ("deletemilestone", delete_milestone),
+    ("togglemilestone", toggle_milestone),
+    ("resetall", reset_all),
+    ("resetbalance", reset_balance),
+    ("resetxp", reset_xp),
+    ("resetloan", reset_loan),
+    ("resetbets", reset_bets),
+    ("resetdaily", reset_daily),
+    ("stats", stats),
+    ("profile", profile),
+]
+
+# handlers that /profile (or PROFILE_SAMPLE_PERCENT / PROFILE_SLOW_MS) can profile
+PROFILED_COMMANDS = {"daily", "spin", "rps", "aviator"}
+
+async def learn_username(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Runs before the command handlers: keep the username index current for admin targeting."""
+    user = update.effective_user
+    if user and user.username:
+        remember_username(user.id, user.username)
+
+async def flush_after_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Runs after the command handlers: send the cell updates they buffered as one batch."""
+    try:
+        await aio.flush_writes()
+    except Exception as e:
+        print(f"Error flushing buffered writes: {e}")
+
+_loop_monitor = None
+_metrics_http = None
 
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("balance", lambda update, ctx: start(update, ctx)))  # quick: reuse start for now or implement separate
-    app.add_handler(CommandHandler("daily", daily))
-    app.add_handler(CommandHandler("gainxp", gainxp))
-    app.add_handler(CommandHandler("makeadmin", makeadmin))
-    app.add_handler(CommandHandler("setcoin", setcoin))
-    app.add_handler(CommandHandler("setxp", setxp))
-    app.add_handler(CommandHandler("loan", loan))
-    app.add_handler(CommandHandler("rpay", rpay))
-    app.add_handler(CommandHandler("showloan", showloan))
-    app.add_handler(CommandHandler("rps", rps))
-    app.add_handler(CommandHandler("aviator", aviator))
-    app.add_handler(CommandHandler("spin", spin))
-    app.add_handler(CommandHandler("checkrewards", check_betting_rewards))
-    app.add_handler(CommandHandler("rewards", betting_rewards_info))
-    app.add_handler(CommandHandler("rewards_table", show_rewards_table))
-    app.add_handler(CommandHandler("addmilestone", add_milestone))
-    app.add_handler(CommandHandler("editmilestone", edit_milestone))
-    app.add_handler(CommandHandler("deletemilestone", delete_milestone))
-    app.add_handler(CommandHandler("togglemilestone", toggle_milestone))
-    app.add_handler(CommandHandler("resetall", reset_all))
-    app.add_handler(CommandHandler("resetbalance", reset_balance))
-    app.add_handler(CommandHandler("resetxp", reset_xp))
-    app.add_handler(CommandHandler("resetloan", reset_loan))
-    app.add_handler(CommandHandler("resetbets", reset_bets))
-    app.add_handler(CommandHandler("resetdaily", reset_daily))
+async def on_startup(application: Application):
+    """
+    Connect to storage and warm the caches (utils/startup.py), then start the event-loop
+    lag probe and, when METRICS_PORT is set, the /metrics endpoint.
+    """
+    global _loop_monitor, _metrics_http
+    await startup.bootstrap(PROCESS_STARTED)
+    _loop_monitor = asyncio.get_running_loop().create_task(metrics.monitor_event_loop())
+    if metrics_server.METRICS_PORT:
+        _metrics_http = metrics_server.start_metrics_server()
+
+async def on_shutdown(application: Application):
+    """Write whatever is still buffered before the process exits."""
+    if _loop_monitor is not None:
+        _loop_monitor.cancel()
+    if _metrics_http is not None:
+        _metrics_http.shutdown()
+    try:
+        await aio.flush_writes()
+    except Exception as e:
+        print(f"Error flushing buffered writes: {e}")
+    await aio.run_io(log_sink.drain)
+    await aio.run_io(storage.close)
+
+def build_application() -> Application:
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
+
+    # latency is measured per handler run, after the per-user lock is acquired
+    for name, callback in COMMANDS:
+        if name in PROFILED_COMMANDS:
+            callback = profiling.profiled(name)(callback)
+        app.add_handler(CommandHandler(name, serialized_per_user(metrics.timed_command(name, callback))))
+
+    # group -1 runs before and group 1 after the command handlers (group 0) for every update
+    app.add_handler(TypeHandler(Update, learn_username), group=-1)
+    app.add_handler(TypeHandler(Update, flush_after_update), group=1)
+    return app
+
+if __name__ == "__main__":
+    app = build_application()
 
     print("Bot is running...")
     app.run_polling()
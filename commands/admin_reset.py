@@ -2,8 +2,10 @@
 import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, is_admin, resolve_user_id
-from google_sheet import get_worksheet, update_cell
+from utils.helpers import is_admin, update_user_fields
+from utils import aio, log_sink
+from storage import read_all_records, update_cell, flush_writes
+from storage.migrate import cell, column_map
 
 async def reset_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Reset all user data (admin only)"""
@@ -19,33 +21,17 @@ async def reset_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
 
-        # Reset all user data
-        ws = get_worksheet("Users")
-        headers = ws.row_values(1)
-        users = ws.get_all_records()
-        
-        # Find user row
-        target_row_idx = None
-        for idx, u in enumerate(users, start=2):
-            if str(u.get("UserID")) == str(target_user_id):
-                target_row_idx = idx
-                break
-        
-        if not target_row_idx:
-            await update.message.reply_text("❌ Error: User row not found in sheet.")
-            return
-
         # Reset all fields to defaults
         reset_values = {
             "Balance": 1000,  # Starting balance
@@ -61,18 +47,16 @@ async def reset_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Milestone_1000000": False,
         }
 
-        # Update each field
-        for field, value in reset_values.items():
-            if field in headers:
-                col_idx = headers.index(field) + 1
-                cell_ref = f"{chr(64 + col_idx)}{target_row_idx}"
-                update_cell("Users", cell_ref, value)
+        # Write all fields in one batch
+        if not await aio.run_io(reset_user_fields, target_user_id, reset_values):
+            await update.message.reply_text("❌ Error: User row not found in sheet.")
+            return
 
         # Reset loans
-        reset_loans(target_user_id)
+        await aio.run_io(reset_loans, target_user_id)
         
         # Reset betting logs
-        reset_betting_logs(target_user_id)
+        await aio.run_io(reset_betting_logs, target_user_id)
         
         await update.message.reply_text(
             f"🔄 <b>Complete Reset Complete!</b>\n\n"
@@ -108,13 +92,13 @@ async def reset_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
@@ -131,16 +115,7 @@ async def reset_balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 reset_amount = 1000
 
         # Update balance
-        ws = get_worksheet("Users")
-        headers = ws.row_values(1)
-        users = ws.get_all_records()
-        
-        for idx, u in enumerate(users, start=2):
-            if str(u.get("UserID")) == str(target_user_id):
-                col_idx = headers.index("Balance") + 1
-                cell_ref = f"{chr(64 + col_idx)}{idx}"
-                update_cell("Users", cell_ref, reset_amount)
-                break
+        await aio.run_io(reset_user_fields, target_user_id, {"Balance": reset_amount})
 
         await update.message.reply_text(
             f"💰 <b>Balance Reset Complete!</b>\n\n"
@@ -169,13 +144,13 @@ async def reset_xp(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
@@ -203,24 +178,7 @@ async def reset_xp(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 reset_level = 1
 
         # Update XP and Level
-        ws = get_worksheet("Users")
-        headers = ws.row_values(1)
-        users = ws.get_all_records()
-        
-        for idx, u in enumerate(users, start=2):
-            if str(u.get("UserID")) == str(target_user_id):
-                # Update XP
-                if "XP" in headers:
-                    col_idx = headers.index("XP") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Users", cell_ref, reset_xp)
-                
-                # Update Level
-                if "Level" in headers:
-                    col_idx = headers.index("Level") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Users", cell_ref, reset_level)
-                break
+        await aio.run_io(reset_user_fields, target_user_id, {"XP": reset_xp, "Level": reset_level})
 
         await update.message.reply_text(
             f"⭐ <b>XP Reset Complete!</b>\n\n"
@@ -251,19 +209,19 @@ async def reset_loan(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
 
         # Reset loans
-        loans_cleared = reset_loans(target_user_id)
+        loans_cleared = await aio.run_io(reset_loans, target_user_id)
         
         await update.message.reply_text(
             f"💳 <b>Loan Reset Complete!</b>\n\n"
@@ -291,41 +249,25 @@ async def reset_bets(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
 
-        # Reset betting data
-        ws = get_worksheet("Users")
-        headers = ws.row_values(1)
-        users = ws.get_all_records()
-        
-        for idx, u in enumerate(users, start=2):
-            if str(u.get("UserID")) == str(target_user_id):
-                # Reset TotalBets
-                if "TotalBets" in headers:
-                    col_idx = headers.index("TotalBets") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Users", cell_ref, 0)
-                
-                # Reset all milestones
-                for milestone in [10000, 20000, 50000, 100000, 1000000]:
-                    milestone_key = f"Milestone_{milestone}"
-                    if milestone_key in headers:
-                        col_idx = headers.index(milestone_key) + 1
-                        cell_ref = f"{chr(64 + col_idx)}{idx}"
-                        update_cell("Users", cell_ref, False)
-                break
+        # Reset TotalBets and all milestones
+        reset_values = {"TotalBets": 0}
+        for milestone in [10000, 20000, 50000, 100000, 1000000]:
+            reset_values[f"Milestone_{milestone}"] = False
+        await aio.run_io(reset_user_fields, target_user_id, reset_values)
 
         # Clear betting logs
-        logs_cleared = reset_betting_logs(target_user_id)
+        logs_cleared = await aio.run_io(reset_betting_logs, target_user_id)
         
         await update.message.reply_text(
             f"🎯 <b>Betting Data Reset Complete!</b>\n\n"
@@ -355,36 +297,19 @@ async def reset_daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         target_identifier = context.args[0]
-        target_user_id = resolve_user_id(target_identifier)
+        target_user_id = await aio.resolve_user_id(target_identifier)
         
         if not target_user_id:
             await update.message.reply_text(f"❌ User '{target_identifier}' not found.")
             return
 
-        target_user = get_user(target_user_id)
+        target_user = await aio.get_user(target_user_id)
         if not target_user:
             await update.message.reply_text(f"❌ User with ID {target_user_id} not found.")
             return
 
-        # Reset daily data
-        ws = get_worksheet("Users")
-        headers = ws.row_values(1)
-        users = ws.get_all_records()
-        
-        for idx, u in enumerate(users, start=2):
-            if str(u.get("UserID")) == str(target_user_id):
-                # Reset LastDaily
-                if "LastDaily" in headers:
-                    col_idx = headers.index("LastDaily") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Users", cell_ref, "")
-                
-                # Reset Streak
-                if "Streak" in headers:
-                    col_idx = headers.index("Streak") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Users", cell_ref, 0)
-                break
+        # Reset LastDaily and Streak
+        await aio.run_io(reset_user_fields, target_user_id, {"LastDaily": "", "Streak": 0})
 
         await update.message.reply_text(
             f"📅 <b>Daily Data Reset Complete!</b>\n\n"
@@ -399,22 +324,25 @@ async def reset_daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ Error during daily reset: {e}")
 
+def reset_user_fields(user_id: int, values: dict) -> bool:
+    """Write `values` to the user's row as one batch, skipping columns the sheet lacks. Returns False if the row is missing."""
+    columns = column_map("Users")
+    return update_user_fields(user_id, {field: value for field, value in values.items() if field in columns})
+
 def reset_loans(user_id: int) -> int:
     """Reset all loans for a user. Returns number of loans cleared."""
     try:
-        ws = get_worksheet("Logs_Loan")
-        headers = ws.row_values(1)
-        records = ws.get_all_records()
+        columns = column_map("Logs_Loan")
+        records = read_all_records("Logs_Loan")
         
         loans_cleared = 0
         for idx, record in enumerate(records, start=2):
             if str(record.get("UserID")) == str(user_id) and str(record.get("Status", "")).lower() == "active":
                 # Mark loan as cleared
-                if "Status" in headers:
-                    col_idx = headers.index("Status") + 1
-                    cell_ref = f"{chr(64 + col_idx)}{idx}"
-                    update_cell("Logs_Loan", cell_ref, "Cleared")
+                if "Status" in columns:
+                    update_cell("Logs_Loan", cell("Logs_Loan", "Status", idx), "Cleared")
                     loans_cleared += 1
+        flush_writes("Logs_Loan")
         
         return loans_cleared
     except Exception as e:
@@ -431,19 +359,18 @@ def reset_betting_logs(user_id: int) -> int:
         
         for sheet_name in game_sheets:
             try:
-                ws = get_worksheet(sheet_name)
-                headers = ws.row_values(1)
-                records = ws.get_all_records()
+                log_sink.flush(sheet_name)  # rows still queued for this sheet
+                columns = column_map(sheet_name)
+                records = read_all_records(sheet_name)
                 
                 # Find and clear user's logs
                 for idx, record in enumerate(records, start=2):
                     if str(record.get("UserID")) == str(user_id):
                         # Clear the log by setting UserID to empty
-                        if "UserID" in headers:
-                            col_idx = headers.index("UserID") + 1
-                            cell_ref = f"{chr(64 + col_idx)}{idx}"
-                            update_cell(sheet_name, cell_ref, "")
+                        if "UserID" in columns:
+                            update_cell(sheet_name, cell(sheet_name, "UserID", idx), "")
                             logs_cleared += 1
+                flush_writes(sheet_name)
             except Exception as e:
                 print(f"Error clearing {sheet_name}: {e}")
                 continue
@@ -1,9 +1,16 @@
 # commands/betrewards.py
+import bisect
 import datetime
+import os
+import threading
+import time
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, update_user_balance, update_user_field, gain_xp
-from google_sheet import append_row, get_worksheet, update_cell
+from utils.helpers import is_truthy, _get_level_info
+from utils import aio
+from utils.log_sink import log_row
+from storage import append_rows, background_priority, clear_worksheet, read_all_records
+from storage.migrate import cell, column_map, ensure_columns
 
 # Default betting reward milestones - can be modified via admin commands
 DEFAULT_BETTING_MILESTONES = [
@@ -14,29 +21,99 @@ DEFAULT_BETTING_MILESTONES = [
     {"threshold": 1000000, "reward": 500000, "xp": 10000, "description": "1M Betting Milestone", "active": True},
 ]
 
+# Milestone table cache: BettingRewards is read once and kept in memory. "records" are
+# the raw sheet rows (sheet row = position + 2), "active" the active milestones sorted
+# by threshold and "thresholds" their thresholds, so evaluating a bet is a bisect with
+# no network call. The admin commands below patch the cache as they edit the sheet;
+# direct sheet edits show up after MILESTONES_REFRESH_SECONDS (refreshed in the background).
+MILESTONES_REFRESH_SECONDS = float(os.getenv("MILESTONES_REFRESH_SECONDS", "300"))
+
+_milestones = {"records": None, "active": [], "thresholds": [], "loaded_at": 0.0, "refreshing": False}
+_milestones_lock = threading.Lock()
+
+def _milestone_from_record(record: dict) -> dict:
+    return {
+        "threshold": int(record.get("Threshold", 0)),
+        "reward": int(record.get("Reward", 0)),
+        "xp": int(record.get("XP", 0)),
+        "description": record.get("Description", ""),
+        "active": is_truthy(record.get("Active", True))
+    }
+
+def _index_milestones(records: list):
+    # callers hold _milestones_lock
+    milestones = [_milestone_from_record(r) for r in records]
+    active = sorted((m for m in milestones if m["active"]), key=lambda x: x["threshold"])
+    _milestones["records"] = records
+    _milestones["active"] = active
+    _milestones["thresholds"] = [m["threshold"] for m in active]
+
+def _store_milestones(records: list):
+    """Replace the cached table with `records` (BettingRewards rows) and rebuild the sorted views."""
+    with _milestones_lock:
+        _index_milestones(records)
+        _milestones["loaded_at"] = time.monotonic()
+
+def _patch_milestones(mutate):
+    """Apply mutate(records) to the cached rows after an admin edit; no-op if nothing is cached."""
+    with _milestones_lock:
+        if _milestones["records"] is not None:
+            records = [dict(r) for r in _milestones["records"]]
+            mutate(records)
+            _index_milestones(records)
+
+def load_betting_milestones():
+    """
+    Read the BettingRewards sheet into the cache, initializing it with the defaults if empty,
+    and make sure Users has a Milestone_* column for every milestone.
+    """
+    records = read_all_records("BettingRewards")
+    if not records:
+        # Initialize default milestones in the sheet
+        initialize_betting_rewards_sheet()
+        records = [
+            {"Threshold": m["threshold"], "Reward": m["reward"], "XP": m["xp"],
+             "Description": m["description"], "Active": m["active"]}
+            for m in DEFAULT_BETTING_MILESTONES
+        ]
+    ensure_columns("Users", [f"Milestone_{_milestone_from_record(r)['threshold']}" for r in records])
+    _store_milestones(records)
+
+def _refresh_milestones_in_background():
+    with _milestones_lock:
+        if _milestones["refreshing"]:
+            return
+        _milestones["refreshing"] = True
+
+    def run():
+        try:
+            with background_priority():
+                load_betting_milestones()
+        except Exception as e:
+            print(f"Error refreshing betting milestones: {e}")
+        finally:
+            with _milestones_lock:
+                _milestones["refreshing"] = False
+
+    threading.Thread(target=run, name="milestones-refresh", daemon=True).start()
+
+def _active_milestones() -> tuple:
+    """Return (active milestones, thresholds) from the cache, loading it on first use."""
+    with _milestones_lock:
+        loaded = _milestones["records"] is not None
+        stale = time.monotonic() - _milestones["loaded_at"] >= MILESTONES_REFRESH_SECONDS
+    if not loaded:
+        load_betting_milestones()
+    elif stale:
+        _refresh_milestones_in_background()
+    with _milestones_lock:
+        return _milestones["active"], _milestones["thresholds"]
+
 def get_betting_milestones():
-    """Get betting milestones from the BettingRewards sheet or use defaults"""
+    """Get active betting milestones (sorted by threshold) from the cache or use defaults"""
     try:
-        ws = get_worksheet("BettingRewards")
-        records = ws.get_all_records()
-        if records:
-            milestones = []
-            for record in records:
-                if record.get("Active", True):  # Only include active milestones
-                    milestones.append({
-                        "threshold": int(record.get("Threshold", 0)),
-                        "reward": int(record.get("Reward", 0)),
-                        "xp": int(record.get("XP", 0)),
-                        "description": record.get("Description", ""),
-                        "active": record.get("Active", True)
-                    })
-            # Sort by threshold
-            milestones.sort(key=lambda x: x["threshold"])
-            return milestones
-        else:
-            # Initialize default milestones in the sheet
-            initialize_betting_rewards_sheet()
-            return DEFAULT_BETTING_MILESTONES
+        active, _ = _active_milestones()
+        return list(active)
     except Exception as e:
         print(f"Error getting betting milestones: {e}")
         # Return defaults if sheet doesn't exist yet
@@ -45,48 +122,41 @@ def get_betting_milestones():
 def initialize_betting_rewards_sheet():
     """Initialize the BettingRewards sheet with default milestones"""
     try:
-        ws = get_worksheet("BettingRewards")
         # Clear existing data
-        ws.clear()
+        clear_worksheet("BettingRewards")
         
-        # Add headers
-        headers = ["Threshold", "Reward", "XP", "Description", "Active", "LastUpdated"]
-        ws.append_row(headers)
-        
-        # Add default milestones
+        # Headers plus the default milestones, sent as one append
+        rows = [["Threshold", "Reward", "XP", "Description", "Active", "LastUpdated"]]
         for milestone in DEFAULT_BETTING_MILESTONES:
-            row = [
+            rows.append([
                 milestone["threshold"],
                 milestone["reward"],
                 milestone["xp"],
                 milestone["description"],
                 milestone["active"],
                 datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ]
-            ws.append_row(row)
+            ])
+        append_rows("BettingRewards", rows)
         
         print("BettingRewards sheet initialized with default milestones")
     except Exception as e:
         print(f"Error initializing BettingRewards sheet: {e}")
 
-def ensure_logs_sheet_exists():
-    """Ensure the Logs_BetRewards sheet exists"""
+def pending_milestones(user: dict, total_bets: int) -> list:
+    """Active milestones reached at total_bets that the user has not been awarded yet."""
     try:
-        ws = get_worksheet("Logs_BetRewards")
-        # Try to get headers to see if sheet exists
-        headers = ws.row_values(1)
-        if not headers:
-            # Initialize the sheet
-            headers = ["RewardID", "UserID", "Username", "Threshold", "CoinsAwarded", "XPAwarded", "Timestamp"]
-            ws.append_row(headers)
-            print("Logs_BetRewards sheet initialized")
+        active, thresholds = _active_milestones()
     except Exception as e:
-        print(f"Error ensuring Logs_BetRewards sheet exists: {e}")
+        print(f"Error getting betting milestones: {e}")
+        active = DEFAULT_BETTING_MILESTONES
+        thresholds = [m["threshold"] for m in active]
+    reached = active[:bisect.bisect_right(thresholds, total_bets)]
+    return [m for m in reached if not is_truthy(user.get(f"Milestone_{m['threshold']}", False))]
 
 def safe_append_log(sheet_name, row_data):
-    """Safely append a row to a sheet, creating it if it doesn't exist"""
+    """Safely queue a row for a log sheet (written in batches by utils.log_sink)"""
     try:
-        append_row(sheet_name, row_data)
+        log_row(sheet_name, row_data)
         return True
     except Exception as e:
         print(f"Error appending to {sheet_name}: {e}")
@@ -97,7 +167,7 @@ async def check_betting_rewards(update: Update, context: ContextTypes.DEFAULT_TY
     try:
         user_id = update.effective_user.id
         username = update.effective_user.username or update.effective_user.first_name or "Player"
-        user = get_user(user_id)
+        user = await aio.get_user(user_id)
         
         if not user:
             await update.message.reply_text("You are not registered. Use /start first.", parse_mode="HTML")
@@ -114,21 +184,15 @@ async def check_betting_rewards(update: Update, context: ContextTypes.DEFAULT_TY
             return
 
         # Get current milestones
-        milestones = get_betting_milestones()
+        milestones = await aio.run_io(get_betting_milestones)
         
         # Check for available rewards
-        available_rewards = []
-        total_reward = 0
-        total_xp = 0
-        
-        for milestone in milestones:
-            if current_total_bets >= milestone["threshold"]:
-                # Check if this milestone was already claimed
-                milestone_key = f"Milestone_{milestone['threshold']}"
-                if not user.get(milestone_key, False):
-                    available_rewards.append(milestone)
-                    total_reward += milestone["reward"]
-                    total_xp += milestone["xp"]
+        available_rewards = [
+            m for m in milestones
+            if current_total_bets >= m["threshold"] and not is_truthy(user.get(f"Milestone_{m['threshold']}", False))
+        ]
+        total_reward = sum(m["reward"] for m in available_rewards)
+        total_xp = sum(m["xp"] for m in available_rewards)
 
         if not available_rewards:
             # Show next milestone progress
@@ -160,26 +224,22 @@ async def check_betting_rewards(update: Update, context: ContextTypes.DEFAULT_TY
                 )
             return
 
-        # Claim available rewards
+        # Claim available rewards: balance, XP, level and the milestone flags in one update,
+        # refused if a bet or another claim changed the row since it was read
         current_balance = int(user.get("Balance", 0))
         new_balance = current_balance + total_reward
-        
-        # Update balance
-        if not update_user_balance(user_id, new_balance):
+        new_xp = int(user.get("XP", 0) or 0) + total_xp
+        fields = {"Balance": new_balance, "XP": new_xp, "Level": _get_level_info(new_xp)[0]["Level"]}
+        fields.update({f"Milestone_{m['threshold']}": True for m in available_rewards})
+        expected = {field: user.get(field, "") for field in ("Balance", "XP", "TotalBets")}
+        if not await aio.update_user_fields(user_id, fields, expected=expected):
             await update.message.reply_text("❌ Error updating balance. Please try again later.")
             return
 
-        # Mark milestones as claimed and add XP
         for milestone in available_rewards:
-            milestone_key = f"Milestone_{milestone['threshold']}"
-            update_user_field(user_id, milestone_key, True)
-            
-            # Add XP
-            xp_result = gain_xp(user_id, milestone["xp"])
-            
             # Log the reward claim
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            safe_append_log("Logs_BetRewards", [
+            await aio.run_io(safe_append_log, "Logs_BetRewards", [
                 f"REW-{milestone['threshold']}",
                 str(user_id),
                 username,
@@ -209,7 +269,7 @@ async def betting_rewards_info(update: Update, context: ContextTypes.DEFAULT_TYP
     """Show information about available betting rewards"""
     try:
         user_id = update.effective_user.id
-        user = get_user(user_id)
+        user = await aio.get_user(user_id)
         
         if not user:
             await update.message.reply_text("You are not registered. Use /start first.", parse_mode="HTML")
@@ -222,13 +282,13 @@ async def betting_rewards_info(update: Update, context: ContextTypes.DEFAULT_TYP
             current_total_bets = 0
 
         # Get current milestones
-        milestones = get_betting_milestones()
+        milestones = await aio.run_io(get_betting_milestones)
         
         # Build milestone info
         milestone_info = []
         for milestone in milestones:
             milestone_key = f"Milestone_{milestone['threshold']}"
-            claimed = user.get(milestone_key, False)
+            claimed = is_truthy(user.get(milestone_key, False))
             
             if claimed:
                 status = "✅ Claimed"
@@ -267,7 +327,7 @@ async def show_rewards_table(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text("❌ This command is for administrators only.")
             return
 
-        milestones = get_betting_milestones()
+        milestones = await aio.run_io(get_betting_milestones)
         
         table_text = "🎯 <b>Betting Rewards Table</b>\n\n"
         table_text += "| Threshold | Reward | XP | Description | Status |\n"
@@ -313,9 +373,11 @@ async def add_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Add to sheet
         try:
-            ws = get_worksheet("BettingRewards")
             row = [threshold, reward, xp, description, True, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-            ws.append_row(row)
+            await aio.append_row("BettingRewards", row)
+            await aio.run_io(ensure_columns, "Users", [f"Milestone_{threshold}"])
+            headers = ["Threshold", "Reward", "XP", "Description", "Active", "LastUpdated"]
+            _patch_milestones(lambda records: records.append(dict(zip(headers, row))))
             
             await update.message.reply_text(
                 f"✅ <b>New Milestone Added!</b>\n\n"
@@ -359,8 +421,7 @@ async def edit_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Update in sheet
         try:
-            ws = get_worksheet("BettingRewards")
-            records = ws.get_all_records()
+            records = await aio.read_all_records("BettingRewards")
             
             for idx, record in enumerate(records, start=2):
                 if int(record.get("Threshold", 0)) == threshold:
@@ -375,10 +436,11 @@ async def edit_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         value = value.lower() in ["true", "1", "yes", "on"]
                     
                     # Update the cell
-                    col_idx = {"reward": 2, "xp": 3, "description": 4, "active": 5}.get(field)
-                    if col_idx:
-                        cell_ref = f"{chr(64 + col_idx)}{idx}"
-                        update_cell("BettingRewards", cell_ref, value)
+                    column = {"reward": "Reward", "xp": "XP", "description": "Description", "active": "Active"}[field]
+                    if column in await aio.run_io(column_map, "BettingRewards"):
+                        await aio.update_cell("BettingRewards", cell("BettingRewards", column, idx), value)
+                        record[column] = value
+                        _store_milestones(records)
                         
                         await update.message.reply_text(
                             f"✅ <b>Milestone Updated!</b>\n\n"
@@ -419,13 +481,14 @@ async def delete_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Delete from sheet
         try:
-            ws = get_worksheet("BettingRewards")
-            records = ws.get_all_records()
+            records = await aio.read_all_records("BettingRewards")
             
             for idx, record in enumerate(records, start=2):
                 if int(record.get("Threshold", 0)) == threshold:
                     # Delete the row
-                    ws.delete_rows(idx)
+                    await aio.delete_rows("BettingRewards", idx)
+                    del records[idx - 2]
+                    _store_milestones(records)
                     
                     await update.message.reply_text(
                         f"✅ <b>Milestone Deleted!</b>\n\n"
@@ -465,17 +528,18 @@ async def toggle_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         # Toggle in sheet
         try:
-            ws = get_worksheet("BettingRewards")
-            records = ws.get_all_records()
+            records = await aio.read_all_records("BettingRewards")
             
             for idx, record in enumerate(records, start=2):
                 if int(record.get("Threshold", 0)) == threshold:
-                    current_status = record.get("Active", True)
+                    current_status = is_truthy(record.get("Active", True))
                     new_status = not current_status
                     
                     # Update the active status
-                    cell_ref = f"E{idx}"  # Column E is Active
-                    update_cell("BettingRewards", cell_ref, new_status)
+                    address = await aio.run_io(cell, "BettingRewards", "Active", idx)
+                    await aio.update_cell("BettingRewards", address, new_status)
+                    record["Active"] = new_status
+                    _store_milestones(records)
                     
                     status_text = "✅ Active" if new_status else "❌ Inactive"
                     
@@ -494,67 +558,3 @@ async def toggle_milestone(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
     except Exception as e:
         await update.message.reply_text(f"An error occurred: {e}")
-
-def check_and_give_rewards_automatically(user_id: int, new_total_bets: int):
-    """
-    This function is called automatically when TotalBets is updated
-    to check if any new milestones are reached and give rewards
-    """
-    try:
-        user = get_user(user_id)
-        if not user:
-            return False
-
-        # Get current milestones
-        milestones = get_betting_milestones()
-        
-        current_balance = int(user.get("Balance", 0))
-        total_reward = 0
-        total_xp = 0
-        claimed_milestones = []
-
-        for milestone in milestones:
-            if new_total_bets >= milestone["threshold"]:
-                # Check if this milestone was already claimed
-                milestone_key = f"Milestone_{milestone['threshold']}"
-                if not user.get(milestone_key, False):
-                    claimed_milestones.append(milestone)
-                    total_reward += milestone["reward"]
-                    total_xp += milestone["xp"]
-
-        if claimed_milestones:
-            # Update balance automatically
-            new_balance = current_balance + total_reward
-            update_user_balance(user_id, new_balance)
-
-            # Mark milestones as claimed and add XP
-            for milestone in claimed_milestones:
-                milestone_key = f"Milestone_{milestone['threshold']}"
-                update_user_field(user_id, milestone_key, True)
-                gain_xp(user_id, milestone["xp"])
-
-                # Log the automatic reward
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                safe_append_log("Logs_BetRewards", [
-                    f"AUTO-{milestone['threshold']}",
-                    str(user_id),
-                    user.get("Username", "Unknown"),
-                    milestone["threshold"],
-                    milestone["reward"],
-                    milestone["xp"],
-                    timestamp
-                ])
-
-            return True
-
-        return False
-
-    except Exception as e:
-        print(f"Error in automatic reward check: {e}")
-        return False
-
-# Initialize sheets when module is imported
-try:
-    ensure_logs_sheet_exists()
-except Exception as e:
-    print(f"Warning: Could not initialize Logs_BetRewards sheet: {e}")
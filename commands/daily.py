@@ -2,18 +2,18 @@
 import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, claim_daily_reward
+from utils.aio import get_user, claim_daily_reward
 
 async def daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     username = update.effective_user.username or update.effective_user.first_name or "Player"
 
-    user = get_user(user_id)
+    user = await get_user(user_id)
     if not user:
         await update.message.reply_text("You are not registered. Use /start first.", parse_mode="HTML")
         return
 
-    result = claim_daily_reward(user_id, base_reward=500)
+    result = await claim_daily_reward(user_id, base_reward=500)
     if not result.get("claimed"):
         await update.message.reply_text(
             f"⛔ {result.get('reason','Cannot claim now.')}",
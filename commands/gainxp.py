@@ -1,7 +1,8 @@
 # commands/gainxp.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import is_admin, gain_xp, get_user
+from utils.helpers import is_admin
+from utils.aio import gain_xp
 
 async def gainxp(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -20,7 +21,7 @@ async def gainxp(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Amount must be an integer, e.g., /gainxp 250")
         return
 
-    res = gain_xp(user_id, amount)
+    res = await gain_xp(user_id, amount)
     if not res.get("ok"):
         await update.message.reply_text("Failed to update XP. Check sheet columns exist: XP, Level.")
         return
@@ -1,13 +1,13 @@
 # commands/loan.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, create_loan, get_active_loan
+from utils.aio import get_user, create_loan
 
 async def loan(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     username = update.effective_user.username or update.effective_user.first_name or "Player"
 
-    user = get_user(user_id)
+    user = await get_user(user_id)
     if not user:
         await update.message.reply_text("You are not registered. Use /start first.")
         return
@@ -22,7 +22,7 @@ async def loan(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Amount must be an integer, e.g., /loan 1000")
         return
 
-    res = create_loan(user_id, amount)
+    res = await create_loan(user_id, amount)
     if not res.get("ok"):
         reason = res.get("reason", "Cannot create loan")
         await update.message.reply_text(f"⛔ {reason}")
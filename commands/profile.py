@@ -0,0 +1,57 @@
+# commands/profile.py
+from telegram import Update
+from telegram.ext import ContextTypes
+from utils import profiling
+from utils.helpers import is_admin
+
+USAGE = (
+    "Usage:\n"
+    "<code>/profile</code> - show settings\n"
+    "<code>/profile sample &lt;percent&gt;</code> - profile this share of runs\n"
+    "<code>/profile slow &lt;ms&gt;</code> - keep profiles of runs slower than this\n"
+    "<code>/profile off</code> - stop profiling"
+)
+
+def _status() -> str:
+    s = profiling.get_profile_stats()
+    state = "on" if profiling.enabled() else "off"
+    slow = f"{s['slow_ms']:.0f} ms" if s["slow_ms"] else "off"
+    return (
+        f"🔬 <b>Profiling is {state}</b>\n"
+        f"────────────────\n"
+        f"🎲 <b>Sample:</b> {s['sample_percent']:g}% of runs\n"
+        f"🐢 <b>Slow threshold:</b> {slow}\n"
+        f"📁 <b>Directory:</b> <code>{s['dir']}</code>\n"
+        f"📊 <b>Profiled:</b> {s['profiled']:,}  |  <b>Saved:</b> {s['saved']:,}  |  <b>Skipped:</b> {s['skipped_busy']:,}"
+    )
+
+async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    caller_id = update.effective_user.id
+    if not is_admin(caller_id):
+        await update.message.reply_text("You are not authorized to use this command.")
+        return
+
+    args = context.args or []
+    if not args:
+        await update.message.reply_text(_status(), parse_mode="HTML")
+        return
+
+    action = args[0].lower()
+    if action == "off":
+        profiling.set_sample_percent(0)
+        profiling.set_slow_ms(0)
+    elif action in ("sample", "slow") and len(args) >= 2:
+        try:
+            value = float(args[1].rstrip("%").replace(",", ""))
+        except ValueError:
+            await update.message.reply_text(USAGE, parse_mode="HTML")
+            return
+        if action == "sample":
+            profiling.set_sample_percent(value)
+        else:
+            profiling.set_slow_ms(value)
+    else:
+        await update.message.reply_text(USAGE, parse_mode="HTML")
+        return
+
+    await update.message.reply_text(_status(), parse_mode="HTML")
@@ -3,9 +3,9 @@ import random
 import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, update_user_balance, update_user_field
+from utils.aio import run_io, get_user
+from utils.settlement import settle_bet, settle_failure_message, format_milestone_notification
 from utils.cooldown import is_on_cooldown, set_cooldown
-from google_sheet import append_row
 
 async def rps(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -15,7 +15,7 @@ async def rps(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         user_id = update.effective_user.id
         username = update.effective_user.username or update.effective_user.first_name or "Player"
-        user = get_user(user_id)
+        user = await get_user(user_id)
         if not user:
             await update.message.reply_text("You are not registered. Use /start first.", parse_mode="HTML")
             return
@@ -65,53 +65,17 @@ async def rps(update: Update, context: ContextTypes.DEFAULT_TYPE):
             payout = 0
             result_emoji = "💥 You Lose"
 
-        new_balance = balance - bet_amount + payout
-        updated = update_user_balance(user_id, new_balance)
-        if not updated:
-            await update.message.reply_text("Error updating balance in sheet. Try again later.")
-            return
-
-        # Update TotalBets
-        try:
-            current_bets = int(user.get("TotalBets", 0)) if str(user.get("TotalBets", "")).strip() != "" else 0
-        except ValueError:
-            current_bets = 0
-        new_total_bets = current_bets + bet_amount
-        update_user_field(user_id, "TotalBets", new_total_bets)
-        
-        # Check for automatic betting rewards
-        from commands.betrewards import check_and_give_rewards_automatically
-        rewards_given = check_and_give_rewards_automatically(user_id, new_total_bets)
-        
-        # Show reward notification if any were given
-        reward_notification = ""
-        if rewards_given:
-            user = get_user(user_id)  # Get updated user data
-            milestones = []
-            for milestone in [10000, 20000, 50000, 100000, 1000000]:
-                milestone_key = f"Milestone_{milestone}"
-                if user.get(milestone_key, False):
-                    milestones.append(milestone)
-            
-            if milestones:
-                reward_notification = f"\n🎉 <b>Milestone Rewards Earned!</b>\n"
-                for milestone in milestones:
-                    if milestone == 10000:
-                        reward_notification += f"🎁 10K Milestone: +1,000 coins + 100 XP\n"
-                    elif milestone == 20000:
-                        reward_notification += f"🎁 20K Milestone: +2,500 coins + 250 XP\n"
-                    elif milestone == 50000:
-                        reward_notification += f"🎁 50K Milestone: +7,500 coins + 500 XP\n"
-                    elif milestone == 100000:
-                        reward_notification += f"🎁 100K Milestone: +20,000 coins + 1,000 XP\n"
-                    elif milestone == 1000000:
-                        reward_notification += f"🎁 1M Milestone: +500,000 coins + 10,000 XP\n"
-                reward_notification += f"💰 <b>Rewards automatically added to your balance!</b>"
-
-        # log the round
+        # settle the round: one batched Users write plus one log append
         bet_id = f"RPS-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        append_row("Logs_RPS", [bet_id, str(user_id), bet_amount, player_choice, bot_choice, result, payout, timestamp])
+        settled = await run_io(settle_bet, user_id, bet_amount, payout, "Logs_RPS", [bet_id, str(user_id), bet_amount, player_choice, bot_choice, result, payout, timestamp])
+        if not settled["ok"]:
+            # a concurrent spend can leave too little for this bet since the check above
+            await update.message.reply_text(settle_failure_message(settled), parse_mode="HTML")
+            return
+        new_balance = settled["balance"]
+        new_total_bets = settled["total_bets"]
+        reward_notification = format_milestone_notification(settled["milestones"])
 
         # set cooldown
         set_cooldown(user_id, "rps")
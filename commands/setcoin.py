@@ -1,7 +1,8 @@
 # commands/setcoin.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import is_admin, resolve_user_id, update_user_balance, get_user
+from utils.helpers import is_admin
+from utils.aio import resolve_user_id, update_user_balance, get_user
 
 def _get_target_from_context(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Prefer replied-to message
@@ -51,7 +52,7 @@ async def setcoin(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         identifier = context.args[0]
         amount_arg = context.args[1]
-        target_id = resolve_user_id(identifier)
+        target_id = await resolve_user_id(identifier)
         if not target_id:
             await update.message.reply_text(f"{text_cmd}\nUser not found. Provide valid username or numeric ID.")
             return
@@ -62,12 +63,12 @@ async def setcoin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"{text_cmd}\nAmount must be an integer.")
         return
 
-    ok = update_user_balance(target_id, amount)
+    ok = await update_user_balance(target_id, amount)
     if not ok:
         await update.message.reply_text(f"{text_cmd}\nFailed to update balance.")
         return
 
-    user = get_user(target_id)
+    user = await get_user(target_id)
     name = user.get("Username", str(target_id)) if user else str(target_id)
     await update.message.reply_text(f"{text_cmd}\n✅ Set {name}'s balance to {amount:,} Coins", reply_to_message_id=update.message.message_id)
 
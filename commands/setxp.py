@@ -1,7 +1,8 @@
 # commands/setxp.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import is_admin, resolve_user_id, set_user_xp, get_user
+from utils.helpers import is_admin
+from utils.aio import resolve_user_id, set_user_xp, get_user
 
 def _get_target_from_context(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message and update.message.reply_to_message and update.message.reply_to_message.from_user:
@@ -34,7 +35,7 @@ async def setxp(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         identifier = context.args[0]
         amount_arg = context.args[1]
-        target_id = resolve_user_id(identifier)
+        target_id = await resolve_user_id(identifier)
         if not target_id:
             await update.message.reply_text(f"{text_cmd}\nUser not found. Provide valid username or numeric ID.")
             return
@@ -47,12 +48,12 @@ async def setxp(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"{text_cmd}\nAmount must be an integer.")
         return
 
-    res = set_user_xp(target_id, amount)
+    res = await set_user_xp(target_id, amount)
     if not res.get("ok"):
         await update.message.reply_text(f"{text_cmd}\nFailed to set XP. Ensure columns XP and Level exist.")
         return
 
-    user = get_user(target_id)
+    user = await get_user(target_id)
     name = user.get("Username", str(target_id)) if user else str(target_id)
     await update.message.reply_text(
         f"{text_cmd}\n✅ Set {name}'s XP to {res['xp']:,} | Level {res['level']}",
@@ -1,19 +1,19 @@
 # commands/showloan.py
 from telegram import Update
 from telegram.ext import ContextTypes
-from utils.helpers import get_user, get_active_loan, list_loans
+from utils.aio import get_user, get_active_loan, list_loans
 
 async def showloan(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     username = update.effective_user.username or update.effective_user.first_name or "Player"
 
-    user = get_user(user_id)
+    user = await get_user(user_id)
     if not user:
         await update.message.reply_text("You are not registered. Use /start first.")
         return
 
-    active = get_active_loan(user_id)
-    history = list_loans(user_id, limit=5)
+    active = await get_active_loan(user_id)
+    history = await list_loans(user_id, limit=5)
 
     if not active and not history:
         await update.message.reply_text("No loans found.")
@@ -0,0 +1,63 @@
+# commands/stats.py
+import html
+from telegram import Update
+from telegram.ext import ContextTypes
+import storage
+from utils import aio, log_sink, metrics, startup
+from utils.helpers import is_admin, get_users_cache_stats
+
+MAX_SHEET_LINES = 10  # slowest Sheets operations shown, by total time
+
+def _latency_line(name: str, s: dict) -> str:
+    errors = f", {s['errors']} err" if s["errors"] else ""
+    return f"<code>{html.escape(name):<16}</code> {s['p50_ms']:.0f} / {s['p99_ms']:.0f} ms  ({s['count']:,}{errors})"
+
+def _quota_lines() -> list:
+    import google_sheet
+    sched = google_sheet.get_scheduler_stats()
+    return [
+        f"📖 Reads: {sched['read_tokens']:.0f} / {google_sheet.SHEETS_READS_PER_MINUTE:.0f} left  ({sched['reads']:,} sent, {sched['coalesced']:,} shared)",
+        f"✏️ Writes: {sched['write_tokens']:.0f} / {google_sheet.SHEETS_WRITES_PER_MINUTE:.0f} left  ({sched['writes']:,} sent)",
+        f"⏳ Throttled {sched['throttled_seconds']:.1f}s, {sched['retries']:,} retries, {sched['gave_up']:,} gave up",
+    ]
+
+def _stats_text() -> str:
+    """Build the report. Runs on the I/O pool: some snapshots wait for locks held during Sheets requests."""
+    lines = ["📊 <b>Bot Stats</b>", "────────────────", "<b>Commands</b> (p50 / p99, count)"]
+    commands = sorted(metrics.get_command_stats().items(), key=lambda kv: -kv[1]["count"])
+    lines += [_latency_line(name, s) for name, s in commands]
+    if not commands:
+        lines.append("No commands yet.")
+
+    lines += ["", "<b>Sheets</b> (p50 / p99, count)"]
+    sheets = sorted(metrics.get_sheets_stats().items(), key=lambda kv: -kv[1]["total_seconds"])
+    lines += [_latency_line(f"{op} {sheet}".strip(), s) for (op, sheet), s in sheets[:MAX_SHEET_LINES]]
+    if not sheets:
+        lines.append("No requests yet.")
+
+    users = get_users_cache_stats()
+    lines += ["", "<b>Caches</b>", f"👥 Users: {users['hit_rate']:.1%} hits, {users['size']:,} rows"]
+    if storage.STORAGE_BACKEND != "sqlite":
+        import google_sheet
+        handles = google_sheet.get_handle_stats()
+        lookups = handles["metadata_fetches"] + handles["metadata_fetches_saved"]
+        reused = handles["metadata_fetches_saved"] / lookups if lookups else 0.0
+        lines.append(f"📑 Worksheet handles: {reused:.1%} reused")
+        lines += ["", "<b>Quota</b>"] + _quota_lines()
+
+    lines += ["", f"🧾 Log rows waiting: {log_sink.pending_log_rows():,}"]
+    cold_start = startup.get_startup_stats()["cold_start_seconds"]
+    if cold_start is not None:
+        lines.append(f"🚀 Cold start: {cold_start:.2f}s")
+    mirror = storage.get_mirror_stats()
+    if mirror is not None:
+        lines.append(f"🪞 Mirror lag: {mirror['lag_seconds']:.1f}s, {mirror['pending_changes']:,} changes pending")
+    return "\n".join(lines)
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    caller_id = update.effective_user.id
+    if not is_admin(caller_id):
+        await update.message.reply_text("You are not authorized to use this command.")
+        return
+
+    await update.message.reply_text(await aio.run_io(_stats_text), parse_mode="HTML")
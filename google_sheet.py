@@ -1,8 +1,15 @@
 # google_sheet.py
 import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 import gspread
-from google.oauth2.service_account import Credentials
+from gspread.exceptions import APIError, WorksheetNotFound
 from dotenv import load_dotenv
+from storage.a1 import row_ranges
+from utils import metrics
 
 load_dotenv()
 
@@ -11,23 +18,464 @@ CREDENTIALS_FILE = os.getenv("GOOGLE_CREDENTIALS_FILE")
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
 
-creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
-client = gspread.authorize(creds)
+# The client is created on first use (importing this module reads no credentials and
+# makes no requests); set_client() swaps in another gspread-compatible client such as
+# tools.fake_gspread.FakeClient.
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the gspread client, authorizing with the service account on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google.oauth2.service_account import Credentials
+            creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
+            _client = gspread.authorize(creds)
+        return _client
+
+def set_client(new_client):
+    """Use `new_client` for every following request and drop handles opened with the old one."""
+    global _client, _spreadsheet
+    with _client_lock:
+        _client = new_client
+    with _handles_lock:
+        _spreadsheet = None
+        _worksheets.clear()
+
+# ===================== Request scheduler =====================
+# Every Sheets request goes through _call(): it takes a token from the read or write
+# bucket (SHEETS_READS_PER_MINUTE / SHEETS_WRITES_PER_MINUTE, Google's per-user quota
+# is 60 of each) and retries 429 and 5xx responses with jittered exponential backoff.
+# Requests that are not safe to repeat (appends, row deletes, add_cols) are retried on
+# 429 only: after a 5xx the change may already have been applied.
+# Requests made inside background_priority() (log sink, timers, refresh threads) may
+# not take the last SHEETS_INTERACTIVE_RESERVE tokens of a bucket and give way while a
+# command is waiting, so player commands are served first when quota runs short.
+SHEETS_READS_PER_MINUTE = float(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+SHEETS_WRITES_PER_MINUTE = float(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+SHEETS_INTERACTIVE_RESERVE = float(os.getenv("SHEETS_INTERACTIVE_RESERVE", "5"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "1"))
+SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "32"))
+
+class SheetsBusyError(Exception):
+    """Raised when Google Sheets keeps rejecting a request after all retries."""
+
+class _TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = max(per_minute, 1.0)
+        self.rate = self.capacity / 60.0  # tokens per second
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.interactive_waiting = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, background: bool = False) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        registered = False
+        try:
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    floor = min(SHEETS_INTERACTIVE_RESERVE, self.capacity - 1) if background else 0.0
+                    yield_to_interactive = background and self.interactive_waiting > 0
+                    if self.tokens >= floor + 1 and not yield_to_interactive:
+                        self.tokens -= 1
+                        return waited
+                    if not background and not registered:
+                        self.interactive_waiting += 1
+                        registered = True
+                    delay = max((floor + 1 - self.tokens) / self.rate, 0.05)
+                time.sleep(delay)
+                waited += delay
+        finally:
+            if registered:
+                with self.lock:
+                    self.interactive_waiting -= 1
+
+_buckets = {"read": _TokenBucket(SHEETS_READS_PER_MINUTE), "write": _TokenBucket(SHEETS_WRITES_PER_MINUTE)}
+_priority = threading.local()
+
+scheduler_stats = {
+    "reads": 0,
+    "writes": 0,
+    "throttled_seconds": 0.0,  # time spent waiting for a token
+    "retries": 0,              # 429/5xx responses retried
+    "rate_limited": 0,         # 429 responses (quota exceeded)
+    "gave_up": 0,              # requests that failed after SHEETS_MAX_RETRIES
+    "coalesced": 0,            # reads answered by an identical read already in flight
+}
+
+@contextmanager
+def background_priority():
+    """Mark Sheets requests made by this thread inside the block as background work."""
+    previous = getattr(_priority, "background", False)
+    _priority.background = True
+    try:
+        yield
+    finally:
+        _priority.background = previous
+
+_NOT_IDEMPOTENT = {"append_row", "append_rows", "delete_rows", "add_cols"}
+
+def _status(exc: APIError):
+    return getattr(getattr(exc, "response", None), "status_code", None)
+
+def _is_retryable(exc: APIError, idempotent: bool = True) -> bool:
+    status = _status(exc)
+    return status == 429 or (idempotent and status is not None and status >= 500)
+
+def _call(kind: str, func, operation: str = "", sheet_name: str = "", retries: int = None):
+    """
+    Run one Sheets request (kind is 'read' or 'write') under the quota scheduler.
+    The time it takes, quota waits and retries included, is recorded in utils.metrics.
+    With `retries` given, the APIError is raised once that many retries have failed so
+    the caller can back off itself (flush_writes does, without holding its lock).
+    """
+    with metrics.sheets_call(operation or kind, sheet_name):
+        return _call_with_retries(kind, func, operation not in _NOT_IDEMPOTENT, retries)
+
+def _backoff(attempt: int):
+    # full jitter: sleep somewhere in [0, base * 2^attempt], capped
+    time.sleep(random.uniform(0, min(SHEETS_BACKOFF_MAX, SHEETS_BACKOFF_BASE * 2 ** attempt)))
+
+def _count(key: str, amount=1):
+    """Add to a scheduler counter; the I/O threads update them concurrently."""
+    with _writes_lock:
+        scheduler_stats[key] += amount
+
+def _call_with_retries(kind: str, func, idempotent: bool = True, retries: int = None):
+    background = getattr(_priority, "background", False)
+    attempt = 0
+    while True:
+        _count("throttled_seconds", _buckets[kind].acquire(background))
+        _count(kind + "s")
+        try:
+            return func()
+        except APIError as e:
+            if not _is_retryable(e, idempotent):
+                raise
+            if _status(e) == 429:
+                _count("rate_limited")
+            if retries is not None and attempt >= retries:
+                raise
+            if attempt >= SHEETS_MAX_RETRIES:
+                _count("gave_up")
+                raise SheetsBusyError("Google Sheets is busy right now, please try again in a minute.") from e
+            _count("retries")
+            _backoff(attempt)
+            attempt += 1
+
+def get_scheduler_stats() -> dict:
+    """Return a snapshot of the scheduler counters and current bucket levels."""
+    with _writes_lock:
+        stats = dict(scheduler_stats)
+    for kind, bucket in _buckets.items():
+        with bucket.lock:
+            stats[f"{kind}_tokens"] = round(bucket.tokens, 2)
+    return stats
+
+# Handle registry: the Spreadsheet is opened once and Worksheet objects are kept by
+# name, so each read/write goes straight to the values API instead of first paying
+# for open_by_key() + worksheet() metadata round-trips.
+_spreadsheet = None
+_worksheets = {}
+_handles_lock = threading.Lock()
+_open_lock = threading.Lock()  # one open_by_key() at a time; never held with _handles_lock
+
+handle_stats = {
+    "metadata_fetches": 0,        # open_by_key() / worksheet() calls actually made
+    "metadata_fetches_saved": 0,  # calls avoided thanks to cached handles
+    "refreshes": 0,               # handles dropped because a worksheet went missing/renamed
+}
+
+def get_spreadsheet(refresh: bool = False):
+    """Return the cached Spreadsheet handle, opening it on first use or when refresh=True."""
+    global _spreadsheet
+    with _handles_lock:
+        seen = _spreadsheet
+        if seen is not None and not refresh:
+            handle_stats["metadata_fetches_saved"] += 1
+            return seen
+    # the request is made outside _handles_lock so cached handles stay available meanwhile
+    with _open_lock:
+        with _handles_lock:
+            if _spreadsheet is not None and _spreadsheet is not seen:
+                return _spreadsheet  # opened by another thread while this one waited
+        client = get_client()
+        sheet = _call("read", lambda: client.open_by_key(SHEET_ID), "open_by_key")
+        with _handles_lock:
+            _spreadsheet = sheet
+            handle_stats["metadata_fetches"] += 1
+            _worksheets.clear()
+        return sheet
 
 def get_worksheet(name: str):
     """Return worksheet object by sheet name"""
-    sheet = client.open_by_key(SHEET_ID)
-    return sheet.worksheet(name)
+    with _handles_lock:
+        ws = _worksheets.get(name)
+        if ws is not None:
+            handle_stats["metadata_fetches_saved"] += 2
+            return ws
+
+    sheet = get_spreadsheet()
+    with _handles_lock:
+        handle_stats["metadata_fetches"] += 1
+    try:
+        ws = _call("read", lambda: sheet.worksheet(name), "worksheet", name)
+    except WorksheetNotFound:
+        # the sheet may have been added or renamed since we opened the spreadsheet
+        sheet = get_spreadsheet(refresh=True)
+        with _handles_lock:
+            handle_stats["refreshes"] += 1
+            handle_stats["metadata_fetches"] += 1
+        ws = _call("read", lambda: sheet.worksheet(name), "worksheet", name)
+
+    with _handles_lock:
+        _worksheets[name] = ws
+    return ws
+
+def invalidate_worksheet(name: str = None):
+    """Drop a cached worksheet handle (or all of them) so the next call refetches it."""
+    with _handles_lock:
+        if name is None:
+            _worksheets.clear()
+        else:
+            _worksheets.pop(name, None)
+
+def get_handle_stats() -> dict:
+    """Return a snapshot of the handle registry counters."""
+    with _handles_lock:
+        stats = dict(handle_stats)
+        stats["cached_worksheets"] = sorted(_worksheets)
+    return stats
+
+def _is_stale_handle_error(exc: APIError) -> bool:
+    # A deleted tab answers 404 and a renamed one makes 'Users'!A1 fail to parse (400).
+    # Any other 400 (bad values, grid limits) would fail the same way with a new handle.
+    status = _status(exc)
+    return status == 404 or (status == 400 and "unable to parse range" in str(exc).lower())
+
+def _with_worksheet(sheet_name: str, op, kind: str = "read", operation: str = "", retries: int = None):
+    """Run op(ws) with the cached handle, refreshing it once if it has gone stale."""
+    try:
+        ws = get_worksheet(sheet_name)
+        try:
+            return _call(kind, lambda: op(ws), operation, sheet_name, retries)
+        except APIError as e:
+            if not _is_stale_handle_error(e):
+                raise
+            with _handles_lock:
+                handle_stats["refreshes"] += 1
+            invalidate_worksheet(sheet_name)
+            ws = get_worksheet(sheet_name)
+            return _call(kind, lambda: op(ws), operation, sheet_name, retries)
+    finally:
+        if kind == "write":
+            _wrote(sheet_name)
+
+# ===================== Read coalescing =====================
+# Identical reads that overlap share one request (single flight): the first caller
+# sends it and callers asking for the same data while it is in flight wait for that
+# response instead of downloading the sheet again, each getting its own copy. A read
+# only joins a request started after the last write to the sheet completed, so a
+# caller still sees its own writes. SHEETS_COALESCE_READS=0 turns this off.
+SHEETS_COALESCE_READS = os.getenv("SHEETS_COALESCE_READS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+_inflight = {}           # (sheet_name, operation, write generation) -> Future of the read in flight
+_write_generation = {}   # sheet_name -> writes completed so far
+_inflight_lock = threading.Lock()
+
+def _wrote(sheet_name: str):
+    with _inflight_lock:
+        _write_generation[sheet_name] = _write_generation.get(sheet_name, 0) + 1
+
+def _copy_result(result):
+    """A copy callers can modify: records are copied row by row, the values themselves are immutable."""
+    if isinstance(result, list):
+        return [dict(item) if isinstance(item, dict) else item for item in result]
+    return result
+
+def _single_flight(sheet_name: str, operation: str, fetch):
+    """Return fetch(), or the result of the identical read already in flight."""
+    if not SHEETS_COALESCE_READS:
+        return fetch()
+    with _inflight_lock:
+        key = (sheet_name, operation, _write_generation.get(sheet_name, 0))
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+            future.followers = 0
+        else:
+            future.followers += 1
+            _count("coalesced")
+    if not leader:
+        return _copy_result(future.result())
+
+    try:
+        result = fetch()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+            followers = future.followers
+    # the leader's caller may modify `result` while followers copy it: they copy from a
+    # snapshot taken before anyone else can touch it (no copy when nobody joined)
+    future.set_result(_copy_result(result) if followers else result)
+    return result
 
 def read_all_records(sheet_name: str):
-    ws = get_worksheet(sheet_name)
-    return ws.get_all_records()
+    # read-your-writes: anything still buffered for this sheet goes out first
+    flush_writes(sheet_name)
+    return _single_flight(sheet_name, "get_all_records",
+                          lambda: _with_worksheet(sheet_name, lambda ws: ws.get_all_records(), operation="get_all_records"))
+
+def read_header(sheet_name: str) -> list:
+    """Return the header row (row 1) of a worksheet."""
+    flush_writes(sheet_name)
+    return _single_flight(sheet_name, "row_values",
+                          lambda: _with_worksheet(sheet_name, lambda ws: ws.row_values(1), operation="row_values"))
 
 def append_row(sheet_name: str, row: list):
+    return _with_worksheet(sheet_name, lambda ws: ws.append_row(row, value_input_option="RAW"), "write", "append_row")
+
+def append_rows(sheet_name: str, rows: list):
+    """Append several rows with one values.append request."""
+    return _with_worksheet(sheet_name, lambda ws: ws.append_rows(rows, value_input_option="RAW"), "write", "append_rows")
+
+def delete_rows(sheet_name: str, start_index: int, end_index: int = None):
+    # buffered cells address rows by number, so send them before rows shift
+    flush_writes(sheet_name)
+    return _with_worksheet(sheet_name, lambda ws: ws.delete_rows(start_index, end_index), "write", "delete_rows")
+
+def reserve_columns(sheet_name: str, count: int):
+    """Grow the grid to at least `count` columns; the API rejects writes past the last column."""
     ws = get_worksheet(sheet_name)
-    ws.append_row(row, value_input_option="RAW")
+    if ws.col_count >= count:
+        return
+    return _with_worksheet(sheet_name, lambda ws: ws.add_cols(count - ws.col_count), "write", "add_cols")
+
+def clear_worksheet(sheet_name: str):
+    """Remove every value from a worksheet."""
+    with _writes_lock:
+        _pending_writes.pop(sheet_name, None)
+    return _with_worksheet(sheet_name, lambda ws: ws.clear(), "write", "clear")
+
+# Write-behind buffer: update_cell() only records the new value; pending cells are
+# sent per worksheet as one batch_update when flush_writes() is called (end of a
+# handler, before a read of the same sheet) or when the write window closes. Cells
+# next to each other in a row go out as one range (C5:E5) rather than one per cell.
+# Each sheet has its own flush lock, which keeps batches of one sheet in order; it is
+# held for a single attempt only, so a sheet answering 429 is retried after a backoff
+# taken outside the lock while other flushes go ahead.
+WRITE_WINDOW_SECONDS = float(os.getenv("SHEETS_WRITE_WINDOW", "0.5"))
+
+_pending_writes = {}  # { sheet_name: { "C5": value, ... } }
+_writes_lock = threading.Lock()
+_flush_locks = {}  # sheet_name -> Lock held while one batch of that sheet is sent
+_flush_timer = None
+
+write_stats = {
+    "cells_queued": 0,
+    "batches_sent": 0,
+    "ranges_sent": 0,
+    "cells_sent": 0,
+}
+
+def _arm_flush_timer():
+    """Schedule a background flush of the buffered cells (caller holds _writes_lock)."""
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(WRITE_WINDOW_SECONDS, _flush_on_timer)
+        _flush_timer.daemon = True
+        _flush_timer.start()
 
 def update_cell(sheet_name: str, cell: str, value):
-    ws = get_worksheet(sheet_name)
-    # gspread expects a 2D array for update with range; wrap value
-    ws.update(cell, [[value]])
+    """Queue a single cell update; a later write to the same cell replaces it."""
+    with _writes_lock:
+        _pending_writes.setdefault(sheet_name, {})[cell] = value
+        write_stats["cells_queued"] += 1
+        _arm_flush_timer()
+
+def _flush_on_timer():
+    global _flush_timer
+    with _writes_lock:
+        _flush_timer = None
+    try:
+        with background_priority():
+            flush_writes()
+    except Exception as e:
+        print(f"Error flushing buffered writes: {e}")
+
+def pending_write_count(sheet_name: str = None) -> int:
+    """Number of cells waiting to be written (for one sheet or all of them)."""
+    with _writes_lock:
+        if sheet_name is not None:
+            return len(_pending_writes.get(sheet_name, {}))
+        return sum(len(cells) for cells in _pending_writes.values())
+
+def flush_writes(sheet_name: str = None) -> int:
+    """
+    Send buffered cell updates as one batch_update per worksheet, adjacent cells of a row as one range.
+    Flushes only `sheet_name` when given, otherwise every sheet. Returns cells written.
+    On failure the cells are put back (unless overwritten meanwhile), a background flush is
+    scheduled to retry them and the first error is raised once the other sheets have been sent.
+    """
+    with _writes_lock:
+        names = [sheet_name] if sheet_name is not None else [n for n, cells in _pending_writes.items() if cells]
+    written = 0
+    error = None
+    for name in names:
+        try:
+            written += _flush_sheet(name)
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return written
+
+def _flush_sheet(sheet_name: str) -> int:
+    attempt = 0
+    while True:
+        try:
+            return _send_buffered(sheet_name)
+        except APIError as e:
+            if not _is_retryable(e):
+                raise
+            if attempt >= SHEETS_MAX_RETRIES:
+                _count("gave_up")
+                raise SheetsBusyError("Google Sheets is busy right now, please try again in a minute.") from e
+            _count("retries")
+            _backoff(attempt)
+            attempt += 1
+
+def _send_buffered(sheet_name: str) -> int:
+    """One batch_update attempt with the cells buffered for `sheet_name`; they are put back if it fails."""
+    with _writes_lock:
+        lock = _flush_locks.setdefault(sheet_name, threading.Lock())
+    with lock:
+        with _writes_lock:
+            cells = _pending_writes.pop(sheet_name, None)
+        if not cells:
+            return 0
+        try:
+            data = row_ranges(cells)
+            _with_worksheet(sheet_name, lambda ws: ws.batch_update(data, value_input_option="RAW"),
+                            "write", "batch_update", retries=0)
+        except Exception:
+            with _writes_lock:
+                _pending_writes[sheet_name] = {**cells, **_pending_writes.get(sheet_name, {})}
+                _arm_flush_timer()
+            raise
+        with _writes_lock:
+            write_stats["batches_sent"] += 1
+            write_stats["ranges_sent"] += len(data)
+            write_stats["cells_sent"] += len(cells)
+        return len(cells)
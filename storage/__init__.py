@@ -0,0 +1,91 @@
+# storage/__init__.py
+# Data access used by the helpers and commands. The functions below have the same names
+# and arguments as google_sheet.py and forward to the backend picked by STORAGE_BACKEND:
+#   sheets (default) - Google Sheets through google_sheet.py
+#   sqlite           - local SQLite file at SQLITE_PATH (storage/sqlite.py)
+#   sqlite+sheets    - SQLite as the primary store, mirrored to Google Sheets in the
+#                      background (storage/mirror.py)
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "casino.db")
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Return the configured backend, creating it on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if STORAGE_BACKEND == "sqlite":
+                from storage.sqlite import SQLiteBackend
+                _backend = SQLiteBackend(SQLITE_PATH)
+            elif STORAGE_BACKEND == "sqlite+sheets":
+                from storage.mirror import MirroredBackend
+                from storage.schema import TABLE_COLUMNS
+                from storage.sheets import SheetsBackend
+                from storage.sqlite import SQLiteBackend
+                # every table is compared with the sheet once at startup and copied if it differs
+                _backend = MirroredBackend(SQLiteBackend(SQLITE_PATH), SheetsBackend(), tables=list(TABLE_COLUMNS))
+            elif STORAGE_BACKEND == "sheets":
+                from storage.sheets import SheetsBackend
+                _backend = SheetsBackend()
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        return _backend
+
+def set_backend(backend):
+    """Replace the active backend (tools and benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def read_all_records(table: str) -> list:
+    return get_backend().read_all_records(table)
+
+def read_header(table: str) -> list:
+    return get_backend().read_header(table)
+
+def append_row(table: str, row: list):
+    return get_backend().append_row(table, row)
+
+def append_rows(table: str, rows: list):
+    return get_backend().append_rows(table, rows)
+
+def update_cell(table: str, cell: str, value):
+    return get_backend().update_cell(table, cell, value)
+
+def flush_writes(table: str = None) -> int:
+    return get_backend().flush_writes(table)
+
+def pending_write_count(table: str = None) -> int:
+    return get_backend().pending_write_count(table)
+
+def reserve_columns(table: str, count: int):
+    return get_backend().reserve_columns(table, count)
+
+def delete_rows(table: str, start_index: int, end_index: int = None):
+    return get_backend().delete_rows(table, start_index, end_index)
+
+def clear_worksheet(table: str):
+    return get_backend().clear_worksheet(table)
+
+def find_row(table: str, column: str, value):
+    return get_backend().find_row(table, column, value)
+
+def background_priority():
+    return get_backend().background_priority()
+
+def close():
+    """Flush buffered writes (and the Sheets mirror) on shutdown."""
+    return get_backend().close()
+
+def get_mirror_stats():
+    """Replication lag and counters of the Sheets mirror, or None when not mirroring."""
+    backend = get_backend()
+    return backend.get_stats() if hasattr(backend, "get_stats") else None
@@ -0,0 +1,67 @@
+# storage/a1.py
+# A1 notation shared by every backend and the code that addresses cells. Columns are
+# 1-based and run past Z (27 -> AA, 703 -> AAA), which the Users sheet needs once it
+# has enough Milestone_* columns:
+#
+#     a1(3, 7)                         -> "C7"
+#     a1(28, 2)                        -> "AB2"
+#     row_ranges({"C5": 1, "D5": 2, "G5": 3})
+#         -> [{"range": "C5:D5", "values": [[1, 2]]}, {"range": "G5", "values": [[3]]}]
+import re
+
+_A1 = re.compile(r"([A-Za-z]+)(\d+)")
+
+def column_letter(col: int) -> str:
+    """Letters of a 1-based column index: 1 -> 'A', 26 -> 'Z', 27 -> 'AA'."""
+    if col < 1:
+        raise ValueError(f"Invalid column index: {col}")
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def column_index(letters: str) -> int:
+    """1-based index of a column given by its letters: 'A' -> 1, 'AA' -> 27."""
+    col = 0
+    for ch in letters.upper():
+        col = col * 26 + ord(ch) - 64
+    return col
+
+def a1(col: int, row: int) -> str:
+    """A1 address for a 1-based column and row, e.g. a1(3, 7) -> 'C7'."""
+    return f"{column_letter(col)}{row}"
+
+def parse_a1(cell: str) -> tuple:
+    """(row, col) of an A1 address; a 'Sheet!' prefix is ignored."""
+    match = _A1.fullmatch(cell.split("!")[-1].strip())
+    if not match:
+        raise ValueError(f"Invalid cell reference: {cell}")
+    return int(match.group(2)), column_index(match.group(1))
+
+def row_range(row: int, first_col: int, last_col: int) -> str:
+    """A1 range of columns first_col..last_col in one row, e.g. row_range(5, 3, 5) -> 'C5:E5'."""
+    if first_col == last_col:
+        return a1(first_col, row)
+    return f"{a1(first_col, row)}:{a1(last_col, row)}"
+
+def row_ranges(cells: dict) -> list:
+    """
+    Group {A1 cell: value} into batch_update entries: cells next to each other in the
+    same row become one range. Entries are ordered by row, then column.
+    """
+    by_position = sorted(((parse_a1(cell), value) for cell, value in cells.items()), key=lambda item: item[0])
+    data = []
+    start = previous = None
+    values = []
+    for (row, col), value in by_position:
+        if previous is not None and row == previous[0] and col == previous[1] + 1:
+            values.append(value)
+        else:
+            if start is not None:
+                data.append({"range": row_range(start[0], start[1], previous[1]), "values": [values]})
+            start, values = (row, col), [value]
+        previous = (row, col)
+    if start is not None:
+        data.append({"range": row_range(start[0], start[1], previous[1]), "values": [values]})
+    return data
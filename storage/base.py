@@ -0,0 +1,63 @@
+# storage/base.py
+import contextlib
+from typing import Optional
+
+class StorageBackend:
+    """
+    Operations the bot needs from its data store. Tables look like worksheets:
+    row 1 is the header, data rows start at row 2 and cells are addressed in A1
+    notation, so helpers can keep using sheet row numbers with every backend.
+    """
+
+    name = "base"
+
+    def read_all_records(self, table: str) -> list:
+        """Every data row as a dict keyed by header, in row order."""
+        raise NotImplementedError
+
+    def read_header(self, table: str) -> list:
+        """The header row (row 1); empty if the table has been cleared."""
+        raise NotImplementedError
+
+    def append_row(self, table: str, row: list):
+        raise NotImplementedError
+
+    def append_rows(self, table: str, rows: list):
+        raise NotImplementedError
+
+    def update_cell(self, table: str, cell: str, value):
+        """Write one cell (A1 notation). May be buffered until flush_writes()."""
+        raise NotImplementedError
+
+    def flush_writes(self, table: str = None) -> int:
+        """Send buffered update_cell() writes. Returns cells written."""
+        raise NotImplementedError
+
+    def pending_write_count(self, table: str = None) -> int:
+        raise NotImplementedError
+
+    def reserve_columns(self, table: str, count: int):
+        """Make room for `count` columns before writing header cells past the last one."""
+
+    def delete_rows(self, table: str, start_index: int, end_index: int = None):
+        """Delete rows start_index..end_index (inclusive); later rows move up."""
+        raise NotImplementedError
+
+    def clear_worksheet(self, table: str):
+        """Remove every row, header included."""
+        raise NotImplementedError
+
+    def find_row(self, table: str, column: str, value) -> Optional[int]:
+        """Row number of the first row whose `column` equals `value`, or None."""
+        for row, record in enumerate(self.read_all_records(table), start=2):
+            if str(record.get(column, "")).strip() == str(value).strip():
+                return row
+        return None
+
+    def close(self):
+        """Write out anything buffered before the process exits."""
+        self.flush_writes()
+
+    def background_priority(self):
+        """Context manager marking requests as background work (only Sheets has quotas)."""
+        return contextlib.nullcontext()
@@ -0,0 +1,121 @@
+# storage/migrate.py
+# One-time schema check. migrate() runs once at startup (utils/startup.py): it reads
+# the header row of every table in storage.schema, appends the columns the bot needs
+# that are missing (an empty worksheet gets the whole header) and keeps the result as
+# an immutable column map per table. Runtime code looks columns up here instead of
+# reading row 1:
+#
+#     column("Users", "Balance")  -> 3
+#     column_map("Users")         -> mappingproxy({"UserID": 1, "Username": 2, ...})
+#     cell("Users", "Balance", 7) -> "C7"
+#     row_cells("Users", 7, {"Balance": 10, "XP": 5}) -> {"C7": 10, "E7": 5}
+#
+# ensure_columns() adds columns after startup (the Milestone_* flag of a new
+# milestone): it reads the header only when a column is missing and swaps in a new map;
+# a map that has been handed out never changes. Columns added by hand in the sheet
+# while the bot runs are picked up at the next start.
+import threading
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from storage import append_row, flush_writes, read_header, reserve_columns, update_cell
+from storage.a1 import a1
+from storage.schema import TABLE_COLUMNS
+
+_maps = {}  # table -> MappingProxyType({column: 1-based index})
+_lock = threading.RLock()
+
+def _build(header: list) -> Mapping:
+    columns = {}
+    for index, name in enumerate(header, start=1):
+        name = str(name).strip()
+        if name:
+            columns.setdefault(name, index)
+    return MappingProxyType(columns)
+
+def migrate_table(table: str, required: list = None) -> list:
+    """Verify `table` has the `required` columns (default: storage.schema), adding missing ones. Returns those added."""
+    required = list(required if required is not None else TABLE_COLUMNS.get(table, []))
+    with _lock:
+        header = [str(h).strip() for h in read_header(table)]
+        if not any(header):
+            added = required
+            header = list(required)
+            if header:
+                append_row(table, header)
+        else:
+            added = [c for c in required if c not in header]
+            if added:
+                reserve_columns(table, len(header) + len(added))
+            for offset, name in enumerate(added, start=1):
+                update_cell(table, a1(len(header) + offset, 1), name)
+            if added:
+                flush_writes(table)
+            header += added
+        _maps[table] = _build(header)
+    return added
+
+def migrate(tables: list = None) -> dict:
+    """Check every table (default: all of storage.schema). Returns {table: [columns added]}; raises the first error."""
+    report = {}
+    error = None
+    for table in tables or list(TABLE_COLUMNS):
+        try:
+            report[table] = migrate_table(table)
+        except Exception as e:
+            print(f"Error migrating {table}: {e}")
+            error = error or e
+            continue
+        if report[table]:
+            print(f"{table}: added columns {', '.join(report[table])}")
+    if error is not None:
+        raise error
+    return report
+
+def column_map(table: str) -> Mapping:
+    """Immutable {column: index} map of `table`, checking the table first if migrate() has not seen it."""
+    columns = _maps.get(table)
+    if columns is None:
+        with _lock:
+            if table not in _maps:
+                migrate_table(table)
+            columns = _maps[table]
+    return columns
+
+def column(table: str, name: str) -> Optional[int]:
+    """1-based index of column `name` in `table`, or None if the table has no such column."""
+    return column_map(table).get(name)
+
+def cell(table: str, name: str, row: int) -> str:
+    """A1 address of column `name` in `row` of `table`; KeyError if the table has no such column."""
+    return a1(column_map(table)[name], row)
+
+def row_cells(table: str, row: int, fields: dict) -> dict:
+    """{A1 cell: value} for several fields of one row; KeyError on an unknown column."""
+    columns = column_map(table)
+    return {a1(columns[name], row): value for name, value in fields.items()}
+
+def ensure_columns(table: str, names: list) -> Mapping:
+    """Append the columns of `names` that `table` lacks (one batch) and return the new map."""
+    with _lock:
+        columns = column_map(table)
+        if all(n in columns for n in names):
+            return columns
+        # new cells go after the last header cell: the map skips duplicate and blank names
+        header = [str(h).strip() for h in read_header(table)]
+        missing = [n for n in dict.fromkeys(names) if n not in header]
+        width = len(header)
+        if missing:
+            reserve_columns(table, width + len(missing))
+            for offset, name in enumerate(missing, start=1):
+                update_cell(table, a1(width + offset, 1), name)
+            flush_writes(table)
+        _maps[table] = _build(header + missing)
+        if missing:
+            print(f"{table}: added columns {', '.join(missing)}")
+        return _maps[table]
+
+def reset():
+    """Forget every map; the next lookup checks the table again (tools and benchmarks)."""
+    with _lock:
+        _maps.clear()
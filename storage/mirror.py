@@ -0,0 +1,227 @@
+# storage/mirror.py
+# Primary store + asynchronous Google Sheets mirror (STORAGE_BACKEND=sqlite+sheets).
+# Every read and write is served by the primary (SQLite). Each mutation is also
+# recorded as a change: cell updates are coalesced per cell (last value wins) and
+# appended rows are kept in order. A worker thread pushes them to the replica every
+# MIRROR_INTERVAL seconds: the appends, then one batch_update per table. Deletes,
+# clears and header edits shift rows, so they mark the table for a full resync, and
+# so does a table whose buffered diff outgrows MIRROR_MAX_PENDING. While Sheets is
+# slow or down, changes keep accumulating and gameplay never waits on them. Lag is
+# the age of the oldest change not yet in the sheet.
+# The mirror is one-way: edits made directly in the spreadsheet are overwritten.
+import os
+import re
+import threading
+import time
+
+from storage.base import StorageBackend
+
+MIRROR_INTERVAL = float(os.getenv("MIRROR_INTERVAL", "5"))
+MIRROR_MAX_PENDING = int(os.getenv("MIRROR_MAX_PENDING", "5000"))
+
+class MirroredBackend(StorageBackend):
+    name = "mirror"
+
+    def __init__(self, primary: StorageBackend, replica: StorageBackend, tables: list = None):
+        self.primary = primary
+        self.replica = replica
+        self._lock = threading.Lock()
+        self._cells = {}     # table -> { "C5": value }
+        self._appends = {}   # table -> [row, ...]
+        self._resync = set(tables or [])  # tables to verify/copy in full on the next sync
+        self._oldest = None  # time.time() of the oldest change not yet mirrored
+        self._stop = threading.Event()
+        self._sync_lock = threading.Lock()
+        self.stats = {"syncs": 0, "errors": 0, "resyncs": 0, "cells_sent": 0, "rows_sent": 0,
+                      "last_sync_at": None, "last_error": ""}
+        self._worker = threading.Thread(target=self._run, name="sheets-mirror", daemon=True)
+        self._worker.start()
+
+    # ---------- reads: primary only ----------
+    def read_all_records(self, table: str) -> list:
+        return self.primary.read_all_records(table)
+
+    def read_header(self, table: str) -> list:
+        return self.primary.read_header(table)
+
+    def find_row(self, table: str, column: str, value):
+        return self.primary.find_row(table, column, value)
+
+    def pending_write_count(self, table: str = None) -> int:
+        return self.primary.pending_write_count(table)
+
+    # ---------- writes: primary, then record the change ----------
+    def _touch(self):
+        # callers hold self._lock
+        if self._oldest is None:
+            self._oldest = time.time()
+
+    def _pending_size(self, table: str) -> int:
+        return len(self._cells.get(table, {})) + len(self._appends.get(table, []))
+
+    def _mark_resync(self, table: str):
+        # callers hold self._lock
+        self._cells.pop(table, None)
+        self._appends.pop(table, None)
+        self._resync.add(table)
+        self._touch()
+
+    def append_row(self, table: str, row: list):
+        return self.append_rows(table, [row])
+
+    # The primary is written under self._lock, together with recording the change, so a
+    # resync snapshot (_resync_table) sees a row either in the primary copy it sends or
+    # as a change for the next sync, never both.
+    def append_rows(self, table: str, rows: list):
+        with self._lock:
+            result = self.primary.append_rows(table, rows)
+            if table not in self._resync:
+                self._appends.setdefault(table, []).extend(list(r) for r in rows)
+                self._touch()
+                if self._pending_size(table) > MIRROR_MAX_PENDING:
+                    self._mark_resync(table)
+        return result
+
+    def update_cell(self, table: str, cell: str, value):
+        with self._lock:
+            self.primary.update_cell(table, cell, value)
+            if table in self._resync:
+                return
+            if re.fullmatch(r"[A-Za-z]+1", cell):
+                self._mark_resync(table)  # header edit (e.g. a new Milestone_ column)
+                return
+            self._cells.setdefault(table, {})[cell] = value
+            self._touch()
+            if self._pending_size(table) > MIRROR_MAX_PENDING:
+                self._mark_resync(table)
+
+    def flush_writes(self, table: str = None) -> int:
+        return self.primary.flush_writes(table)
+
+    def reserve_columns(self, table: str, count: int):
+        # the replica gets new columns through the resync a header edit triggers
+        return self.primary.reserve_columns(table, count)
+
+    def delete_rows(self, table: str, start_index: int, end_index: int = None):
+        with self._lock:
+            result = self.primary.delete_rows(table, start_index, end_index)
+            self._mark_resync(table)
+        return result
+
+    def clear_worksheet(self, table: str):
+        with self._lock:
+            result = self.primary.clear_worksheet(table)
+            self._mark_resync(table)
+        return result
+
+    # ---------- replication ----------
+    def _take_changes(self) -> tuple:
+        with self._lock:
+            changes = (self._cells, self._appends, self._resync, self._oldest)
+            self._cells, self._appends, self._resync, self._oldest = {}, {}, set(), None
+        return changes
+
+    def _restore_changes(self, cells: dict, appends: dict, resync: set, oldest: float):
+        """Put back changes that were not mirrored, underneath anything recorded since."""
+        with self._lock:
+            for table in resync:
+                self._mark_resync(table)
+            for table, rows in appends.items():
+                if rows and table not in self._resync:
+                    self._appends[table] = rows + self._appends.get(table, [])
+            for table, table_cells in cells.items():
+                if table_cells and table not in self._resync:
+                    self._cells[table] = {**table_cells, **self._cells.get(table, {})}
+            if oldest is not None and (self._oldest is None or oldest < self._oldest):
+                self._oldest = oldest
+
+    def _resync_table(self, table: str):
+        with self._lock:
+            # the copy covers every change recorded since _take_changes(): sending those
+            # again on the next sync would duplicate appended rows
+            header = self.primary.read_header(table)
+            records = self.primary.read_all_records(table)
+            self._cells.pop(table, None)
+            self._appends.pop(table, None)
+        rows = [[r.get(h, "") for h in header] for r in records]
+        if self.replica.read_header(table) == header and self.replica.read_all_records(table) == records:
+            return
+        self.replica.clear_worksheet(table)
+        if header:
+            self.replica.append_rows(table, [header] + rows)
+        self.stats["resyncs"] += 1
+
+    def _sync_table(self, table: str, cells: dict, rows: list, resync: bool) -> int:
+        if resync:
+            self._resync_table(table)
+            return 1
+        if rows:
+            self.replica.append_rows(table, rows)
+        for cell, value in cells.items():
+            self.replica.update_cell(table, cell, value)
+        if cells:
+            self.replica.flush_writes(table)
+        return len(rows) + len(cells)
+
+    def sync(self) -> int:
+        """Push recorded changes to the replica now. Returns changes sent; raises the first error."""
+        with self._sync_lock:
+            cells, appends, resync, oldest = self._take_changes()
+            if oldest is None and not resync:
+                return 0
+            self.primary.flush_writes()
+            sent = 0
+            error = None
+            with self.replica.background_priority():
+                for table in sorted(set(cells) | set(appends) | resync):
+                    table_cells = cells.get(table, {})
+                    rows = appends.get(table, [])
+                    try:
+                        sent += self._sync_table(table, table_cells, rows, table in resync)
+                    except Exception as e:
+                        # a table that fails (e.g. a missing worksheet) must not hold back the others
+                        self.stats["errors"] += 1
+                        self.stats["last_error"] = f"{table}: {e}"
+                        self._restore_changes({table: table_cells}, {table: rows}, resync & {table}, oldest)
+                        error = error or e
+                        continue
+                    self.stats["cells_sent"] += len(table_cells)
+                    self.stats["rows_sent"] += len(rows)
+            self.stats["syncs"] += 1
+            self.stats["last_sync_at"] = time.time()
+            if error is not None:
+                raise error
+            return sent
+
+    def _run(self):
+        delay = MIRROR_INTERVAL
+        while not self._stop.wait(delay):
+            try:
+                self.sync()
+                delay = MIRROR_INTERVAL
+            except Exception as e:
+                print(f"Error mirroring to Google Sheets: {e}")
+                delay = min(delay * 2, MIRROR_INTERVAL * 12)  # back off while Sheets is unavailable
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest change not yet mirrored (0 when in sync)."""
+        with self._lock:
+            return time.time() - self._oldest if self._oldest is not None else 0.0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = sum(self._pending_size(t) for t in set(self._cells) | set(self._appends))
+            resync = sorted(self._resync)
+        stats = dict(self.stats)
+        stats.update({"lag_seconds": round(self.lag_seconds(), 3), "pending_changes": pending, "pending_resync": resync})
+        return stats
+
+    def close(self):
+        """Stop the worker and try one last sync."""
+        self._stop.set()
+        self._worker.join(timeout=MIRROR_INTERVAL)
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"Error mirroring to Google Sheets on shutdown: {e}")
+        self.primary.close()
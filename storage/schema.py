@@ -0,0 +1,26 @@
+# storage/schema.py
+# Default headers of every table the bot uses, in sheet column order, and the columns
+# the SQLite backend indexes. Users may grow extra Milestone_* columns at runtime.
+
+TABLE_COLUMNS = {
+    "Users": ["UserID", "Username", "Balance", "Level", "XP", "TotalBets", "LastDaily", "Streak", "JoinDate",
+              "Milestone_10000", "Milestone_20000", "Milestone_50000", "Milestone_100000", "Milestone_1000000"],
+    "Admins": ["AdminID", "Username", "Role"],
+    "Logs_Loan": ["LoanID", "UserID", "Amount", "InterestRate", "DueDate", "RepayAmount", "Status", "Timestamp"],
+    "BettingRewards": ["Threshold", "Reward", "XP", "Description", "Active", "LastUpdated"],
+    "Logs_BetRewards": ["RewardID", "UserID", "Username", "Threshold", "CoinsAwarded", "XPAwarded", "Timestamp"],
+    "Logs_Spin": ["BetID", "UserID", "BetAmount", "Outcome", "Payout", "Timestamp"],
+    "Logs_RPS": ["BetID", "UserID", "BetAmount", "PlayerChoice", "BotChoice", "Result", "Payout", "Timestamp"],
+    "Logs_Aviator": ["BetID", "UserID", "BetAmount", "TargetMultiplier", "CrashPoint", "Result", "Payout", "Timestamp"],
+}
+
+TABLE_INDEXES = {
+    "Users": ["UserID", "Username"],
+    "Admins": ["AdminID"],
+    "Logs_Loan": ["UserID"],
+    "BettingRewards": ["Threshold"],
+    "Logs_BetRewards": ["UserID"],
+    "Logs_Spin": ["UserID"],
+    "Logs_RPS": ["UserID"],
+    "Logs_Aviator": ["UserID"],
+}
@@ -0,0 +1,44 @@
+# storage/sheets.py
+# Google Sheets backend: a thin adapter over google_sheet.py, which keeps the handle
+# registry, write buffer and quota scheduler.
+from storage.base import StorageBackend
+
+class SheetsBackend(StorageBackend):
+    name = "sheets"
+
+    def __init__(self):
+        import google_sheet
+        self._gs = google_sheet
+
+    def read_all_records(self, table: str) -> list:
+        return self._gs.read_all_records(table)
+
+    def read_header(self, table: str) -> list:
+        return self._gs.read_header(table)
+
+    def append_row(self, table: str, row: list):
+        return self._gs.append_row(table, row)
+
+    def append_rows(self, table: str, rows: list):
+        return self._gs.append_rows(table, rows)
+
+    def update_cell(self, table: str, cell: str, value):
+        return self._gs.update_cell(table, cell, value)
+
+    def flush_writes(self, table: str = None) -> int:
+        return self._gs.flush_writes(table)
+
+    def pending_write_count(self, table: str = None) -> int:
+        return self._gs.pending_write_count(table)
+
+    def reserve_columns(self, table: str, count: int):
+        return self._gs.reserve_columns(table, count)
+
+    def delete_rows(self, table: str, start_index: int, end_index: int = None):
+        return self._gs.delete_rows(table, start_index, end_index)
+
+    def clear_worksheet(self, table: str):
+        return self._gs.clear_worksheet(table)
+
+    def background_priority(self):
+        return self._gs.background_priority()
@@ -0,0 +1,228 @@
+# storage/sqlite.py
+# Local SQLite backend. Each worksheet is a table with one TEXT column per header plus
+# an indexed _row column holding the sheet row number (data starts at 2), so the row
+# numbers and A1 cells used by the helpers mean the same thing as on Google Sheets.
+# Values are stored as text and read back the way gspread's get_all_records() returns
+# them: numbers as int/float, booleans as 'TRUE'/'FALSE', blanks as ''.
+# update_cell() writes run in the open transaction and are committed by flush_writes()
+# (a cell past the last row raises instead of being dropped);
+# appends, deletes and clears commit immediately.
+import sqlite3
+import threading
+from typing import Optional
+
+from storage.a1 import column_letter, parse_a1
+from storage.base import StorageBackend
+from storage.schema import TABLE_COLUMNS, TABLE_INDEXES
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _to_text(value) -> str:
+    if value is True:
+        return "TRUE"
+    if value is False:
+        return "FALSE"
+    if value is None:
+        return ""
+    return str(value)
+
+def _numericise(value):
+    """Same conversion gspread applies to formatted cell values."""
+    if value is None:
+        return ""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._headers = {}   # table -> [column, ...] (cached PRAGMA table_info)
+        self._cleared = set()  # tables emptied by clear_worksheet(): the next append brings the header
+        self._pending = {}   # table -> cells updated since the last commit
+
+    # ---------- tables ----------
+    def _create_table(self, table: str, columns: list):
+        cols = ", ".join(f"{_quote(c)} TEXT" for c in columns)
+        self._conn.execute(f"CREATE TABLE {_quote(table)} (_row INTEGER NOT NULL, {cols})")
+        self._conn.execute(f"CREATE INDEX {_quote(f'idx_{table}__row')} ON {_quote(table)} (_row)")
+        for column in TABLE_INDEXES.get(table, []):
+            if column in columns:
+                self._conn.execute(f"CREATE INDEX {_quote(f'idx_{table}_{column}')} ON {_quote(table)} ({_quote(column)})")
+        self._headers[table] = list(columns)
+
+    def _columns(self, table: str) -> list:
+        """Header of `table`, creating it from storage.schema on first use."""
+        columns = self._headers.get(table)
+        if columns is not None:
+            return columns
+        info = self._conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+        if info:
+            columns = [r[1] for r in info if r[1] != "_row"]
+            self._headers[table] = columns
+            return columns
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Unknown table: {table}")
+        self._create_table(table, TABLE_COLUMNS[table])
+        self._conn.commit()
+        return self._headers[table]
+
+    def _replace_table(self, table: str, columns: list):
+        self._conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        self._headers.pop(table, None)
+        self._create_table(table, [c for c in columns if str(c).strip()])
+
+    # ---------- reads ----------
+    def read_all_records(self, table: str) -> list:
+        with self._lock:
+            if table in self._cleared:
+                return []
+            columns = self._columns(table)
+            cols = ", ".join(_quote(c) for c in columns)
+            rows = self._conn.execute(f"SELECT {cols} FROM {_quote(table)} ORDER BY _row").fetchall()
+        return [{c: _numericise(v) for c, v in zip(columns, row)} for row in rows]
+
+    def read_header(self, table: str) -> list:
+        with self._lock:
+            if table in self._cleared:
+                return []
+            return list(self._columns(table))
+
+    def find_row(self, table: str, column: str, value) -> Optional[int]:
+        with self._lock:
+            if table in self._cleared or column not in self._columns(table):
+                return None
+            found = self._conn.execute(
+                f"SELECT MIN(_row) FROM {_quote(table)} WHERE {_quote(column)} = ?", (_to_text(value).strip(),)
+            ).fetchone()
+        return found[0] if found else None
+
+    # ---------- writes ----------
+    def append_row(self, table: str, row: list):
+        return self.append_rows(table, [row])
+
+    def append_rows(self, table: str, rows: list):
+        with self._lock:
+            rows = [list(r) for r in rows]
+            if table in self._cleared and rows:
+                # after clear_worksheet() the first appended row is the new header
+                self._replace_table(table, rows.pop(0))
+                self._cleared.discard(table)
+            columns = self._columns(table)
+            start = self._conn.execute(f"SELECT COALESCE(MAX(_row), 1) + 1 FROM {_quote(table)}").fetchone()[0]
+            placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+            values = [
+                [start + i] + [_to_text(v) for v in (r + [""] * len(columns))[:len(columns)]]
+                for i, r in enumerate(rows)
+            ]
+            self._conn.executemany(f"INSERT INTO {_quote(table)} VALUES ({placeholders})", values)
+            self._commit()
+        end = start + len(rows) - 1
+        # same shape as the Sheets API response, see helpers._appended_row_number()
+        return {"updates": {"updatedRange": f"{table}!A{start}:{column_letter(max(len(columns), 1))}{end}"}}
+
+    def update_cell(self, table: str, cell: str, value):
+        row, col = parse_a1(cell)
+        with self._lock:
+            columns = self._columns(table)
+            if row == 1:
+                self._set_header(table, columns, col, _to_text(value))
+                return
+            if col > len(columns):
+                raise ValueError(f"{cell} is outside the {table} header")
+            updated = self._conn.execute(
+                f"UPDATE {_quote(table)} SET {_quote(columns[col - 1])} = ? WHERE _row = ?", (_to_text(value), row)
+            ).rowcount
+            if not updated:
+                # Sheets would write the cell; dropping it silently would lose the write
+                raise ValueError(f"{cell} is past the last row of {table}")
+            self._pending[table] = self._pending.get(table, 0) + 1
+
+    def _set_header(self, table: str, columns: list, col: int, name: str):
+        if col == len(columns) + 1:
+            self._conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(name)} TEXT")
+            columns.append(name)
+        elif col <= len(columns):
+            self._conn.execute(f"ALTER TABLE {_quote(table)} RENAME COLUMN {_quote(columns[col - 1])} TO {_quote(name)}")
+            columns[col - 1] = name
+        else:
+            raise ValueError(f"Header cell {col} of {table} would leave a gap")
+        self._commit()
+
+    def _commit(self):
+        self._conn.commit()
+        self._pending.clear()
+
+    def flush_writes(self, table: str = None) -> int:
+        """Commit buffered cell updates (a commit covers every table). Returns cells committed."""
+        with self._lock:
+            written = self.pending_write_count(table)
+            self._commit()
+            return written
+
+    def pending_write_count(self, table: str = None) -> int:
+        with self._lock:
+            if table is not None:
+                return self._pending.get(table, 0)
+            return sum(self._pending.values())
+
+    def delete_rows(self, table: str, start_index: int, end_index: int = None):
+        end_index = end_index or start_index
+        with self._lock:
+            self._columns(table)
+            self._conn.execute(f"DELETE FROM {_quote(table)} WHERE _row BETWEEN ? AND ?", (start_index, end_index))
+            self._conn.execute(
+                f"UPDATE {_quote(table)} SET _row = _row - ? WHERE _row > ?", (end_index - start_index + 1, end_index)
+            )
+            self._commit()
+
+    def clear_worksheet(self, table: str):
+        with self._lock:
+            self._columns(table)
+            self._conn.execute(f"DELETE FROM {_quote(table)}")
+            self._cleared.add(table)
+            self._commit()
+
+    def close(self):
+        with self._lock:
+            self._commit()
+
+    def import_from(self, source: StorageBackend, tables: list = None) -> dict:
+        """Replace local tables with a copy of `source` (e.g. the Sheets backend). Returns rows copied per table."""
+        copied = {}
+        for table in tables or list(TABLE_COLUMNS):
+            header = source.read_header(table)
+            if not header:
+                continue
+            records = source.read_all_records(table)
+            with self._lock:
+                self._replace_table(table, header)
+                self._cleared.discard(table)
+                columns = self._headers[table]
+                placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+                self._conn.executemany(
+                    f"INSERT INTO {_quote(table)} VALUES ({placeholders})",
+                    [[row] + [_to_text(r.get(c, "")) for c in columns] for row, r in enumerate(records, start=2)],
+                )
+                self._commit()
+            copied[table] = len(records)
+        return copied
+
+if __name__ == "__main__":
+    # python -m storage.sqlite: copy the Google Sheet into SQLITE_PATH before switching STORAGE_BACKEND
+    import storage
+    from storage.sheets import SheetsBackend
+    counts = SQLiteBackend(storage.SQLITE_PATH).import_from(SheetsBackend())
+    for name, count in counts.items():
+        print(f"{name}: {count} rows")
@@ -0,0 +1,46 @@
+# tests/conftest.py
+# The tests run against tools.fake_gspread behind the real Sheets backend, with the
+# same generous quotas as tools.bench, so nothing reaches a live spreadsheet.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["STORAGE_BACKEND"] = "sheets"
+os.environ.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITE_WINDOW", "3600")
+os.environ.setdefault("LOG_FLUSH_SECONDS", "3600")
+
+import pytest
+
+import google_sheet
+from tools.fake_gspread import FakeClient
+
+google_sheet.set_client(FakeClient())
+
+@pytest.fixture
+def fake():
+    """A fresh workbook with an empty header-only table per schema entry, and cold caches."""
+    import storage
+    from storage import migrate
+    from storage.schema import TABLE_COLUMNS
+    from storage.sheets import SheetsBackend
+    from utils import helpers
+
+    client = FakeClient()
+    for table, columns in TABLE_COLUMNS.items():
+        client.seed(table, [columns])
+    google_sheet.set_client(client)
+    storage.set_backend(SheetsBackend())
+    with google_sheet._writes_lock:
+        google_sheet._pending_writes.clear()
+    migrate.reset()
+    helpers.invalidate_users_cache()
+    yield client
+    # log rows queued by this test must not land in the next test's workbook
+    from utils import log_sink
+    client.error_rate = 0.0
+    log_sink.flush()
+    with google_sheet._writes_lock:
+        google_sheet._pending_writes.clear()
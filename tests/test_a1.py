@@ -0,0 +1,40 @@
+# tests/test_a1.py
+import pytest
+
+from storage.a1 import a1, column_index, column_letter, parse_a1, row_ranges
+
+@pytest.mark.parametrize("col, letters", [(1, "A"), (26, "Z"), (27, "AA"), (52, "AZ"), (53, "BA"), (702, "ZZ"), (703, "AAA")])
+def test_column_letter_round_trips(col, letters):
+    assert column_letter(col) == letters
+    assert column_index(letters) == col
+
+def test_column_letter_rejects_zero():
+    with pytest.raises(ValueError):
+        column_letter(0)
+
+def test_parse_a1_ignores_sheet_prefix():
+    assert parse_a1("Users!AB12") == (12, 28)
+    assert a1(28, 12) == "AB12"
+    with pytest.raises(ValueError):
+        parse_a1("12AB")
+
+def test_row_ranges_joins_adjacent_cells_of_a_row():
+    assert row_ranges({"C5": 1, "D5": 2, "G5": 3}) == [
+        {"range": "C5:D5", "values": [[1, 2]]},
+        {"range": "G5", "values": [[3]]},
+    ]
+
+def test_row_ranges_orders_by_row_then_column():
+    cells = {"B3": "b3", "A7": "a7", "A3": "a3", "Z3": "z3", "AA3": "aa3"}
+    assert row_ranges(cells) == [
+        {"range": "A3:B3", "values": [["a3", "b3"]]},
+        {"range": "Z3:AA3", "values": [["z3", "aa3"]]},
+        {"range": "A7", "values": [["a7"]]},
+    ]
+
+def test_row_ranges_does_not_join_rows():
+    assert row_ranges({"Z1": 1, "A2": 2}) == [
+        {"range": "Z1", "values": [[1]]},
+        {"range": "A2", "values": [[2]]},
+    ]
+    assert row_ranges({}) == []
@@ -0,0 +1,53 @@
+# tests/test_loans.py
+import storage
+from storage.migrate import migrate
+from storage.schema import TABLE_COLUMNS
+from utils import helpers
+
+def _seed_user(user_id: int, balance: int):
+    header = TABLE_COLUMNS["Users"]
+    row = {"UserID": str(user_id), "Username": f"user{user_id}", "Balance": balance, "Level": 1, "XP": 0, "TotalBets": 0}
+    storage.append_row("Users", [row.get(column, "") for column in header])
+    migrate()  # as utils/startup.py does
+
+def _bet_settles_after_first_read(monkeypatch, stake: int):
+    """Make a bet of `stake` land between the first get_user() and the write that follows it."""
+    real_get_user = helpers.get_user
+    raced = []
+
+    def get_user(user_id):
+        user = real_get_user(user_id)
+        if not raced:
+            raced.append(user_id)
+            assert helpers.update_user_fields(user_id, {"Balance": int(user["Balance"]) - stake})
+        return user
+
+    monkeypatch.setattr(helpers, "get_user", get_user)
+
+def test_loan_credit_keeps_a_concurrent_bet(fake, monkeypatch):
+    _seed_user(7, 1000)
+    _bet_settles_after_first_read(monkeypatch, 100)
+    loan = helpers.create_loan(7, 500)
+    assert loan["ok"]
+    assert loan["new_balance"] == 1400
+    monkeypatch.undo()
+    assert helpers.get_user(7)["Balance"] == 1400
+    assert helpers.get_active_loan(7)["Amount"] == 500
+
+def test_repayment_keeps_a_concurrent_bet(fake, monkeypatch):
+    _seed_user(7, 1000)
+    assert helpers.create_loan(7, 500, interest_rate=0.1)["ok"]
+    _bet_settles_after_first_read(monkeypatch, 100)
+    repaid = helpers.repay_active_loan(7)
+    assert repaid["ok"]
+    assert repaid["new_balance"] == 1500 - 100 - 550
+    monkeypatch.undo()
+    assert helpers.get_user(7)["Balance"] == 850
+    assert helpers.get_active_loan(7) is None
+
+def test_repayment_needs_the_coins(fake):
+    _seed_user(7, 0)
+    assert helpers.create_loan(7, 500)["ok"]
+    assert helpers.update_user_fields(7, {"Balance": 100})
+    assert helpers.repay_active_loan(7) == {"ok": False, "reason": "Insufficient balance"}
+    assert helpers.get_user(7)["Balance"] == 100
@@ -0,0 +1,68 @@
+# tests/test_log_sink.py
+import queue
+import threading
+
+import google_sheet
+from utils import log_sink
+
+def _logged(fake, title: str) -> list:
+    return [row[0] for row in fake.values(title)[1:]]
+
+def test_rows_keep_their_order_across_a_failed_flush(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    log_sink.log_row("Logs_Spin", ["S-1"])
+    fake.error_rate = 1.0
+    try:
+        log_sink.flush()
+    except google_sheet.SheetsBusyError:
+        pass
+    else:
+        raise AssertionError("the failed write must be reported")
+    log_sink.log_row("Logs_Spin", ["S-2"])
+    assert log_sink.pending_log_rows() == 2
+
+    fake.error_rate = 0.0
+    assert log_sink.flush() == 2
+    assert _logged(fake, "Logs_Spin") == ["S-1", "S-2"]
+
+def test_full_queue_writes_in_order_and_drops_past_the_limit(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    monkeypatch.setattr(log_sink, "_queue", queue.Queue(maxsize=2))
+    monkeypatch.setattr(log_sink, "LOG_QUEUE_MAX", 2)
+    monkeypatch.setattr(log_sink, "LOG_ENQUEUE_TIMEOUT", 0.01)
+    before = log_sink.get_log_sink_stats()
+
+    fake.error_rate = 1.0
+    for n in range(10):
+        log_sink.log_row("Logs_Spin", [f"S-{n}"])  # never raises
+    fake.error_rate = 0.0
+    log_sink.flush()
+
+    # the worker may take part, so which rows get dropped depends on timing, not their order
+    stats = log_sink.get_log_sink_stats()
+    written = _logged(fake, "Logs_Spin")
+    assert written == sorted(written)
+    assert stats["dropped"] - before["dropped"] >= 1
+    assert len(written) + stats["dropped"] - before["dropped"] == 10
+    assert stats["rows_written"] - before["rows_written"] == len(written)
+    assert stats["pending"] == 0
+
+def test_counters_match_rows_logged_from_many_threads(fake):
+    before = log_sink.get_log_sink_stats()
+
+    def log(thread: int):
+        for n in range(200):
+            log_sink.log_row("Logs_RPS", [f"R-{thread}-{n}"])
+
+    threads = [threading.Thread(target=log, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    while log_sink.pending_log_rows():
+        log_sink.flush()
+
+    stats = log_sink.get_log_sink_stats()
+    assert len(_logged(fake, "Logs_RPS")) == 1600
+    assert stats["rows_queued"] - before["rows_queued"] == 1600
+    assert stats["rows_written"] - before["rows_written"] == 1600
@@ -0,0 +1,26 @@
+# tests/test_migrate.py
+from storage import migrate
+from storage.schema import TABLE_COLUMNS
+
+def test_migrate_adds_missing_columns_past_the_grid(fake):
+    fake.seed("Users", [[f"Old{n}" for n in range(1, 26)]])
+    added = migrate.migrate_table("Users")
+    assert added == TABLE_COLUMNS["Users"]
+    header = fake.values("Users")[0]
+    assert header[25:] == TABLE_COLUMNS["Users"]
+    assert migrate.column("Users", "UserID") == 26
+
+def test_ensure_columns_appends_after_the_last_header_cell(fake):
+    # a duplicate name is not in the column map but still takes a header cell
+    fake.seed("Users", [TABLE_COLUMNS["Users"] + ["Notes", "Notes"]])
+    width = len(TABLE_COLUMNS["Users"]) + 2
+    columns = migrate.ensure_columns("Users", ["Milestone_123", "Notes"])
+    assert columns["Milestone_123"] == width + 1
+    assert fake.values("Users")[0][-3:] == ["Notes", "Notes", "Milestone_123"]
+    assert migrate.cell("Users", "Milestone_123", 2) == migrate.a1(width + 1, 2)
+
+def test_ensure_columns_without_missing_columns_reads_nothing(fake):
+    migrate.column_map("Users")
+    fake.reset_counts()
+    assert migrate.ensure_columns("Users", ["UserID", "Balance"]) is migrate.column_map("Users")
+    assert fake.calls["read"] == 0
@@ -0,0 +1,60 @@
+# tests/test_mirror.py
+from storage.mirror import MirroredBackend
+from storage.sqlite import SQLiteBackend
+
+class _Primary(SQLiteBackend):
+    """A primary that runs `during_sync` once sync() has taken the pending changes."""
+
+    during_sync = None
+
+    def flush_writes(self, table: str = None) -> int:
+        hook, self.during_sync = self.during_sync, None
+        if hook:
+            hook()
+        return super().flush_writes(table)
+
+def _rows(backend, table: str) -> list:
+    return [r["BetID"] for r in backend.read_all_records(table)]
+
+def _mirror(tmp_path, tables=None):
+    primary = _Primary(str(tmp_path / "primary.db"))
+    replica = SQLiteBackend(str(tmp_path / "replica.db"))
+    return MirroredBackend(primary, replica, tables), primary, replica
+
+def test_appends_reach_the_replica_once(tmp_path):
+    mirror, primary, replica = _mirror(tmp_path)
+    try:
+        mirror.append_row("Logs_Spin", ["B1", "1"])
+        mirror.append_rows("Logs_Spin", [["B2", "1"], ["B3", "2"]])
+        assert mirror.sync() == 3
+        assert mirror.sync() == 0
+        assert _rows(replica, "Logs_Spin") == ["B1", "B2", "B3"]
+        assert mirror.get_stats()["pending_changes"] == 0
+    finally:
+        mirror.close()
+
+def test_row_appended_during_a_resync_is_not_sent_twice(tmp_path):
+    mirror, primary, replica = _mirror(tmp_path, ["Logs_Spin"])
+    try:
+        mirror.append_row("Logs_Spin", ["B1", "1"])
+        primary.during_sync = lambda: mirror.append_row("Logs_Spin", ["B2", "1"])
+        mirror.sync()
+        mirror.sync()
+        assert _rows(primary, "Logs_Spin") == ["B1", "B2"]
+        assert _rows(replica, "Logs_Spin") == ["B1", "B2"]
+    finally:
+        mirror.close()
+
+def test_header_edit_resyncs_the_table(tmp_path):
+    mirror, primary, replica = _mirror(tmp_path)
+    try:
+        mirror.append_row("Logs_Spin", ["B1", "1"])
+        mirror.sync()
+        mirror.update_cell("Logs_Spin", "A1", "RoundID")
+        mirror.append_row("Logs_Spin", ["B2", "1"])
+        mirror.sync()
+        assert replica.read_header("Logs_Spin")[0] == "RoundID"
+        assert [r["RoundID"] for r in replica.read_all_records("Logs_Spin")] == ["B1", "B2"]
+        assert mirror.stats["resyncs"] == 1
+    finally:
+        mirror.close()
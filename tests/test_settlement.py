@@ -0,0 +1,61 @@
+# tests/test_settlement.py
+import google_sheet
+import storage
+from storage.migrate import migrate
+from storage.schema import TABLE_COLUMNS
+from utils import helpers, log_sink
+from utils.settlement import settle_bet, settle_failure_message
+
+def _seed_user(user_id: int, balance: int, total_bets: int = 0):
+    header = TABLE_COLUMNS["Users"]
+    row = {"UserID": str(user_id), "Username": f"user{user_id}", "Balance": balance, "Level": 1, "XP": 0,
+           "TotalBets": total_bets}
+    storage.append_row("Users", [row.get(column, "") for column in header])
+    migrate()  # as utils/startup.py does
+
+def _stored(fake, user_id: int, column: str):
+    header, *rows = fake.values("Users")
+    row = next(r for r in rows if str(r[0]) == str(user_id))
+    return row[header.index(column)]
+
+def _round(user_id: int, bet: int, payout: int) -> dict:
+    return settle_bet(user_id, bet, payout, "Logs_Spin", [f"S-{user_id}-{bet}-{payout}", str(user_id), bet, "test", payout, ""])
+
+def test_round_updates_balance_and_total_bets(fake):
+    _seed_user(7, 1000)
+    settled = _round(7, 100, 250)
+    assert settled["ok"]
+    assert (settled["balance"], settled["total_bets"]) == (1150, 100)
+    assert (_stored(fake, 7, "Balance"), _stored(fake, 7, "TotalBets")) == (1150, 100)
+    log_sink.flush()
+    assert [row[0] for row in fake.values("Logs_Spin")[1:]] == ["S-7-100-250"]
+
+def test_reaching_a_milestone_pays_it_once(fake):
+    _seed_user(7, 1000, total_bets=9950)
+    first = _round(7, 100, 0)
+    assert [m["threshold"] for m in first["milestones"]] == [10000]
+    assert first["balance"] == 900 + first["milestones"][0]["reward"]
+    assert _stored(fake, 7, "Milestone_10000") is True
+    assert _round(7, 100, 0)["milestones"] == []
+
+def test_refused_round_explains_why(fake):
+    _seed_user(7, 50)
+    settled = _round(7, 100, 0)
+    assert settled == {"ok": False, "reason": "Insufficient balance"}
+    assert settle_failure_message(settled) == "❌ Insufficient balance!"
+    assert settle_failure_message(_round(8, 10, 0)) == "You are not registered. Use /start first."
+    assert _stored(fake, 7, "Balance") == 50
+
+def test_rounds_settled_during_an_outage_are_not_lost(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    _seed_user(7, 1000)
+    assert helpers.get_user(7)
+
+    fake.error_rate = 1.0
+    assert _round(7, 100, 0)["ok"]
+    assert _round(7, 100, 300)["ok"]
+    fake.error_rate = 0.0
+    google_sheet.flush_writes()
+    assert (_stored(fake, 7, "Balance"), _stored(fake, 7, "TotalBets")) == (1100, 200)
+    log_sink.flush()
+    assert len(fake.values("Logs_Spin")) == 3
@@ -0,0 +1,113 @@
+# tests/test_single_flight.py
+import threading
+import time
+
+import pytest
+
+import google_sheet
+
+class SlowRead:
+    """A fetch() that blocks until released and counts how often it was sent."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return [dict(r) for r in self.result]
+
+def _in_thread(func, results, name):
+    def run():
+        try:
+            results[name] = func()
+        except Exception as e:
+            results[name] = e
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def _wait_for_followers(sheet_name: str, operation: str, count: int):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with google_sheet._inflight_lock:
+            key = (sheet_name, operation, google_sheet._write_generation.get(sheet_name, 0))
+            future = google_sheet._inflight.get(key)
+            if future is not None and future.followers >= count:
+                return
+        time.sleep(0.005)
+    pytest.fail(f"{count} followers never joined the read of {sheet_name}")
+
+def test_overlapping_reads_share_one_request():
+    fetch = SlowRead([{"UserID": 1, "Balance": 10}])
+    results = {}
+    threads = [_in_thread(lambda: google_sheet._single_flight("SF_share", "get_all_records", fetch), results, "leader")]
+    assert fetch.started.wait(5)
+    for n in range(3):
+        threads.append(_in_thread(lambda: google_sheet._single_flight("SF_share", "get_all_records", fetch), results, n))
+    _wait_for_followers("SF_share", "get_all_records", 3)
+    fetch.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert fetch.calls == 1
+    assert all(results[name] == [{"UserID": 1, "Balance": 10}] for name in results)
+    # every caller owns its records
+    assert len({id(records[0]) for records in results.values()}) == 4
+
+def test_leader_changes_do_not_reach_followers():
+    fetch = SlowRead([{"Balance": 10}])
+    results = {}
+
+    def leader():
+        records = google_sheet._single_flight("SF_edit", "get_all_records", fetch)
+        records[0]["Balance"] = 99
+        return records
+
+    threads = [_in_thread(leader, results, "leader")]
+    assert fetch.started.wait(5)
+    threads.append(_in_thread(lambda: google_sheet._single_flight("SF_edit", "get_all_records", fetch), results, "follower"))
+    _wait_for_followers("SF_edit", "get_all_records", 1)
+    fetch.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results["leader"] == [{"Balance": 99}]
+    assert results["follower"] == [{"Balance": 10}]
+
+def test_read_after_a_write_does_not_join_an_older_request():
+    fetch = SlowRead([{"Balance": 10}])
+    results = {}
+    threads = [_in_thread(lambda: google_sheet._single_flight("SF_write", "get_all_records", fetch), results, "before")]
+    assert fetch.started.wait(5)
+    google_sheet._wrote("SF_write")
+    threads.append(_in_thread(lambda: google_sheet._single_flight("SF_write", "get_all_records", fetch), results, "after"))
+    deadline = time.monotonic() + 5
+    while fetch.calls < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    fetch.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert fetch.calls == 2
+
+def test_followers_get_the_leaders_error():
+    fetch = SlowRead(RuntimeError("sheet unavailable"))
+    results = {}
+    threads = [_in_thread(lambda: google_sheet._single_flight("SF_error", "get_all_records", fetch), results, "leader")]
+    assert fetch.started.wait(5)
+    threads.append(_in_thread(lambda: google_sheet._single_flight("SF_error", "get_all_records", fetch), results, "follower"))
+    _wait_for_followers("SF_error", "get_all_records", 1)
+    fetch.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert fetch.calls == 1
+    assert isinstance(results["leader"], RuntimeError)
+    assert results["follower"] is results["leader"]
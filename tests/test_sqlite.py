@@ -0,0 +1,55 @@
+# tests/test_sqlite.py
+import pytest
+
+from storage.sqlite import SQLiteBackend
+
+@pytest.fixture
+def db(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "casino.db"))
+    yield backend
+    backend.close()
+
+def test_records_read_back_like_gspread(db):
+    db.append_rows("Logs_Spin", [["B1", "7", 100, "win", 2.5, ""], ["B2", "7", True, "loss", 0, None]])
+    assert db.read_all_records("Logs_Spin") == [
+        {"BetID": "B1", "UserID": 7, "BetAmount": 100, "Outcome": "win", "Payout": 2.5, "Timestamp": ""},
+        {"BetID": "B2", "UserID": 7, "BetAmount": "TRUE", "Outcome": "loss", "Payout": 0, "Timestamp": ""},
+    ]
+    assert db.find_row("Logs_Spin", "BetID", "B2") == 3
+
+def test_cell_updates_commit_on_flush(db, tmp_path):
+    db.append_row("Logs_Spin", ["B1", "7", 100, "win", 0, ""])
+    db.update_cell("Logs_Spin", "E2", 250)
+    assert db.pending_write_count("Logs_Spin") == 1
+    assert db.flush_writes() == 1
+    assert SQLiteBackend(str(tmp_path / "casino.db")).read_all_records("Logs_Spin")[0]["Payout"] == 250
+
+def test_update_past_the_last_row_raises(db):
+    db.append_row("Logs_Spin", ["B1", "7", 100, "win", 0, ""])
+    with pytest.raises(ValueError):
+        db.update_cell("Logs_Spin", "E3", 250)
+    with pytest.raises(ValueError):
+        db.update_cell("Logs_Spin", "Z2", 250)
+    assert db.pending_write_count() == 0
+
+def test_delete_rows_moves_later_rows_up(db):
+    db.append_rows("Logs_Spin", [[f"B{n}", "7"] for n in range(1, 5)])
+    db.delete_rows("Logs_Spin", 3, 4)
+    assert [r["BetID"] for r in db.read_all_records("Logs_Spin")] == ["B1", "B4"]
+    db.update_cell("Logs_Spin", "A3", "B4x")
+    assert db.read_all_records("Logs_Spin")[1]["BetID"] == "B4x"
+
+def test_header_cells_add_and_rename_columns(db):
+    header = db.read_header("Logs_Spin")
+    db.update_cell("Logs_Spin", f"{chr(64 + len(header) + 1)}1", "Note")
+    db.update_cell("Logs_Spin", "A1", "RoundID")
+    assert db.read_header("Logs_Spin") == ["RoundID"] + header[1:] + ["Note"]
+    with pytest.raises(ValueError):
+        db.update_cell("Logs_Spin", "Z1", "Gap")
+
+def test_clear_then_append_brings_a_new_header(db):
+    db.append_row("Logs_Spin", ["B1", "7"])
+    db.clear_worksheet("Logs_Spin")
+    assert db.read_header("Logs_Spin") == [] and db.read_all_records("Logs_Spin") == []
+    db.append_rows("Logs_Spin", [["BetID", "UserID"], ["B2", "8"]])
+    assert db.read_all_records("Logs_Spin") == [{"BetID": "B2", "UserID": 8}]
@@ -0,0 +1,67 @@
+# tests/test_token_bucket.py
+import threading
+import time
+
+import google_sheet
+from google_sheet import _TokenBucket
+
+def _bucket(tokens: float, per_minute: float = 6000) -> _TokenBucket:
+    bucket = _TokenBucket(per_minute)
+    bucket.tokens = tokens
+    bucket.updated = time.monotonic()
+    return bucket
+
+def test_interactive_request_may_take_the_reserve():
+    bucket = _bucket(google_sheet.SHEETS_INTERACTIVE_RESERVE + 0.5)
+    assert bucket.acquire() == 0.0
+    assert bucket.tokens < google_sheet.SHEETS_INTERACTIVE_RESERVE
+
+def test_background_request_leaves_the_reserve():
+    bucket = _bucket(google_sheet.SHEETS_INTERACTIVE_RESERVE + 0.5)
+    waited = bucket.acquire(background=True)
+    assert waited > 0
+    assert bucket.tokens >= google_sheet.SHEETS_INTERACTIVE_RESERVE - 0.01
+
+def test_background_request_takes_a_token_above_the_reserve():
+    bucket = _bucket(google_sheet.SHEETS_INTERACTIVE_RESERVE + 2)
+    assert bucket.acquire(background=True) == 0.0
+
+def test_background_request_yields_while_a_command_waits():
+    bucket = _bucket(100)
+    bucket.interactive_waiting = 1
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (bucket.acquire(background=True), done.set()))
+    thread.start()
+    assert not done.wait(0.2)
+    bucket.interactive_waiting = 0
+    assert done.wait(5)
+    thread.join(5)
+
+def test_waiting_interactive_request_is_counted_until_served():
+    bucket = _bucket(0, per_minute=60)  # one token a second
+    seen = []
+    thread = threading.Thread(target=bucket.acquire)
+    thread.start()
+    deadline = time.monotonic() + 0.5
+    while not seen and time.monotonic() < deadline:
+        with bucket.lock:
+            if bucket.interactive_waiting:
+                seen.append(bucket.interactive_waiting)
+        time.sleep(0.01)
+    thread.join(5)
+    assert seen == [1]
+    assert bucket.interactive_waiting == 0
+
+def test_requests_from_many_threads_are_all_counted(fake):
+    before = google_sheet.get_scheduler_stats()
+
+    def read():
+        for _ in range(200):
+            google_sheet._call("read", lambda: None)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert google_sheet.get_scheduler_stats()["reads"] - before["reads"] == 1600
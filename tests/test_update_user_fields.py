@@ -0,0 +1,55 @@
+# tests/test_update_user_fields.py
+import google_sheet
+import storage
+from storage.migrate import migrate
+from storage.schema import TABLE_COLUMNS
+from utils import helpers
+
+def _seed_user(fake, user_id: int, balance: int):
+    header = TABLE_COLUMNS["Users"]
+    row = {"UserID": str(user_id), "Username": f"user{user_id}", "Balance": balance, "Level": 1, "XP": 0, "TotalBets": 0}
+    storage.append_row("Users", [row.get(column, "") for column in header])
+    migrate()  # as utils/startup.py does
+
+def _stored(fake, column: str):
+    header, row = fake.values("Users")[:2]
+    return row[header.index(column)]
+
+def _bet(user_id: int, amount: int) -> bool:
+    """A read-modify-write like utils.settlement.settle_bet."""
+    user = helpers.get_user(user_id)
+    fields = {"Balance": int(user["Balance"]) - amount, "TotalBets": int(user["TotalBets"] or 0) + amount}
+    expected = {"Balance": user["Balance"], "TotalBets": user["TotalBets"]}
+    return helpers.update_user_fields(user_id, fields, expected=expected)
+
+def test_failed_flush_keeps_the_update(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    _seed_user(fake, 7, 1000)
+    assert helpers.get_user(7)["Balance"] == 1000
+
+    fake.error_rate = 1.0
+    assert _bet(7, 100)
+    assert _bet(7, 50)
+    assert helpers.get_user(7)["Balance"] == 850
+    assert google_sheet.pending_write_count("Users") == 2
+    assert _stored(fake, "Balance") == 1000
+
+    # the queued cells go out once Sheets answers again: no bet is lost or counted twice
+    fake.error_rate = 0.0
+    google_sheet.flush_writes("Users")
+    assert _stored(fake, "Balance") == 850
+    assert _stored(fake, "TotalBets") == 150
+    helpers.invalidate_users_cache()
+    assert helpers.get_user(7)["Balance"] == 850
+
+def test_conflicting_update_is_refused(fake):
+    _seed_user(fake, 8, 500)
+    user = helpers.get_user(8)
+    assert helpers.update_user_fields(8, {"Balance": 400})
+    assert not helpers.update_user_fields(8, {"Balance": 300}, expected={"Balance": user["Balance"]})
+    assert helpers.get_user(8)["Balance"] == 400
+
+def test_unknown_column_is_refused(fake):
+    _seed_user(fake, 9, 500)
+    assert not helpers.update_user_fields(9, {"Milestone_123": True})
+    assert "Milestone_123" not in fake.values("Users")[0]
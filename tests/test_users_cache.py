@@ -0,0 +1,61 @@
+# tests/test_users_cache.py
+import threading
+import time
+
+import google_sheet
+import storage
+from storage.migrate import migrate
+from storage.schema import TABLE_COLUMNS
+from utils import helpers
+
+def _seed_user(user_id: int, balance: int):
+    header = TABLE_COLUMNS["Users"]
+    row = {"UserID": str(user_id), "Username": f"user{user_id}", "Balance": balance, "Level": 1, "XP": 0, "TotalBets": 0}
+    storage.append_row("Users", [row.get(column, "") for column in header])
+    migrate()  # as utils/startup.py does
+
+def test_failed_reload_serves_the_cached_copy(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    monkeypatch.setattr(helpers, "USERS_CACHE_TTL", 0.0)
+    _seed_user(7, 1000)
+    assert helpers.get_user(7)["Balance"] == 1000
+
+    fake.error_rate = 1.0
+    assert helpers.update_user_fields(7, {"Balance": 900}, expected={"Balance": 1000})
+    assert helpers.get_user(7)["Balance"] == 900
+    assert helpers.get_users_cache_stats()["reload_errors"] == 1
+
+    # the next attempt waits USERS_RELOAD_BACKOFF instead of failing every lookup
+    requests = fake.calls["read"] + fake.calls["write"]
+    assert helpers.get_user(7)["Balance"] == 900
+    assert fake.calls["read"] + fake.calls["write"] == requests
+
+def test_failed_first_load_raises(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    fake.error_rate = 1.0
+    try:
+        helpers.get_user(7)
+    except google_sheet.SheetsBusyError:
+        pass
+    else:
+        raise AssertionError("a lookup without any cached copy must fail")
+
+def test_changes_made_during_a_reload_survive_it(fake):
+    _seed_user(7, 1000)
+    assert helpers.get_user(7)["Balance"] == 1000
+
+    fake.latency = 0.3
+    reload = threading.Thread(target=helpers._load_users, kwargs={"force": True})
+    reload.start()
+    deadline = time.monotonic() + 5
+    while helpers._users_cache["journal"] is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    # lookups keep using the cached copy while the download is in flight
+    helpers.patch_cached_user(7, {"Balance": 1})
+    assert helpers.register_user(8, "user8")
+    reload.join(5)
+    fake.latency = 0.0
+
+    assert helpers.get_user(7)["Balance"] == 1
+    assert helpers.get_user(8)["Username"] == "user8"
+    assert helpers.get_user_row(8) == 3
@@ -0,0 +1,70 @@
+# tests/test_write_buffer.py
+import threading
+
+from gspread.exceptions import APIError
+
+import google_sheet
+from tools.fake_gspread import _FakeResponse
+
+def _fail_once(fake, title: str):
+    """Make the next batch_update of `title` answer 429."""
+    ws = fake.spreadsheet._worksheets[title]
+    original = ws.batch_update
+
+    def batch_update(data, **kwargs):
+        ws.batch_update = original
+        raise APIError(_FakeResponse(429, "Quota exceeded (test)"))
+
+    ws.batch_update = batch_update
+
+def test_adjacent_cells_go_out_as_one_range(fake):
+    google_sheet.update_cell("Users", "C2", 1)
+    google_sheet.update_cell("Users", "D2", 2)
+    google_sheet.update_cell("Users", "F2", 3)
+    fake.reset_counts()
+    assert google_sheet.flush_writes("Users") == 3
+    assert fake.calls["batch_update"] == 1
+    assert fake.values("Users")[1][2:6] == [1, 2, "", 3]
+
+def test_backoff_does_not_hold_up_other_flushes(fake, monkeypatch):
+    backing_off = threading.Event()
+    release = threading.Event()
+
+    def backoff(attempt):
+        backing_off.set()
+        assert release.wait(5)
+
+    monkeypatch.setattr(google_sheet, "_backoff", backoff)
+    google_sheet.update_cell("Users", "C2", 1)
+    _fail_once(fake, "Users")
+    results = {}
+    thread = threading.Thread(target=lambda: results.setdefault("first", google_sheet.flush_writes("Users")))
+    thread.start()
+    assert backing_off.wait(5)
+
+    # while the first flush waits out its 429, other sheets and the same sheet still flush
+    google_sheet.update_cell("Logs_Spin", "A2", "B1")
+    assert google_sheet.flush_writes("Logs_Spin") == 1
+    google_sheet.update_cell("Users", "D2", 2)
+    assert google_sheet.flush_writes("Users") == 2
+    release.set()
+    thread.join(5)
+
+    assert results["first"] == 0
+    assert fake.values("Users")[1][2:4] == [1, 2]
+    assert google_sheet.pending_write_count() == 0
+
+def test_failed_flush_keeps_the_cells(fake, monkeypatch):
+    monkeypatch.setattr(google_sheet, "SHEETS_MAX_RETRIES", 0)
+    google_sheet.update_cell("Users", "C2", 1)
+    _fail_once(fake, "Users")
+    try:
+        google_sheet.flush_writes("Users")
+    except google_sheet.SheetsBusyError:
+        pass
+    else:
+        raise AssertionError("the 429 must be reported")
+    google_sheet.update_cell("Users", "D2", 2)
+    assert google_sheet.pending_write_count("Users") == 2
+    assert google_sheet.flush_writes() == 2
+    assert fake.values("Users")[1][2:4] == [1, 2]
@@ -0,0 +1,219 @@
+# tools/bench.py
+# Per-command benchmark. Every handler registered in bot.COMMANDS is driven with a
+# synthetic Update/Context against tools.fake_gspread.FakeClient, at several Users table
+# sizes, and the Sheets requests it makes are counted: reads, writes and JSON payload
+# bytes, including the writes it buffers (flushed after the command, as bot.py does).
+# Caches are warmed first, so the numbers are the steady-state cost of one command.
+#
+#     python -m tools.bench                            # sizes 100, 10000, 100000
+#     python -m tools.bench --sizes 100 --commands spin,daily --latency 0.1
+#
+# Budgets in tools/bench_budgets.json cap the reads and writes of selected commands;
+# the run exits with status 1 when a command exceeds its budget or replies with an error.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# generous quotas and long write/log windows: the benchmark flushes explicitly
+os.environ["STORAGE_BACKEND"] = "sheets"
+os.environ.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITE_WINDOW", "3600")
+os.environ.setdefault("LOG_FLUSH_SECONDS", "3600")
+
+import google_sheet
+from storage.schema import TABLE_COLUMNS
+from tools.fake_gspread import FakeClient
+from tools.harness import error_reply, make_update
+
+# never let an import reach the live spreadsheet
+google_sheet.set_client(FakeClient())
+
+BUDGETS_FILE = os.path.join(os.path.dirname(__file__), "bench_budgets.json")
+DEFAULT_SIZES = [100, 10000, 100000]
+LOG_ROWS = 100  # rows seeded in each Logs_* sheet
+
+ADMIN_ID = 1
+PLAYER_ID = 2
+TARGET = "@user3"
+
+# (command, caller, args) in run order: /loan comes before /showloan and /rpay, etc.
+SCENARIO = [
+    ("start", PLAYER_ID, []),
+    ("balance", PLAYER_ID, []),
+    ("daily", PLAYER_ID, []),
+    ("spin", PLAYER_ID, ["100"]),
+    ("rps", PLAYER_ID, ["100", "rock"]),
+    ("aviator", PLAYER_ID, ["100", "2"]),
+    ("loan", PLAYER_ID, ["500"]),
+    ("showloan", PLAYER_ID, []),
+    ("rpay", PLAYER_ID, []),
+    ("checkrewards", PLAYER_ID, []),
+    ("rewards", PLAYER_ID, []),
+    ("gainxp", ADMIN_ID, ["10"]),
+    ("setcoin", ADMIN_ID, [TARGET, "777"]),
+    ("setxp", ADMIN_ID, [TARGET, "3000"]),
+    ("makeadmin", ADMIN_ID, [TARGET]),
+    ("rewards_table", ADMIN_ID, []),
+    ("addmilestone", ADMIN_ID, ["15000", "10", "10", "Bench", "Milestone"]),
+    ("editmilestone", ADMIN_ID, ["15000", "reward", "20"]),
+    ("togglemilestone", ADMIN_ID, ["15000"]),
+    ("deletemilestone", ADMIN_ID, ["15000"]),
+    ("resetbalance", ADMIN_ID, [TARGET]),
+    ("resetxp", ADMIN_ID, [TARGET]),
+    ("resetdaily", ADMIN_ID, [TARGET]),
+    ("resetloan", ADMIN_ID, [TARGET]),
+    ("resetbets", ADMIN_ID, [TARGET]),
+    ("resetall", ADMIN_ID, [TARGET]),
+    ("stats", ADMIN_ID, []),
+    ("profile", ADMIN_ID, []),
+]
+
+def build_fake(users: int, latency: float = 0.0) -> FakeClient:
+    """A workbook with `users` Users rows, one admin, the default milestones and small logs."""
+    fake = FakeClient(latency=latency)
+    header = TABLE_COLUMNS["Users"]
+    rows = [header]
+    for i in range(1, users + 1):
+        rows.append([str(i), f"user{i}", 100000, 1, 0, 0, "", 0, "2025-01-01 00:00:00"] + [False] * (len(header) - 9))
+    fake.seed("Users", rows)
+    fake.seed("Admins", [TABLE_COLUMNS["Admins"], [str(ADMIN_ID), "user1", "admin"]])
+    from commands.betrewards import DEFAULT_BETTING_MILESTONES
+    fake.seed("BettingRewards", [TABLE_COLUMNS["BettingRewards"]] + [
+        [m["threshold"], m["reward"], m["xp"], m["description"], m["active"], ""] for m in DEFAULT_BETTING_MILESTONES
+    ])
+    fake.seed("Logs_Loan", [TABLE_COLUMNS["Logs_Loan"]])
+    for name in ("Logs_Spin", "Logs_RPS", "Logs_Aviator", "Logs_BetRewards"):
+        columns = TABLE_COLUMNS[name]
+        fake.seed(name, [columns] + [[f"X-{n}", str(4 + n % max(users - 3, 1))] + [""] * (len(columns) - 2)
+                                     for n in range(LOG_ROWS)])
+    return fake
+
+def reset_caches():
+    """Forget everything cached in-process so each table size starts cold."""
+    from commands import betrewards
+    from storage import migrate
+    from utils import cooldown, helpers, log_sink
+    migrate.reset()
+    helpers.invalidate_users_cache()
+    with helpers._admins_lock:
+        helpers._admins.update(ids=None, loaded_at=0.0)
+    with betrewards._milestones_lock:
+        betrewards._milestones["records"] = None
+    cooldown.cooldowns.clear()
+    log_sink.flush()
+
+async def run_command(callback, command: str, user_id: int, args: list) -> list:
+    """Run one handler the way bot.py does (username hook, handler, flush). Returns its replies."""
+    from utils import aio, log_sink
+    from utils.helpers import remember_username
+    replies = []
+    update, context = make_update(user_id, command, args, replies)
+    remember_username(user_id, update.effective_user.username)
+    await callback(update, context)
+    await aio.flush_writes()
+    await aio.run_io(log_sink.flush)
+    return replies
+
+async def bench_size(users: int, commands: list, latency: float) -> dict:
+    import bot
+    from storage.migrate import migrate
+    from utils import cooldown
+    from utils.helpers import load_admins
+    cooldown.COOLDOWN_SECONDS = 0
+    handlers = dict(bot.COMMANDS)
+
+    fake = build_fake(users, latency)
+    google_sheet.set_client(fake)
+    reset_caches()
+    # warm-up: open every worksheet handle, check the schema as the bot does at startup,
+    # load Users, Admins and the milestone table
+    for table in TABLE_COLUMNS:
+        google_sheet.get_worksheet(table)
+    migrate()
+    load_admins()
+    await run_command(handlers["start"], "start", ADMIN_ID, [])
+    await run_command(handlers["rewards"], "rewards", ADMIN_ID, [])
+
+    results = {}
+    for command, user_id, args in SCENARIO:
+        if command not in commands:
+            continue
+        fake.reset_counts()
+        started = time.perf_counter()
+        replies = await run_command(handlers[command], command, user_id, args)
+        elapsed = time.perf_counter() - started
+        results[command] = {
+            "ms": round(elapsed * 1000, 2),
+            "reads": fake.calls["read"],
+            "writes": fake.calls["write"],
+            "bytes_sent": fake.bytes["sent"],
+            "bytes_received": fake.bytes["received"],
+            "error": error_reply(replies),
+        }
+    return results
+
+def check_budgets(all_results: dict, budgets: dict) -> list:
+    """Return a message for every command/size that exceeds its committed budget or failed."""
+    failures = []
+    for users, results in all_results.items():
+        for command, r in results.items():
+            if r["error"]:
+                failures.append(f"{command} @ {users} users: {r['error']}")
+            budget = budgets.get(command)
+            if not budget:
+                continue
+            for metric in ("reads", "writes"):
+                if metric in budget and r[metric] > budget[metric]:
+                    failures.append(f"{command} @ {users} users: {r[metric]} {metric} > budget {budget[metric]}")
+    return failures
+
+def print_table(users: int, results: dict):
+    print(f"\n== Users table: {users:,} rows ==")
+    print(f"{'command':<16}{'ms':>10}{'reads':>8}{'writes':>8}{'sent B':>12}{'recv B':>14}")
+    for command, r in results.items():
+        print(f"{command:<16}{r['ms']:>10.2f}{r['reads']:>8}{r['writes']:>8}{r['bytes_sent']:>12,}{r['bytes_received']:>14,}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every bot command against a fake spreadsheet.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated Users table sizes")
+    parser.add_argument("--commands", default="", help="comma-separated commands (default: all)")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per Sheets request")
+    parser.add_argument("--budgets", default=BUDGETS_FILE, help="budget file ('' to skip the check)")
+    parser.add_argument("--json", default="", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    import bot
+    registered = [name for name, _ in bot.COMMANDS]
+    missing = [name for name in registered if name not in {c for c, _, _ in SCENARIO}]
+    if missing:
+        print(f"No benchmark scenario for: {', '.join(missing)}")
+        return 1
+    commands = [c.strip() for c in args.commands.split(",") if c.strip()] or registered
+
+    all_results = {}
+    for users in (int(s) for s in args.sizes.split(",") if s.strip()):
+        all_results[users] = asyncio.run(bench_size(users, commands, args.latency))
+        print_table(users, all_results[users])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2)
+
+    budgets = {}
+    if args.budgets:
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+    failures = check_budgets(all_results, budgets)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print("\nAll commands within budget.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
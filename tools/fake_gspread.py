@@ -0,0 +1,298 @@
+# tools/fake_gspread.py
+# In-memory stand-in for the gspread client that google_sheet.py uses, for load tests
+# and benchmarks that must not touch a live spreadsheet:
+#
+#     from tools.fake_gspread import FakeClient
+#     fake = FakeClient(latency=0.15, reads_per_minute=60, writes_per_minute=60)
+#     fake.seed("Users", [["UserID", "Username", "Balance"], ["1", "alice", 1000]])
+#     google_sheet.set_client(fake)
+#
+# Values behave like the real API with value_input_option="RAW": get_all_records()
+# returns formatted values (numbers as int/float, booleans as 'TRUE'/'FALSE'),
+# row_values() returns strings. Every request sleeps `latency` (+ up to `jitter`)
+# seconds, counts against a sliding one-minute read or write quota and fails with a
+# 429 APIError once the quota is spent or with probability `error_rate`.
+# Like a real sheet, a worksheet has a grid of `col_count` columns (26 by default):
+# update/batch_update past it fail with a 400 "exceeds grid limits" until add_cols()
+# grows it, while appends widen the grid themselves.
+# fake.calls counts requests by method and by kind ("read" / "write"); fake.bytes
+# counts JSON payload bytes "sent" (written values) and "received" (values read).
+# The client is thread-safe: the workbook is guarded by one lock, latency is slept
+# outside it, so concurrent requests overlap the way they do against the real API.
+import collections
+import json
+import random
+import re
+import threading
+import time
+
+from gspread.exceptions import APIError, WorksheetNotFound
+
+def _format(value) -> str:
+    if value is True:
+        return "TRUE"
+    if value is False:
+        return "FALSE"
+    if value is None:
+        return ""
+    return str(value)
+
+def _numericise(value: str):
+    if value == "":
+        return ""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+def _column_letter(col: int) -> str:
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _parse_range(a1: str) -> tuple:
+    """'Users!C5' or 'B2:D4' -> (first row, first column)."""
+    start = a1.split("!")[-1].split(":")[0]
+    match = re.fullmatch(r"([A-Za-z]+)(\d+)", start.strip())
+    if not match:
+        raise ValueError(f"Unsupported range: {a1}")
+    col = 0
+    for ch in match.group(1).upper():
+        col = col * 26 + ord(ch) - 64
+    return int(match.group(2)), col
+
+class _FakeResponse:
+    """Just enough of requests.Response for gspread's APIError."""
+
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        status = {400: "INVALID_ARGUMENT", 429: "RESOURCE_EXHAUSTED"}.get(status_code, "ERROR")
+        self._error = {"code": status_code, "message": message, "status": status}
+        self.text = json.dumps({"error": self._error})
+
+    def json(self):
+        return {"error": self._error}
+
+GRID_COLUMNS = 26  # columns of a new Google Sheets worksheet
+
+class FakeWorksheet:
+    def __init__(self, client, spreadsheet, title: str, rows: list = None, cols: int = GRID_COLUMNS):
+        self._client = client
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.rows = [list(r) for r in rows or []]
+        self.col_count = max([cols] + [len(r) for r in self.rows])
+
+    # ---------- reads ----------
+    def get_all_values(self) -> list:
+        self._client._request("read", "get_all_values")
+        with self._client._lock:
+            values = [[_format(v) for v in row] for row in self.rows]
+        return self._client._received(values)
+
+    def get_all_records(self, *args, **kwargs) -> list:
+        self._client._request("read", "get_all_records")
+        with self._client._lock:
+            grid = [[_format(v) for v in row] for row in self.rows]
+        if not grid:
+            return []
+        header = grid[0]
+        records = []
+        for row in grid[1:]:
+            values = row + [""] * len(header)
+            records.append({h: _numericise(values[i]) for i, h in enumerate(header)})
+        # the API sends the value grid; records are built client-side
+        self._client._received(grid)
+        return records
+
+    def row_values(self, row: int, *args, **kwargs) -> list:
+        self._client._request("read", "row_values")
+        with self._client._lock:
+            if row > len(self.rows):
+                return []
+            values = [_format(v) for v in self.rows[row - 1]]
+        while values and values[-1] == "":
+            values.pop()
+        return self._client._received(values)
+
+    # ---------- writes ----------
+    def _set(self, row: int, col: int, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = value
+
+    def _check_grid(self, a1: str, values: list):
+        # callers hold the client lock
+        row, col = _parse_range(a1)
+        last = col + max((len(line) for line in values), default=1) - 1
+        if last > self.col_count:
+            raise APIError(_FakeResponse(400, f"Range ('{self.title}'!{a1}) exceeds grid limits. "
+                                              f"Max rows: 1000, max columns: {self.col_count}"))
+
+    def _write_block(self, a1: str, values: list):
+        row, col = _parse_range(a1)
+        for i, line in enumerate(values):
+            for j, value in enumerate(line):
+                self._set(row + i, col + j, value)
+
+    def update(self, *args, **kwargs):
+        # gspread 5: update(range_name, values); gspread 6: update(values, range_name)
+        self._client._request("write", "update")
+        first, second = (list(args) + [kwargs.get("range_name"), kwargs.get("values")])[:2]
+        a1, values = (first, second) if isinstance(first, str) else (second, first)
+        self._client._sent(values)
+        with self._client._lock:
+            self._check_grid(a1 or "A1", values)
+            self._write_block(a1 or "A1", values)
+        return {"updatedRange": f"{self.title}!{a1}"}
+
+    def batch_update(self, data: list, **kwargs):
+        self._client._request("write", "batch_update")
+        self._client._sent(data)
+        with self._client._lock:
+            # the request is applied all or nothing
+            for item in data:
+                self._check_grid(item["range"], item["values"])
+            for item in data:
+                self._write_block(item["range"], item["values"])
+        return {"totalUpdatedCells": sum(len(v) for item in data for v in item["values"])}
+
+    def append_row(self, values: list, **kwargs):
+        return self._append([values], "append_row")
+
+    def append_rows(self, values: list, **kwargs):
+        return self._append(values, "append_rows")
+
+    def _append(self, rows: list, method: str):
+        self._client._request("write", method)
+        self._client._sent(rows)
+        with self._client._lock:
+            # the API appends after the last non-empty row
+            while self.rows and not any(_format(v) for v in self.rows[-1]):
+                self.rows.pop()
+            start = len(self.rows) + 1
+            self.rows.extend(list(r) for r in rows)
+            end = len(self.rows)
+            width = max((len(r) for r in rows), default=1)
+            self.col_count = max(self.col_count, width)
+        return {"updates": {"updatedRange": f"{self.title}!A{start}:{_column_letter(width)}{end}"}}
+
+    def add_cols(self, cols: int):
+        self._client._request("write", "add_cols")
+        with self._client._lock:
+            self.col_count += cols
+
+    def delete_rows(self, start_index: int, end_index: int = None):
+        self._client._request("write", "delete_rows")
+        with self._client._lock:
+            del self.rows[start_index - 1:(end_index or start_index)]
+
+    def clear(self):
+        self._client._request("write", "clear")
+        with self._client._lock:
+            self.rows = []
+
+class FakeSpreadsheet:
+    def __init__(self, client, key: str):
+        self._client = client
+        self.id = key
+        self._worksheets = {}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._client._request("read", "worksheet")
+        with self._client._lock:
+            ws = self._worksheets.get(title)
+        if ws is None:
+            raise WorksheetNotFound(title)
+        return ws
+
+    def worksheets(self) -> list:
+        self._client._request("read", "worksheets")
+        with self._client._lock:
+            return list(self._worksheets.values())
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        self._client._request("write", "add_worksheet")
+        return self._add(title, cols=cols)
+
+    def _add(self, title: str, values: list = None, cols: int = GRID_COLUMNS) -> FakeWorksheet:
+        with self._client._lock:
+            ws = FakeWorksheet(self._client, self, title, values, cols)
+            self._worksheets[title] = ws
+            return ws
+
+class FakeClient:
+    """Drop-in for the object returned by gspread.authorize(); every key opens the same workbook."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, reads_per_minute: int = None,
+                 writes_per_minute: int = None, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.quotas = {"read": reads_per_minute, "write": writes_per_minute}
+        self.error_rate = error_rate
+        self.calls = collections.Counter()
+        self.bytes = collections.Counter()
+        self._window = {"read": collections.deque(), "write": collections.deque()}
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+        self.spreadsheet = FakeSpreadsheet(self, "fake")
+
+    def _request(self, kind: str, method: str):
+        """Account for one API request: latency, quota window, injected errors."""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls[method] += 1
+            self.calls[kind] += 1
+            now = time.monotonic()
+            window = self._window[kind]
+            while window and now - window[0] >= 60:
+                window.popleft()
+            quota = self.quotas[kind]
+            throttled = quota is not None and len(window) >= quota
+            if not throttled:
+                window.append(now)
+            failed = throttled or (self.error_rate and self._random.random() < self.error_rate)
+            if failed:
+                self.calls["429"] += 1
+        if failed:
+            raise APIError(_FakeResponse(429, f"Quota exceeded for quota metric '{kind.title()} requests' (fake)"))
+
+    def _sent(self, payload):
+        with self._lock:
+            self.bytes["sent"] += len(json.dumps(payload, default=str))
+
+    def _received(self, payload):
+        with self._lock:
+            self.bytes["received"] += len(json.dumps(payload, default=str))
+        return payload
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        self._request("read", "open_by_key")
+        return self.spreadsheet
+
+    # ---------- test helpers (no latency, not counted) ----------
+    def seed(self, title: str, rows: list) -> FakeWorksheet:
+        """Create or replace a worksheet with `rows` (row 1 is the header)."""
+        return self.spreadsheet._add(title, rows)
+
+    def values(self, title: str) -> list:
+        """Raw cell values of a worksheet."""
+        with self._lock:
+            return [list(r) for r in self.spreadsheet._worksheets[title].rows]
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.bytes.clear()
+            for window in self._window.values():
+                window.clear()
@@ -0,0 +1,35 @@
+# tools/harness.py
+# What tools.bench and tools.loadgen share to drive the handlers of bot.COMMANDS
+# without Telegram: a synthetic Update/Context whose replies are collected in a list,
+# and the check that tells an error reply from a normal one:
+#
+#     replies = []
+#     update, context = make_update(1000, "spin", ["100"], replies)
+#     await handlers["spin"](update, context)
+#     error_reply(replies)  -> None, or the first reply that reports an error
+import types
+
+# how handlers start an error reply: "An error occurred: ...", "Error updating ...",
+# "❌ Error during reset: ...", "Failed to update XP ..."
+ERROR_PREFIXES = ("An error occurred", "Error", "Failed")
+
+def make_update(user_id: int, command: str, args: list, replies: list, username: str = None):
+    """(update, context) for `/command args` sent by user_id; reply_text() appends to `replies`."""
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    username = username or f"user{user_id}"
+    text = " ".join([f"/{command}"] + args)
+    message = types.SimpleNamespace(text=text, message_id=1, reply_to_message=None, reply_text=reply_text)
+    user = types.SimpleNamespace(id=user_id, username=username, first_name=username)
+    update = types.SimpleNamespace(effective_user=user, message=message)
+    context = types.SimpleNamespace(args=list(args))
+    return update, context
+
+def is_error_reply(text: str) -> bool:
+    # admin commands echo the command on the first line, so every line is checked
+    return any(line.lstrip("❌ ").startswith(ERROR_PREFIXES) for line in str(text).splitlines())
+
+def error_reply(replies: list):
+    """The first reply that reports an error, or None."""
+    return next((r for r in replies if is_error_reply(r)), None)
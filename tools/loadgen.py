@@ -0,0 +1,312 @@
+# tools/loadgen.py
+# Load generator: N virtual players issue a weighted mix of /start, /daily, /spin,
+# /rps, /aviator, /loan, /rpay and /checkrewards at the handlers in bot.COMMANDS, the
+# way bot.py dispatches them (username hook, per-user lock, flush after the update),
+# with exponential think times in between. Storage is a stand-in: the fake gspread
+# client behind the real Sheets backend (latency, jitter, quota and injected 429s),
+# or a throwaway SQLite file.
+#
+#     python -m tools.loadgen                                  # 100 players x 20 commands
+#     python -m tools.loadgen --players 2000 --actions 10 --think 1 --latency 0.1
+#     python -m tools.loadgen --backend sqlite --players 5000 --think 0
+#
+# It reports throughput, p50/p95/p99 latency and error rate per command, then drains
+# every buffer and checks the stored data:
+#   - ledger: each balance equals its starting balance plus game payouts minus bets,
+#     milestone coins, daily rewards and loans taken minus loans repaid
+#   - TotalBets equals the sum of the player's logged bets (no lost Users update)
+#   - every row handed to the log sink is in a Logs_* table (no lost log rows)
+#   - every player has exactly one Users row (none if each of its /start commands failed)
+# Game cooldowns are switched off. Exits with status 1 when an invariant fails or
+# the error rate is above --max-error-rate.
+import argparse
+import asyncio
+import collections
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+# the scheduler is not the bottleneck under test unless SHEETS_*_PER_MINUTE is set
+os.environ.setdefault("SHEETS_READS_PER_MINUTE", "1000000")
+os.environ.setdefault("SHEETS_WRITES_PER_MINUTE", "1000000")
+
+from tools.harness import error_reply, make_update
+from utils.metrics import percentile
+
+FIRST_PLAYER_ID = 1000
+STARTING_BALANCE = 1000  # what /start gives a new player (commands/start.py)
+
+# relative weights of the commands a player sends
+MIX = {
+    "start": 5,
+    "daily": 5,
+    "spin": 30,
+    "rps": 25,
+    "aviator": 20,
+    "loan": 5,
+    "rpay": 5,
+    "checkrewards": 5,
+}
+
+GAME_LOGS = ("Logs_Spin", "Logs_RPS", "Logs_Aviator")
+LOG_TABLES = GAME_LOGS + ("Logs_BetRewards",)
+DAILY_REWARD = re.compile(r"Reward:</b> ([\d,]+) Coins")
+
+def command_args(command: str, rng: random.Random) -> list:
+    bet = str(rng.choice([10, 50, 100, 250, 500]))
+    if command == "spin":
+        return [bet]
+    if command == "rps":
+        return [bet, rng.choice(["rock", "paper", "scissors"])]
+    if command == "aviator":
+        return [bet, f"{rng.uniform(1.1, 5.0):.2f}"]
+    if command == "loan":
+        return [str(rng.choice([500, 1000, 2000]))]
+    return []
+
+def setup_storage(args) -> tuple:
+    """Install the stand-in backend and seed it. Returns (fake client or None, seeded player ids)."""
+    import storage
+    from storage.schema import TABLE_COLUMNS
+    fake = None
+    if args.backend == "sheets":
+        import google_sheet
+        from storage.sheets import SheetsBackend
+        from tools.fake_gspread import FakeClient
+        # errors are injected only while the players run (run_players), not into setup or the final drain
+        fake = FakeClient(latency=args.latency, jitter=args.jitter, reads_per_minute=args.quota or None,
+                          writes_per_minute=args.quota or None, seed=args.seed)
+        for table, columns in TABLE_COLUMNS.items():
+            fake.seed(table, [columns])
+        google_sheet.set_client(fake)
+        storage.set_backend(SheetsBackend())
+    else:
+        from storage.sqlite import SQLiteBackend
+        path = os.path.join(tempfile.mkdtemp(prefix="loadgen-"), "casino.db")
+        storage.set_backend(SQLiteBackend(path))
+        print(f"SQLite stand-in: {path}")
+
+    new_players = int(args.players * args.new_players)
+    seeded = list(range(FIRST_PLAYER_ID, FIRST_PLAYER_ID + args.players - new_players))
+    header = TABLE_COLUMNS["Users"]
+    storage.append_rows("Users", [
+        [str(uid), f"player{uid}", args.balance, 1, 0, 0, "", 0, "2025-01-01 00:00:00"] + [False] * (len(header) - 9)
+        for uid in seeded
+    ])
+    from commands.betrewards import DEFAULT_BETTING_MILESTONES
+    storage.append_rows("BettingRewards", [
+        [m["threshold"], m["reward"], m["xp"], m["description"], m["active"], ""] for m in DEFAULT_BETTING_MILESTONES
+    ])
+    from storage.migrate import migrate
+    migrate()  # as utils/startup.py does before the bot polls
+    if fake is not None:
+        fake.reset_counts()
+    return fake, seeded
+
+class Recorder:
+    """Latency samples, errors and daily rewards collected while the players run."""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)  # command -> [seconds]
+        self.errors = collections.Counter()             # command -> count
+        self.error_samples = {}                         # command -> first error text
+        self.daily = collections.Counter()              # user_id -> coins from /daily
+        self.registered = set()                         # user_ids whose /start succeeded
+
+async def issue(handlers: dict, recorder: Recorder, user_id: int, command: str, args: list):
+    import bot
+    replies = []
+    update, context = make_update(user_id, command, args, replies, username=f"player{user_id}")
+    error = None
+    started = time.perf_counter()
+    try:
+        await bot.learn_username(update, context)
+        await handlers[command](update, context)
+        await bot.flush_after_update(update, context)
+    except Exception as e:
+        error = repr(e)
+    recorder.latencies[command].append(time.perf_counter() - started)
+
+    error = error or error_reply(replies)
+    if error:
+        recorder.errors[command] += 1
+        recorder.error_samples.setdefault(command, error)
+    elif command == "start":
+        recorder.registered.add(user_id)
+    elif command == "daily":
+        for reply in replies:
+            match = DAILY_REWARD.search(reply)
+            if match:
+                recorder.daily[user_id] += int(match.group(1).replace(",", ""))
+
+async def player(handlers: dict, recorder: Recorder, user_id: int, registered: bool, args, rng: random.Random):
+    commands, weights = list(MIX), list(MIX.values())
+    if not registered:
+        await issue(handlers, recorder, user_id, "start", [])
+    for _ in range(args.actions):
+        if args.think > 0:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+        command = rng.choices(commands, weights)[0]
+        await issue(handlers, recorder, user_id, command, command_args(command, rng))
+
+async def run_players(args, seeded: list, fake=None) -> tuple:
+    import bot
+    from utils import aio, cooldown, log_sink
+    from utils.locks import serialized_per_user
+    cooldown.COOLDOWN_SECONDS = 0
+    handlers = {name: serialized_per_user(callback) for name, callback in bot.COMMANDS if name in MIX}
+
+    seeded_ids = set(seeded)
+    recorder = Recorder()
+    if fake is not None:
+        fake.error_rate = args.error_rate
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        player(handlers, recorder, uid, uid in seeded_ids, args, random.Random(f"{args.seed}-{uid}"))
+        for uid in range(FIRST_PLAYER_ID, FIRST_PLAYER_ID + args.players)
+    ))
+    elapsed = time.perf_counter() - started
+    if fake is not None:
+        fake.error_rate = 0.0  # the outage is over: whatever was accepted must now be stored
+
+    # what bot.on_shutdown does: nothing may stay buffered before the data is checked
+    await aio.flush_writes()
+    await aio.run_io(log_sink.drain)
+    return recorder, elapsed
+
+def _int(value) -> int:
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+def check_invariants(args, seeded: list, recorder: Recorder, logged_rows: int) -> list:
+    """Read the final tables straight from storage and return every violation found."""
+    import storage
+    users = storage.read_all_records("Users")
+    logs = {table: storage.read_all_records(table) for table in LOG_TABLES}
+    loans = storage.read_all_records("Logs_Loan")
+    failures = []
+
+    rows_per_user = collections.Counter(str(u.get("UserID")) for u in users)
+    for uid in range(FIRST_PLAYER_ID, FIRST_PLAYER_ID + args.players):
+        # a player whose every /start failed (injected errors) is not registered
+        want = 1 if uid in seeded or uid in recorder.registered else 0
+        if rows_per_user[str(uid)] != want:
+            failures.append(f"player {uid} has {rows_per_user[str(uid)]} Users rows, expected {want}")
+
+    expected = {str(uid): args.balance for uid in seeded}
+    bets = collections.Counter()
+    for uid, coins in recorder.daily.items():
+        expected[str(uid)] = expected.get(str(uid), STARTING_BALANCE) + coins
+    for table in GAME_LOGS:
+        for r in logs[table]:
+            uid = str(r.get("UserID"))
+            expected[uid] = expected.get(uid, STARTING_BALANCE) + _int(r.get("Payout")) - _int(r.get("BetAmount"))
+            bets[uid] += _int(r.get("BetAmount"))
+    for r in logs["Logs_BetRewards"]:
+        uid = str(r.get("UserID"))
+        expected[uid] = expected.get(uid, STARTING_BALANCE) + _int(r.get("CoinsAwarded"))
+    for r in loans:
+        uid = str(r.get("UserID"))
+        delta = _int(r.get("Amount"))
+        if str(r.get("Status", "")).lower() == "paid":
+            delta -= _int(r.get("RepayAmount"))
+        expected[uid] = expected.get(uid, STARTING_BALANCE) + delta
+
+    stored_total = expected_total = 0
+    for u in users:
+        uid = str(u.get("UserID"))
+        balance = _int(u.get("Balance"))
+        want = expected.get(uid, STARTING_BALANCE)
+        stored_total += balance
+        expected_total += want
+        if balance != want:
+            failures.append(f"player {uid}: balance {balance:,} but the ledger says {want:,}")
+        if _int(u.get("TotalBets")) != bets[uid]:
+            failures.append(f"player {uid}: TotalBets {_int(u.get('TotalBets')):,} but logged bets sum to {bets[uid]:,}")
+    if stored_total != expected_total:
+        failures.append(f"coins not conserved: {stored_total:,} stored, {expected_total:,} expected")
+
+    stored_rows = sum(len(rows) for rows in logs.values())
+    if stored_rows != logged_rows:
+        failures.append(f"log rows: {logged_rows:,} sent to the log sink, {stored_rows:,} stored")
+    return failures
+
+def print_report(args, recorder: Recorder, elapsed: float, fake):
+    total = sum(len(v) for v in recorder.latencies.values())
+    errors = sum(recorder.errors.values())
+    print(f"\n{args.players:,} players x {args.actions} commands, {args.backend} backend, "
+          f"{args.latency * 1000:.0f} ms simulated latency")
+    print(f"{total:,} commands in {elapsed:.1f}s = {total / elapsed if elapsed else 0:,.1f} commands/s, "
+          f"{errors:,} errors ({errors / total * 100 if total else 0:.2f}%)")
+    print(f"\n{'command':<14}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    everything = []
+    for command in MIX:
+        samples = sorted(recorder.latencies.get(command, []))
+        everything.extend(samples)
+        if samples:
+            print(f"{command:<14}{len(samples):>8}{recorder.errors[command]:>8}"
+                  f"{percentile(samples, 0.5) * 1000:>10.1f}{percentile(samples, 0.95) * 1000:>10.1f}"
+                  f"{percentile(samples, 0.99) * 1000:>10.1f}{samples[-1] * 1000:>10.1f}")
+    everything.sort()
+    if everything:
+        print(f"{'all':<14}{len(everything):>8}{errors:>8}"
+              f"{percentile(everything, 0.5) * 1000:>10.1f}{percentile(everything, 0.95) * 1000:>10.1f}"
+              f"{percentile(everything, 0.99) * 1000:>10.1f}{everything[-1] * 1000:>10.1f}")
+    for command, sample in recorder.error_samples.items():
+        print(f"first {command} error: {sample}")
+
+    if fake is not None:
+        import google_sheet
+        print(f"\nSheets requests: {fake.calls['read']:,} reads, {fake.calls['write']:,} writes, "
+              f"{fake.calls['429']:,} answered 429")
+        print(f"Scheduler: {google_sheet.get_scheduler_stats()}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent players against the bot's handlers.")
+    parser.add_argument("--players", type=int, default=100, help="virtual players")
+    parser.add_argument("--actions", type=int, default=20, help="commands per player")
+    parser.add_argument("--think", type=float, default=0.2, help="mean think time between commands (seconds)")
+    parser.add_argument("--new-players", type=float, default=0.1, help="fraction of players that register with /start")
+    parser.add_argument("--balance", type=int, default=10000, help="starting balance of seeded players")
+    parser.add_argument("--backend", choices=["sheets", "sqlite"], default="sheets", help="stand-in storage")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per Sheets request")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random seconds per Sheets request")
+    parser.add_argument("--quota", type=int, default=0, help="fake API reads and writes per minute (0: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Sheets requests failing with 429")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="highest acceptable command error rate")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    fake, seeded = setup_storage(args)
+    from utils import log_sink
+    sink = log_sink.get_log_sink_stats()
+    logged_before = sink["rows_queued"] + sink["direct_writes"]
+
+    recorder, elapsed = asyncio.run(run_players(args, seeded, fake))
+    print_report(args, recorder, elapsed, fake)
+
+    sink = log_sink.get_log_sink_stats()
+    logged_rows = sink["rows_queued"] + sink["direct_writes"] - logged_before
+    failures = check_invariants(args, seeded, recorder, logged_rows)
+    total = sum(len(v) for v in recorder.latencies.values())
+    error_rate = sum(recorder.errors.values()) / total if total else 0.0
+    if error_rate > args.max_error_rate:
+        failures.append(f"error rate {error_rate:.2%} is above {args.max_error_rate:.2%}")
+
+    print()
+    for failure in failures[:50]:
+        print(f"FAIL {failure}")
+    if len(failures) > 50:
+        print(f"... and {len(failures) - 50} more")
+    if failures:
+        return 1
+    print("All invariants hold.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# utils/aio.py
+# Async facade over storage (Google Sheets / SQLite) and utils/helpers.py.
+# Storage calls block (HTTP requests or disk I/O); every function here runs its sync
+# counterpart on a bounded thread pool, so handlers can `await` Sheets I/O without
+# stalling python-telegram-bot's event loop for every other chat.
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import storage
+from utils import helpers
+
+SHEETS_IO_WORKERS = int(os.getenv("SHEETS_IO_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=SHEETS_IO_WORKERS, thread_name_prefix="sheets-io")
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking function on the Sheets I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def pending_io() -> int:
+    """Calls waiting for a free worker of the Sheets I/O pool."""
+    return _executor._work_queue.qsize()
+
+def _offload(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_io(func, *args, **kwargs)
+    return wrapper
+
+# storage
+read_all_records = _offload(storage.read_all_records)
+read_header = _offload(storage.read_header)
+append_row = _offload(storage.append_row)
+append_rows = _offload(storage.append_rows)
+update_cell = _offload(storage.update_cell)
+delete_rows = _offload(storage.delete_rows)
+flush_writes = _offload(storage.flush_writes)
+
+# utils/helpers.py (is_admin stays sync: it only reads the in-memory admin set)
+get_user = _offload(helpers.get_user)
+register_user = _offload(helpers.register_user)
+claim_daily_reward = _offload(helpers.claim_daily_reward)
+resolve_user_id = _offload(helpers.resolve_user_id)
+add_admin = _offload(helpers.add_admin)
+load_admins = _offload(helpers.load_admins)
+gain_xp = _offload(helpers.gain_xp)
+set_user_xp = _offload(helpers.set_user_xp)
+get_active_loan = _offload(helpers.get_active_loan)
+create_loan = _offload(helpers.create_loan)
+repay_active_loan = _offload(helpers.repay_active_loan)
+list_loans = _offload(helpers.list_loans)
+update_user_balance = _offload(helpers.update_user_balance)
+update_user_field = _offload(helpers.update_user_field)
+update_user_fields = _offload(helpers.update_user_fields)
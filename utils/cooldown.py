@@ -24,3 +24,13 @@ def set_cooldown(user_id: int, game: str):
     if user_id not in cooldowns:
         cooldowns[user_id] = {}
     cooldowns[user_id][game] = time.time()
+
+def active_cooldowns() -> dict:
+    """Number of users still on cooldown, per game: { "spin": 3, ... }"""
+    now = time.time()
+    active = {}
+    for user_cd in list(cooldowns.values()):
+        for game, last in list(user_cd.items()):
+            if now - last < COOLDOWN_SECONDS:
+                active[game] = active.get(game, 0) + 1
+    return active
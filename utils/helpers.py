@@ -1,7 +1,177 @@
 # utils/helpers.py
-from google_sheet import get_worksheet, read_all_records, append_row, update_cell
+from storage import read_all_records, append_row, update_cell, flush_writes, background_priority
+from storage.a1 import a1
+from storage.migrate import cell, column_map, row_cells
+from utils.profiling import profiled
 from typing import Optional
 import datetime
+import os
+import re
+import threading
+import time
+
+# ===================== Users cache =====================
+# In-process copy of the Users sheet. It is loaded on first use, patched by every
+# write made through these helpers (write-through) and reloaded once it is older
+# than USERS_CACHE_TTL seconds, so manual edits in the sheet still show up.
+# "index" maps str(UserID) -> (sheet row, record) so finding a user is a dict lookup,
+# "usernames" maps lowercased Username -> str(UserID) for resolve_user_id().
+# _users_lock is never held while the sheet downloads: one thread reloads at a time
+# (_users_reload_lock), others keep using the expired copy meanwhile, and changes made
+# to the cache during the download are journaled and applied again to the new copy.
+# When a reload fails (Sheets down or out of quota) the expired copy keeps being
+# served and the next attempt waits USERS_RELOAD_BACKOFF seconds.
+USERS_CACHE_TTL = float(os.getenv("USERS_CACHE_TTL", "60"))
+USERS_RELOAD_BACKOFF = float(os.getenv("USERS_RELOAD_BACKOFF", "10"))
+UPDATE_ATTEMPTS = 3  # read-modify-write retries when update_user_fields() reports a conflict
+
+_users_cache = {"records": None, "index": {}, "usernames": {}, "loaded_at": 0.0, "journal": None}
+_users_lock = threading.RLock()
+_users_reload_lock = threading.Lock()
+# conflicts: update_user_fields() checks that failed; reload_errors: reloads that kept the old copy
+users_cache_stats = {"hits": 0, "misses": 0, "reloads": 0, "conflicts": 0, "reload_errors": 0}
+
+def _index_users(records: list):
+    """Rebuild the UserID -> (row, record) and Username -> UserID indexes. Data rows start at sheet row 2."""
+    index = {}
+    usernames = {}
+    for row, u in enumerate(records, start=2):
+        key = str(u.get("UserID", "")).strip()
+        if key and key not in index:  # first row wins, like the old linear scans
+            index[key] = (row, u)
+            name = str(u.get("Username", "")).strip().lower()
+            if name:
+                usernames.setdefault(name, key)
+    _users_cache["index"] = index
+    _users_cache["usernames"] = usernames
+
+def _journal(*change):
+    """Record a cache change made while a reload is downloading (caller holds _users_lock)."""
+    if _users_cache["journal"] is not None:
+        _users_cache["journal"].append(change)
+
+def _replay(journal: list) -> bool:
+    """Apply journaled changes to the copy just loaded. False if it must be reloaded again soon."""
+    records, index, usernames = _users_cache["records"], _users_cache["index"], _users_cache["usernames"]
+    consistent = True
+    for kind, key, *args in journal:
+        if kind == "patch":
+            entry = index.get(key)
+            if entry:
+                entry[1].update(args[0])
+        elif kind == "add" and key not in index:  # appended after the download was taken
+            row, record, username = args
+            if row is not None and row != len(records) + 2:
+                consistent = False
+                continue
+            records.append(record)
+            index[key] = (len(records) + 1, record)
+            if username:
+                usernames.setdefault(username.lower(), key)
+        elif kind == "invalidate":
+            consistent = False
+    return consistent
+
+def _load_users(force: bool = False) -> list:
+    """Return the cached Users records, (re)loading them when missing, expired or forced."""
+    with _users_lock:
+        records = _users_cache["records"]
+        fresh = time.monotonic() - _users_cache["loaded_at"] < USERS_CACHE_TTL
+        if records is not None and fresh and not force:
+            users_cache_stats["hits"] += 1
+            return records
+        users_cache_stats["misses"] += 1
+
+    # an expired copy is still served while another thread downloads the new one
+    if not _users_reload_lock.acquire(blocking=records is None or force):
+        return records
+    try:
+        with _users_lock:
+            current = _users_cache["records"]
+            if not force and current is not None and current is not records:
+                return current  # reloaded while this thread waited
+            _users_cache["journal"] = []
+        try:
+            loaded = read_all_records("Users")
+        except Exception as e:
+            with _users_lock:
+                _users_cache["journal"] = None
+                stale = _users_cache["records"]
+                if stale is None:
+                    raise
+                _users_cache["loaded_at"] = time.monotonic() - USERS_CACHE_TTL + USERS_RELOAD_BACKOFF
+                users_cache_stats["reload_errors"] += 1
+            print(f"Error reloading Users, serving the cached copy: {e}")
+            return stale
+        with _users_lock:
+            journal, _users_cache["journal"] = _users_cache["journal"], None
+            _users_cache["records"] = loaded
+            _index_users(loaded)
+            _users_cache["loaded_at"] = time.monotonic() if _replay(journal) else 0.0
+            users_cache_stats["reloads"] += 1
+            return loaded
+    finally:
+        _users_reload_lock.release()
+
+def invalidate_users_cache():
+    """Drop the cached Users table; the next lookup reloads it from the sheet."""
+    with _users_lock:
+        _users_cache["records"] = None
+        _users_cache["index"] = {}
+        _users_cache["usernames"] = {}
+        _users_cache["loaded_at"] = 0.0
+        _journal("invalidate", None)
+
+def _lookup_user(user_id) -> Optional[tuple]:
+    """Return (sheet row, cached record) for user_id, or None if not registered."""
+    _load_users()
+    with _users_lock:
+        return _users_cache["index"].get(str(user_id).strip())
+
+def get_user_row(user_id: int) -> Optional[int]:
+    """Return the Users sheet row number of user_id, or None."""
+    entry = _lookup_user(user_id)
+    return entry[0] if entry else None
+
+def remember_username(user_id: int, username: str):
+    """
+    Learn a registered user's current Telegram username so admin commands can target it.
+    Memory only: unknown users and an unloaded cache are ignored.
+    Runs on the event loop for every update, so it takes no lock (a holder of _users_lock
+    may be waiting on storage): single dict operations are atomic, a reload replaces the
+    dicts whole, and a name learned while a reload runs is learned again on the next update.
+    """
+    if not username:
+        return
+    key = str(user_id)
+    if key in _users_cache["index"]:
+        _users_cache["usernames"][username.lower()] = key
+
+def is_truthy(value) -> bool:
+    """Read a checkbox-style cell: get_all_records() returns booleans as 'TRUE'/'FALSE' strings."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "on")
+    return bool(value)
+
+def patch_cached_user(user_id: int, fields: dict):
+    """Apply values just written to the sheet to the cached user record."""
+    with _users_lock:
+        key = str(user_id).strip()
+        entry = _users_cache["index"].get(key)
+        if entry:
+            entry[1].update(fields)
+        _journal("patch", key, dict(fields))
+
+def get_users_cache_stats() -> dict:
+    """Return hit/miss counters plus size and age of the cached Users table."""
+    with _users_lock:
+        stats = dict(users_cache_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        records = _users_cache["records"]
+        stats["size"] = len(records) if records is not None else 0
+        stats["age_seconds"] = time.monotonic() - _users_cache["loaded_at"] if records is not None else None
+    return stats
 
 def get_user(user_id: int) -> Optional[dict]:
     """
@@ -9,11 +179,8 @@ def get_user(user_id: int) -> Optional[dict]:
     Assumes Users sheet has headers:
     UserID | Username | Balance | Level | XP | TotalBets | LastDaily | Streak
     """
-    users = read_all_records("Users")
-    for u in users:
-        if str(u.get("UserID")) == str(user_id):
-            return u
-    return None
+    entry = _lookup_user(user_id)
+    return dict(entry[1]) if entry else None
 
 def register_user(user_id: int, username: str, starting_balance: int = 1000):
     """
@@ -25,8 +192,7 @@ def register_user(user_id: int, username: str, starting_balance: int = 1000):
     if existing:
         return False
 
-    ws = get_worksheet("Users")
-    headers = ws.row_values(1)
+    columns = column_map("Users")
     now_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Base defaults that should always exist
@@ -54,17 +220,38 @@ def register_user(user_id: int, username: str, starting_balance: int = 1000):
     # Combine defaults, prioritizing existing headers
     all_defaults = {**base_defaults, **milestone_defaults}
     
-    # Build row based on existing headers
-    row = []
-    for col in headers:
+    # Build row based on the column map; empty for any additional columns
+    row = [""] * max(columns.values(), default=0)
+    for col, index in columns.items():
         if col in all_defaults:
-            row.append(all_defaults[col])
-        else:
-            row.append("")  # Empty for any additional columns
+            row[index - 1] = all_defaults[col]
     
-    append_row("Users", row)
+    response = append_row("Users", row)
+    new_row = _appended_row_number(response)
+    record = {col: row[index - 1] for col, index in columns.items()}
+    with _users_lock:
+        _journal("add", str(user_id), new_row, record, username)
+        records = _users_cache["records"]
+        if records is not None:
+            if new_row is not None and new_row != len(records) + 2:
+                # sheet layout differs from our copy (blank/inserted rows): rebuild on next use
+                invalidate_users_cache()
+            else:
+                records.append(record)
+                _users_cache["index"].setdefault(str(user_id), (len(records) + 1, record))
+                if username:
+                    _users_cache["usernames"].setdefault(username.lower(), str(user_id))
     return True
 
+def _appended_row_number(response) -> Optional[int]:
+    """Row number written by append_row, parsed from updates.updatedRange ('Users!A42:M42')."""
+    try:
+        updated_range = response["updates"]["updatedRange"]
+        match = re.search(r"![A-Z]+(\d+)", updated_range)
+        return int(match.group(1)) if match else None
+    except Exception:
+        return None
+
 LEVELS = [
     {"Level": 1, "XPRequired": 0,    "BonusAmount": 500,  "StreakBonus": 0,   "Description": "First level daily bonus"},
     {"Level": 2, "XPRequired": 1000, "BonusAmount": 600,  "StreakBonus": 50,  "Description": "Streak bonus included"},
@@ -84,6 +271,7 @@ def _get_level_info(current_xp: int):
             break
     return current, next_level
 
+@profiled("claim_daily_reward")
 def claim_daily_reward(user_id: int, base_reward: int = 500):
     """
     Claim daily reward for user.
@@ -93,13 +281,8 @@ def claim_daily_reward(user_id: int, base_reward: int = 500):
     - Updates Balance, LastDaily (YYYY-MM-DD), Streak, and DailyClaimedAt (timestamp) if column exists.
     Returns dict with keys: {claimed: bool, reason: str, balance: int, reward: int, streak: int, next_claim_in: str, xp: int, level: int, xp_gain: int}
     """
-    ws = get_worksheet("Users")
-    headers = ws.row_values(1)
-    users = ws.get_all_records()
-
     # header indices
-    def col_idx(name: str) -> Optional[int]:
-        return headers.index(name) + 1 if name in headers else None
+    col_idx = column_map("Users").get
 
     col_user = col_idx("UserID")
     col_balance = col_idx("Balance")
@@ -117,124 +300,161 @@ def claim_daily_reward(user_id: int, base_reward: int = 500):
     now_str = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
     # find user row
-    for idx, u in enumerate(users, start=2):
-        if str(u.get("UserID")) == str(user_id):
+    entry = _lookup_user(user_id)
+    if entry:
+        u = dict(entry[1])  # snapshot: the cached record changes when another update lands
+        balance_val = 0
+        try:
+            balance_val = int(u.get("Balance", 0))
+        except Exception:
             balance_val = 0
-            try:
-                balance_val = int(u.get("Balance", 0))
-            except Exception:
-                balance_val = 0
 
+        current_xp = 0
+        try:
+            current_xp = int(u.get("XP", 0) or 0)
+        except Exception:
             current_xp = 0
-            try:
-                current_xp = int(u.get("XP", 0) or 0)
-            except Exception:
-                current_xp = 0
 
+        current_level = 1
+        try:
+            current_level = int(u.get("Level", 1) or 1)
+        except Exception:
             current_level = 1
+
+        last_daily_raw = str(u.get("LastDaily", "")).strip()
+        last_daily_date = None
+        if last_daily_raw:
             try:
-                current_level = int(u.get("Level", 1) or 1)
-            except Exception:
-                current_level = 1
-
-            last_daily_raw = str(u.get("LastDaily", "")).strip()
-            last_daily_date = None
-            if last_daily_raw:
-                try:
-                    last_daily_date = datetime.datetime.strptime(last_daily_raw, "%Y-%m-%d").date()
-                except Exception:
-                    last_daily_date = None
-
-            # already claimed today?
-            if last_daily_date == today:
-                # compute next reset time (UTC midnight)
-                tomorrow = today + datetime.timedelta(days=1)
-                next_reset = datetime.datetime.combine(tomorrow, datetime.time.min)
-                remaining = int((next_reset - datetime.datetime.utcnow()).total_seconds())
-                hrs = remaining // 3600
-                mins = (remaining % 3600) // 60
-                secs = remaining % 60
-                return {
-                    "claimed": False,
-                    "reason": f"Already claimed today. Next in {hrs}h {mins}m {secs}s",
-                    "balance": balance_val,
-                    "reward": 0,
-                    "streak": int(u.get("Streak", 0) or 0),
-                    "next_claim_in": f"{hrs}h {mins}m {secs}s",
-                    "xp": current_xp,
-                    "level": current_level,
-                    "xp_gain": 0,
-                }
-
-            # streak calc
-            current_streak = 0
-            try:
-                current_streak = int(u.get("Streak", 0) or 0)
+                last_daily_date = datetime.datetime.strptime(last_daily_raw, "%Y-%m-%d").date()
             except Exception:
-                current_streak = 0
-
-            if last_daily_date == yesterday:
-                new_streak = current_streak + 1
-            else:
-                new_streak = 1
-
-            # compute reward and xp gain based on level and streak
-            # level is determined by current XP before claim
-            level_info, next_level_info = _get_level_info(current_xp)
-            base_bonus = level_info["BonusAmount"]
-            streak_bonus_per = level_info["StreakBonus"]
-            # streak counts as new_streak after this claim
-            pending_streak = new_streak
-            streak_component = max(pending_streak - 1, 0) * streak_bonus_per
-            reward_amount = base_bonus + streak_component
-            # ensure minimum equals base_reward parameter
-            reward_amount = max(reward_amount, base_reward)
-
-            xp_gain = reward_amount  # XP increases according to reward (can tweak if needed)
-            new_xp = current_xp + xp_gain
-
-            # recalc level after XP gain
-            new_level_info, _ = _get_level_info(new_xp)
-            new_level = new_level_info["Level"]
-
-            new_balance = balance_val + reward_amount
-
-            # perform updates
-            update_cell("Users", f"{chr(64 + col_balance)}{idx}", new_balance)
-            update_cell("Users", f"{chr(64 + col_last_daily)}{idx}", today.strftime("%Y-%m-%d"))
-            update_cell("Users", f"{chr(64 + col_streak)}{idx}", new_streak)
-            if col_claimed_at:
-                update_cell("Users", f"{chr(64 + col_claimed_at)}{idx}", now_str)
-            # update XP and Level
-            update_cell("Users", f"{chr(64 + col_xp)}{idx}", new_xp)
-            if new_level != current_level:
-                update_cell("Users", f"{chr(64 + col_level)}{idx}", new_level)
-
+                last_daily_date = None
+
+        # already claimed today?
+        if last_daily_date == today:
+            # compute next reset time (UTC midnight)
+            tomorrow = today + datetime.timedelta(days=1)
+            next_reset = datetime.datetime.combine(tomorrow, datetime.time.min)
+            remaining = int((next_reset - datetime.datetime.utcnow()).total_seconds())
+            hrs = remaining // 3600
+            mins = (remaining % 3600) // 60
+            secs = remaining % 60
             return {
-                "claimed": True,
-                "reason": "OK",
-                "balance": new_balance,
-                "reward": reward_amount,
-                "streak": new_streak,
-                "next_claim_in": "24h",
-                "xp": new_xp,
-                "level": new_level,
-                "xp_gain": xp_gain,
+                "claimed": False,
+                "reason": f"Already claimed today. Next in {hrs}h {mins}m {secs}s",
+                "balance": balance_val,
+                "reward": 0,
+                "streak": int(u.get("Streak", 0) or 0),
+                "next_claim_in": f"{hrs}h {mins}m {secs}s",
+                "xp": current_xp,
+                "level": current_level,
+                "xp_gain": 0,
             }
 
+        # streak calc
+        current_streak = 0
+        try:
+            current_streak = int(u.get("Streak", 0) or 0)
+        except Exception:
+            current_streak = 0
+
+        if last_daily_date == yesterday:
+            new_streak = current_streak + 1
+        else:
+            new_streak = 1
+
+        # compute reward and xp gain based on level and streak
+        # level is determined by current XP before claim
+        level_info, next_level_info = _get_level_info(current_xp)
+        base_bonus = level_info["BonusAmount"]
+        streak_bonus_per = level_info["StreakBonus"]
+        # streak counts as new_streak after this claim
+        pending_streak = new_streak
+        streak_component = max(pending_streak - 1, 0) * streak_bonus_per
+        reward_amount = base_bonus + streak_component
+        # ensure minimum equals base_reward parameter
+        reward_amount = max(reward_amount, base_reward)
+
+        xp_gain = reward_amount  # XP increases according to reward (can tweak if needed)
+        new_xp = current_xp + xp_gain
+
+        # recalc level after XP gain
+        new_level_info, _ = _get_level_info(new_xp)
+        new_level = new_level_info["Level"]
+
+        new_balance = balance_val + reward_amount
+
+        # one batch_update, and only if no other claim or bet changed the row meanwhile
+        written = {"Balance": new_balance, "LastDaily": today.strftime("%Y-%m-%d"), "Streak": new_streak, "XP": new_xp, "Level": new_level}
+        if col_claimed_at:
+            written["DailyClaimedAt"] = now_str
+        expected = {field: u.get(field, "") for field in ("Balance", "LastDaily", "XP")}
+        if not update_user_fields(user_id, written, expected=expected):
+            return {"claimed": False, "reason": "Your balance changed during the claim, please try again", "balance": balance_val,
+                    "reward": 0, "streak": current_streak, "next_claim_in": "", "xp": current_xp, "level": current_level, "xp_gain": 0}
+
+        return {
+            "claimed": True,
+            "reason": "OK",
+            "balance": new_balance,
+            "reward": reward_amount,
+            "streak": new_streak,
+            "next_claim_in": "24h",
+            "xp": new_xp,
+            "level": new_level,
+            "xp_gain": xp_gain,
+        }
+
     return {"claimed": False, "reason": "User not found", "balance": 0, "reward": 0, "streak": 0, "next_claim_in": ""}
 
+# ===================== Admins =====================
+# Admin IDs are kept in memory: loaded at startup, updated by add_admin() and
+# refreshed in a background thread every ADMINS_REFRESH_SECONDS so admins added
+# by hand in the sheet still appear. is_admin() itself never waits on the network:
+# until the set has been loaded it answers False and starts the load in the background.
+ADMINS_REFRESH_SECONDS = float(os.getenv("ADMINS_REFRESH_SECONDS", "300"))
+
+_admins = {"ids": None, "loaded_at": 0.0, "refreshing": False}
+_admins_lock = threading.Lock()
+
+def load_admins() -> set:
+    """Read the Admins sheet into the in-memory admin set and return it."""
+    records = read_all_records("Admins")
+    ids = {str(r.get("AdminID")).strip() for r in records if str(r.get("AdminID", "")).strip()}
+    with _admins_lock:
+        _admins["ids"] = ids
+        _admins["loaded_at"] = time.monotonic()
+    return ids
+
+def _refresh_admins_in_background():
+    with _admins_lock:
+        if _admins["refreshing"]:
+            return
+        _admins["refreshing"] = True
+
+    def run():
+        try:
+            with background_priority():
+                load_admins()
+        except Exception as e:
+            print(f"Error refreshing admins: {e}")
+        finally:
+            with _admins_lock:
+                _admins["refreshing"] = False
+
+    threading.Thread(target=run, name="admins-refresh", daemon=True).start()
+
 def is_admin(user_id: int) -> bool:
     """Return True if user_id exists in Admins sheet."""
-    try:
-        ws = get_worksheet("Admins")
-        records = ws.get_all_records()
-        for r in records:
-            if str(r.get("AdminID")) == str(user_id):
-                return True
-    except Exception:
+    with _admins_lock:
+        ids = _admins["ids"]
+        stale = time.monotonic() - _admins["loaded_at"] >= ADMINS_REFRESH_SECONDS
+    if ids is None:
+        # not loaded at startup: deny until the background load has filled the set
+        _refresh_admins_in_background()
         return False
-    return False
+    if stale:
+        _refresh_admins_in_background()
+    return str(user_id) in ids
 
 def resolve_user_id(identifier: str) -> Optional[int]:
     """Resolve identifier (username or numeric id) to a user_id from Users sheet."""
@@ -245,31 +465,33 @@ def resolve_user_id(identifier: str) -> Optional[int]:
     if identifier.startswith("@"):
         identifier = identifier[1:]
     try:
-        ws = get_worksheet("Users")
-        records = ws.get_all_records()
-        for r in records:
-            if str(r.get("Username", "")).lower() == identifier.lower():
-                try:
-                    return int(r.get("UserID"))
-                except Exception:
-                    return None
+        _load_users()
+        with _users_lock:
+            found = _users_cache["usernames"].get(identifier.lower())
+        return int(found) if found else None
     except Exception:
         return None
-    return None
 
 def add_admin(target_user_id: int, username: str = "", role: str = "admin") -> bool:
     """Add a row to Admins sheet if not present. Returns True if added or already exists."""
     try:
-        ws = get_worksheet("Admins")
-        records = ws.get_all_records()
-        for r in records:
-            if str(r.get("AdminID")) == str(target_user_id):
-                return True
-        # append respecting headers order if possible
-        headers = ws.row_values(1)
+        with _admins_lock:
+            ids = _admins["ids"]
+        if ids is None:
+            # runs on the I/O pool, so it can read the sheet instead of guessing
+            ids = load_admins()
+        if str(target_user_id) in ids:
+            return True
+        # append respecting the column order
+        columns = column_map("Admins")
         values = {"AdminID": str(target_user_id), "Username": username, "Role": role}
-        row = [values.get(h, "") for h in headers] if headers else [str(target_user_id), username, role]
+        row = [""] * max(columns.values(), default=0)
+        for col, index in columns.items():
+            row[index - 1] = values.get(col, "")
         append_row("Admins", row)
+        with _admins_lock:
+            if _admins["ids"] is not None:
+                _admins["ids"].add(str(target_user_id))
         return True
     except Exception:
         return False
@@ -282,11 +504,7 @@ def gain_xp(user_id: int, amount: int):
     if amount == 0:
         return {"ok": True, "xp": 0, "level": 0, "delta": 0}
 
-    ws = get_worksheet("Users")
-    headers = ws.row_values(1)
-
-    def col_idx(name: str) -> Optional[int]:
-        return headers.index(name) + 1 if name in headers else None
+    col_idx = column_map("Users").get
 
     col_user = col_idx("UserID")
     col_xp = col_idx("XP")
@@ -294,28 +512,20 @@ def gain_xp(user_id: int, amount: int):
     if not (col_user and col_xp and col_level):
         return {"ok": False, "xp": 0, "level": 0, "delta": 0}
 
-    users = ws.get_all_records()
-    for idx, u in enumerate(users, start=2):
-        if str(u.get("UserID")) == str(user_id):
+    # read-modify-write: start over if another update changed XP in between
+    for _ in range(UPDATE_ATTEMPTS):
+        user = get_user(user_id)
+        if not user:
+            break
+        current_xp = 0
+        try:
+            current_xp = int(user.get("XP", 0) or 0)
+        except Exception:
             current_xp = 0
-            try:
-                current_xp = int(u.get("XP", 0) or 0)
-            except Exception:
-                current_xp = 0
-            current_level = 1
-            try:
-                current_level = int(u.get("Level", 1) or 1)
-            except Exception:
-                current_level = 1
-
-            new_xp = max(current_xp + amount, 0)
-            update_cell("Users", f"{chr(64 + col_xp)}{idx}", new_xp)
-
-            new_level_info, _ = _get_level_info(new_xp)
-            new_level = new_level_info["Level"]
-            if new_level != current_level:
-                update_cell("Users", f"{chr(64 + col_level)}{idx}", new_level)
 
+        new_xp = max(current_xp + amount, 0)
+        new_level = _get_level_info(new_xp)[0]["Level"]
+        if update_user_fields(user_id, {"XP": new_xp, "Level": new_level}, expected={"XP": user.get("XP", "")}):
             return {"ok": True, "xp": new_xp, "level": new_level, "delta": amount}
 
     return {"ok": False, "xp": 0, "level": 0, "delta": 0}
@@ -327,11 +537,7 @@ def set_user_xp(user_id: int, new_xp: int):
     """
     if new_xp < 0:
         new_xp = 0
-    ws = get_worksheet("Users")
-    headers = ws.row_values(1)
-
-    def col_idx(name: str) -> Optional[int]:
-        return headers.index(name) + 1 if name in headers else None
+    col_idx = column_map("Users").get
 
     col_user = col_idx("UserID")
     col_xp = col_idx("XP")
@@ -339,22 +545,16 @@ def set_user_xp(user_id: int, new_xp: int):
     if not (col_user and col_xp and col_level):
         return {"ok": False, "xp": 0, "level": 0}
 
-    users = ws.get_all_records()
-    for idx, u in enumerate(users, start=2):
-        if str(u.get("UserID")) == str(user_id):
-            update_cell("Users", f"{chr(64 + col_xp)}{idx}", new_xp)
-            new_level_info, _ = _get_level_info(new_xp)
-            new_level = new_level_info["Level"]
-            update_cell("Users", f"{chr(64 + col_level)}{idx}", new_level)
-            return {"ok": True, "xp": new_xp, "level": new_level}
+    new_level = _get_level_info(new_xp)[0]["Level"]
+    if update_user_fields(user_id, {"XP": new_xp, "Level": new_level}):
+        return {"ok": True, "xp": new_xp, "level": new_level}
     return {"ok": False, "xp": 0, "level": 0}
 
 # ===================== Loans =====================
 def get_active_loan(user_id: int) -> Optional[dict]:
     """Return the most recent active loan for the user from Logs_Loan, or None."""
     try:
-        ws = get_worksheet("Logs_Loan")
-        records = ws.get_all_records()
+        records = read_all_records("Logs_Loan")
         active = [r for r in records if str(r.get("UserID")) == str(user_id) and str(r.get("Status", "")).lower() == "active"]
         if not active:
             return None
@@ -362,6 +562,26 @@ def get_active_loan(user_id: int) -> Optional[dict]:
     except Exception:
         return None
 
+def _adjust_balance(user_id: int, delta: int) -> tuple:
+    """
+    Add `delta` to the user's Balance as a checked read-modify-write, started over like
+    gain_xp() when another update changed the balance in between.
+    Returns (new balance, "") or (None, reason); the balance never goes below 0.
+    """
+    for _ in range(UPDATE_ATTEMPTS):
+        user = get_user(user_id)
+        if not user:
+            return None, "User not found"
+        try:
+            balance = int(user.get("Balance", 0) or 0)
+        except (TypeError, ValueError):
+            return None, "Invalid numbers"
+        if balance + delta < 0:
+            return None, "Insufficient balance"
+        if update_user_fields(user_id, {"Balance": balance + delta}, expected={"Balance": user.get("Balance", "")}):
+            return balance + delta, ""
+    return None, "Your balance changed meanwhile, please try again"
+
 def create_loan(user_id: int, amount: int, interest_rate: float = 0.1, days_until_due: int = 7) -> dict:
     """
     Create a loan entry in Logs_Loan and credit user's balance by amount.
@@ -373,27 +593,22 @@ def create_loan(user_id: int, amount: int, interest_rate: float = 0.1, days_unti
     if get_active_loan(user_id):
         return {"ok": False, "reason": "Active loan exists"}
 
-    user = get_user(user_id)
-    if not user:
-        return {"ok": False, "reason": "User not found"}
-
     now = datetime.datetime.utcnow()
     loan_id = f"LN-{now.strftime('%Y%m%d%H%M%S')}"
     due_date = (now + datetime.timedelta(days=days_until_due)).strftime("%Y-%m-%d")
     repay_amount = int(round(amount * (1 + interest_rate)))
     timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
 
-    # append loan row
+    # credit balance, then record the loan; a loan row that cannot be written takes the coins back
+    new_balance, reason = _adjust_balance(user_id, amount)
+    if reason:
+        return {"ok": False, "reason": reason}
     row = [loan_id, str(user_id), amount, interest_rate, due_date, repay_amount, "Active", timestamp]
-    append_row("Logs_Loan", row)
-
-    # credit balance
     try:
-        current_balance = int(user.get("Balance", 0) or 0)
+        append_row("Logs_Loan", row)
     except Exception:
-        current_balance = 0
-    new_balance = current_balance + amount
-    update_user_balance(user_id, new_balance)
+        _adjust_balance(user_id, -amount)
+        raise
 
     return {"ok": True, "loan": {"LoanID": loan_id, "UserID": str(user_id), "Amount": amount, "InterestRate": interest_rate, "DueDate": due_date, "RepayAmount": repay_amount, "Status": "Active", "Timestamp": timestamp}, "new_balance": new_balance}
 
@@ -406,16 +621,12 @@ def repay_active_loan(user_id: int) -> dict:
     if not user:
         return {"ok": False, "reason": "User not found"}
 
-    ws = get_worksheet("Logs_Loan")
-    headers = ws.row_values(1)
-
-    def col_idx(name: str) -> Optional[int]:
-        return headers.index(name) + 1 if name in headers else None
+    col_idx = column_map("Logs_Loan").get
 
     col_status = col_idx("Status")
     col_timestamp = col_idx("Timestamp")
 
-    records = ws.get_all_records()
+    records = read_all_records("Logs_Loan")
     target_row_idx = None
     loan_record = None
     for idx, r in enumerate(records, start=2):
@@ -426,22 +637,19 @@ def repay_active_loan(user_id: int) -> dict:
         return {"ok": False, "reason": "No active loan"}
 
     try:
-        balance_val = int(user.get("Balance", 0) or 0)
         repay_amount = int(loan_record.get("RepayAmount", 0) or 0)
     except Exception:
         return {"ok": False, "reason": "Invalid numbers"}
 
-    if balance_val < repay_amount:
-        return {"ok": False, "reason": "Insufficient balance"}
-
-    new_balance = balance_val - repay_amount
-    update_user_balance(user_id, new_balance)
+    new_balance, reason = _adjust_balance(user_id, -repay_amount)
+    if reason:
+        return {"ok": False, "reason": reason}
 
     # mark loan as Paid
     if col_status:
-        update_cell("Logs_Loan", f"{chr(64 + col_status)}{target_row_idx}", "Paid")
+        update_cell("Logs_Loan", a1(col_status, target_row_idx), "Paid")
     if col_timestamp:
-        update_cell("Logs_Loan", f"{chr(64 + col_timestamp)}{target_row_idx}", datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+        update_cell("Logs_Loan", a1(col_timestamp, target_row_idx), datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
 
     loan_record["Status"] = "Paid"
     return {"ok": True, "new_balance": new_balance, "loan": loan_record}
@@ -449,8 +657,7 @@ def repay_active_loan(user_id: int) -> dict:
 def list_loans(user_id: int, limit: int = 5) -> list:
     """Return up to `limit` recent loans for a user from Logs_Loan (most recent last)."""
     try:
-        ws = get_worksheet("Logs_Loan")
-        records = ws.get_all_records()
+        records = read_all_records("Logs_Loan")
         user_loans = [r for r in records if str(r.get("UserID")) == str(user_id)]
         return user_loans[-limit:]
     except Exception:
@@ -458,16 +665,14 @@ def list_loans(user_id: int, limit: int = 5) -> list:
 
 def update_user_balance(user_id: int, new_balance: int):
     """
-    Find the user row index and update Balance column (C).
+    Find the user row index and update the Balance column.
     Users sheet header is expected on row 1; data starts row 2.
     """
-    ws = get_worksheet("Users")
-    users = ws.get_all_records()
-    for idx, u in enumerate(users, start=2):
-        if str(u.get("UserID")) == str(user_id):
-            # Balance column is C -> cell C{idx}
-            update_cell("Users", f"C{idx}", new_balance)
-            return True
+    idx = get_user_row(user_id)
+    if idx:
+        update_cell("Users", cell("Users", "Balance", idx), new_balance)
+        patch_cached_user(user_id, {"Balance": new_balance})
+        return True
     return False
 
 def update_user_field(user_id: int, field: str, value):
@@ -475,32 +680,49 @@ def update_user_field(user_id: int, field: str, value):
     Update a specific field (column) for the given user_id in Users sheet.
     Example: update_user_field(12345, "TotalBets", 5000)
     """
-    ws = get_worksheet("Users")
-    headers = ws.row_values(1)  # first row = header row
-    if field not in headers:
-        # For milestone fields, try to add the column if it doesn't exist
-        if field.startswith("Milestone_"):
-            try:
-                # Add the milestone column to the sheet
-                col_letter = chr(64 + len(headers) + 1)  # Next column
-                cell_ref = f"{col_letter}1"  # Header row
-                update_cell("Users", cell_ref, field)
-                print(f"Added milestone column: {field}")
-                
-                # Update headers list
-                headers.append(field)
-            except Exception as e:
-                print(f"Could not add milestone column {field}: {e}")
-                return False
-        else:
+    return update_user_fields(user_id, {field: value})
+
+def _same_value(cached, value) -> bool:
+    """Compare a cached cell (formatted like get_all_records()) with a value the caller read or wrote."""
+    if isinstance(value, bool) or isinstance(cached, bool):
+        return is_truthy(cached) == is_truthy(value)
+    return str(cached).strip() == str(value).strip()
+
+def update_user_fields(user_id: int, fields: dict, expected: dict = None) -> bool:
+    """
+    Write several Users columns of one user as a single batch_update and patch the cache.
+    The row is resolved once from the Users cache. With `expected` ({field: value read
+    earlier}), nothing is written unless the cached record still holds those values, so a
+    read-modify-write cannot overwrite a concurrent update; check and cache patch happen
+    under the cache lock. Every field must already be a Users column: the schema only
+    grows through storage.migrate (Milestone_* columns when milestones load or are added).
+    Once the cells are queued the update counts as committed: if sending them fails they
+    stay buffered and are retried in the background, and True is still returned so the
+    caller goes on (logs its rows, reports the result) as it would after a slow write.
+    Returns False if the user is not registered, `expected` no longer matches or a field cannot be written.
+    """
+    columns = column_map("Users")
+    for field in fields:
+        if field not in columns:
             print(f"[ERROR] Field '{field}' not found in sheet headers.")
             return False
 
-    col_index = headers.index(field) + 1
-    users = ws.get_all_records()
-    for idx, u in enumerate(users, start=2):
-        if str(u.get("UserID")) == str(user_id):
-            cell_ref = f"{chr(64 + col_index)}{idx}"  # e.g. F2
+    _load_users()
+    key = str(user_id).strip()
+    with _users_lock:
+        entry = _users_cache["index"].get(key)
+        if not entry:
+            return False
+        idx, record = entry
+        if expected and not all(_same_value(record.get(f, ""), v) for f, v in expected.items()):
+            users_cache_stats["conflicts"] += 1
+            return False
+        for cell_ref, value in row_cells("Users", idx, fields).items():
             update_cell("Users", cell_ref, value)
-            return True
-    return False
+        record.update(fields)
+        _journal("patch", key, dict(fields))
+    try:
+        flush_writes("Users")
+    except Exception as e:
+        print(f"Users update for {user_id} is queued, sending it failed for now: {e}")
+    return True
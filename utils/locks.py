@@ -0,0 +1,29 @@
+# utils/locks.py
+import asyncio
+import functools
+import weakref
+
+# one asyncio.Lock per user; an entry disappears once no handler holds or waits on it
+_user_locks = weakref.WeakValueDictionary()
+
+def user_lock(user_id: int) -> asyncio.Lock:
+    """Return the lock that serializes commands of one user."""
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _user_locks[user_id] = lock
+    return lock
+
+def serialized_per_user(callback):
+    """
+    Wrap a handler so updates from the same user run one at a time (e.g. two /spin in a
+    row cannot both read the old balance), while different users still run in parallel.
+    """
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        user = update.effective_user
+        if user is None:
+            return await callback(update, context)
+        async with user_lock(user.id):
+            return await callback(update, context)
+    return wrapper
@@ -0,0 +1,167 @@
+# utils/log_sink.py
+# Background writer for the append-only Logs_* worksheets (Logs_Spin, Logs_RPS,
+# Logs_Aviator, Logs_BetRewards). log_row() only queues the row; a worker thread
+# sends queued rows with one append_rows() per worksheet once LOG_BATCH_SIZE rows are
+# waiting or LOG_FLUSH_SECONDS have passed. The queue is bounded: when it is full,
+# log_row() waits up to LOG_ENQUEUE_TIMEOUT seconds, flushes the waiting rows itself
+# and then adds its row after them, so a Sheets outage slows logging down instead of
+# growing memory. log_row() never raises: rows that cannot be written stay pending (at
+# most 2 x LOG_QUEUE_MAX of them besides the queue; beyond that they are dropped and
+# counted).
+# One flush runs at a time, so rows of a worksheet are written in the order they were
+# logged; _sink_lock only guards the buffers and log_sink_stats (log_row() runs on many
+# threads) and is never held during a request.
+# drain() is called from bot.py on shutdown.
+import os
+import queue
+import threading
+
+from storage import append_rows, background_priority
+
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "50"))
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "2"))
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "1000"))
+LOG_ENQUEUE_TIMEOUT = float(os.getenv("LOG_ENQUEUE_TIMEOUT", "1"))
+
+_queue = queue.Queue(maxsize=LOG_QUEUE_MAX)  # (sheet_name, row)
+_pending = {}  # { sheet_name: [row, ...] } taken off the queue, not yet written
+_sending = {}  # { sheet_name: [row, ...] } handed to append_rows() by the flush in progress
+_sink_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+log_sink_stats = {
+    "rows_queued": 0,
+    "rows_written": 0,
+    "batches_sent": 0,
+    "direct_writes": 0,  # rows added by the caller after flushing itself because the queue stayed full
+    "dropped": 0,        # rows given up because the queue and the pending rows were full
+    "errors": 0,
+}
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _stop.clear()
+            _worker = threading.Thread(target=_run, name="log-sink", daemon=True)
+            _worker.start()
+
+def log_row(sheet_name: str, row: list):
+    """Queue one row for sheet_name; under backpressure flush the waiting rows from this thread first."""
+    _ensure_worker()
+    try:
+        _queue.put((sheet_name, row), timeout=LOG_ENQUEUE_TIMEOUT)
+    except queue.Full:
+        try:
+            flush()  # make room: the rows logged before this one go out first
+        except Exception as e:
+            print(f"Error writing log rows, they stay pending: {e}")
+        with _sink_lock:
+            # rows queued before this one go first; under backpressure twice the usual rows may be held
+            held = _take_from_queue(2 * LOG_QUEUE_MAX)
+            if held >= 2 * LOG_QUEUE_MAX:
+                log_sink_stats["dropped"] += 1
+                print(f"Warning: dropped a {sheet_name} log row, {held} rows are waiting for Sheets")
+                return
+            _pending.setdefault(sheet_name, []).append(row)
+            log_sink_stats["direct_writes"] += 1
+        _wake.set()
+        return
+    with _sink_lock:
+        log_sink_stats["rows_queued"] += 1
+    if _queue.qsize() >= LOG_BATCH_SIZE:
+        _wake.set()
+
+def pending_log_rows() -> int:
+    """Rows accepted by log_row() but not yet written to the sheet."""
+    with _sink_lock:
+        held = sum(len(rows) for rows in _pending.values()) + sum(len(rows) for rows in _sending.values())
+        return _queue.qsize() + held
+
+def _take_from_queue(limit: int = LOG_QUEUE_MAX) -> int:
+    """Move queued rows to _pending, keeping at most `limit` there. Returns rows held (caller holds _sink_lock)."""
+    held = sum(len(rows) for rows in _pending.values())
+    while held < limit:
+        try:
+            name, row = _queue.get_nowait()
+        except queue.Empty:
+            break
+        _pending.setdefault(name, []).append(row)
+        held += 1
+    return held
+
+def flush(sheet_name: str = None) -> int:
+    """
+    Write queued rows now, for every worksheet or only sheet_name. Returns rows written.
+    Rows that fail stay pending for the next attempt and the error is raised.
+    """
+    with _flush_lock:
+        with _sink_lock:
+            # keep at most LOG_QUEUE_MAX rows in memory while the sheet is failing
+            _take_from_queue()
+            names = [sheet_name] if sheet_name is not None else list(_pending)
+
+        written = 0
+        error = None
+        for name in names:
+            with _sink_lock:
+                rows = _pending.pop(name, None)
+                if not rows:
+                    continue
+                _sending[name] = rows
+            try:
+                append_rows(name, rows)
+            except Exception as e:
+                # one failing worksheet must not hold back the others
+                with _sink_lock:
+                    del _sending[name]
+                    _pending[name] = rows + _pending.get(name, [])
+                    log_sink_stats["errors"] += 1
+                error = error or e
+                continue
+            with _sink_lock:
+                del _sending[name]
+                log_sink_stats["batches_sent"] += 1
+                log_sink_stats["rows_written"] += len(rows)
+            written += len(rows)
+        if error is not None:
+            raise error
+        return written
+
+def _run():
+    while not _stop.is_set():
+        _wake.wait(LOG_FLUSH_SECONDS)
+        _wake.clear()
+        try:
+            with background_priority():
+                flush()
+        except Exception as e:
+            print(f"Error writing buffered log rows: {e}")
+
+def drain(timeout: float = 10.0) -> int:
+    """Stop the worker and write everything still queued. Returns rows left unwritten."""
+    _stop.set()
+    _wake.set()
+    if _worker is not None:
+        _worker.join(timeout)
+    try:
+        while pending_log_rows():
+            if not flush():
+                break
+    except Exception as e:
+        print(f"Error draining log rows: {e}")
+    left = pending_log_rows()
+    if left:
+        print(f"Warning: {left} log rows were not written")
+    return left
+
+def get_log_sink_stats() -> dict:
+    """Return a snapshot of the sink counters plus the current backlog."""
+    with _sink_lock:
+        stats = dict(log_sink_stats)
+    stats["pending"] = pending_log_rows()
+    return stats
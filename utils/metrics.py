@@ -0,0 +1,131 @@
+# utils/metrics.py
+# In-process latency metrics. bot.py wraps every command handler with timed_command()
+# and google_sheet._call() records every Sheets request (including the time spent
+# waiting for quota and retrying) per operation and worksheet. Each series keeps
+# lifetime counters and histogram buckets, plus the last METRICS_WINDOW samples for
+# rolling percentiles. monitor_event_loop() samples how late the asyncio loop wakes
+# up. Everything here is in memory and thread-safe; /stats and /metrics show it.
+import asyncio
+import bisect
+import collections
+import functools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "1"))
+
+# histogram upper bounds in seconds (the last bucket is everything slower)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Series:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = collections.deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, seconds: float, error: bool):
+        self.count += 1
+        self.errors += 1 if error else 0
+        self.total_seconds += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "avg_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(recent, 0.50) * 1000,
+            "p95_ms": percentile(recent, 0.95) * 1000,
+            "p99_ms": percentile(recent, 0.99) * 1000,
+            "buckets": list(self.buckets),
+        }
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+_commands = {}  # command -> _Series
+_sheets = {}    # (operation, worksheet) -> _Series
+_loop_lag = _Series()
+_loop_lag_last = 0.0
+_lock = threading.Lock()
+
+def observe_command(command: str, seconds: float, error: bool = False):
+    with _lock:
+        _commands.setdefault(command, _Series()).observe(seconds, error)
+
+def observe_sheets(operation: str, sheet_name: str, seconds: float, error: bool = False):
+    with _lock:
+        _sheets.setdefault((operation, sheet_name or ""), _Series()).observe(seconds, error)
+
+def timed_command(command: str, callback):
+    """Wrap an async handler so each run is recorded under `command` (errors = exceptions raised)."""
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await callback(update, context)
+            failed = False
+            return result
+        finally:
+            observe_command(command, time.perf_counter() - started, failed)
+    return wrapper
+
+@contextmanager
+def sheets_call(operation: str, sheet_name: str = ""):
+    """Record the duration of the block as one Sheets request."""
+    started = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        observe_sheets(operation, sheet_name, time.perf_counter() - started, failed)
+
+async def monitor_event_loop(interval: float = LOOP_LAG_INTERVAL):
+    """Run forever on the bot's loop, recording how much later than asked each sleep returns."""
+    global _loop_lag_last
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        with _lock:
+            _loop_lag_last = lag
+            _loop_lag.observe(lag, False)
+
+def get_loop_lag_stats() -> dict:
+    """Latest event-loop lag plus the lag series (seconds)."""
+    with _lock:
+        stats = _loop_lag.snapshot()
+        stats["last_seconds"] = _loop_lag_last
+    return stats
+
+def get_command_stats() -> dict:
+    """{command: {count, errors, avg_ms, p50_ms, p95_ms, p99_ms, ...}}"""
+    with _lock:
+        return {name: series.snapshot() for name, series in _commands.items()}
+
+def get_sheets_stats() -> dict:
+    """{(operation, worksheet): {count, errors, avg_ms, p50_ms, p95_ms, p99_ms, ...}}"""
+    with _lock:
+        return {key: series.snapshot() for key, series in _sheets.items()}
+
+def reset():
+    global _loop_lag, _loop_lag_last
+    with _lock:
+        _commands.clear()
+        _sheets.clear()
+        _loop_lag, _loop_lag_last = _Series(), 0.0
@@ -0,0 +1,151 @@
+# utils/metrics_server.py
+# Prometheus endpoint. When METRICS_PORT is set, bot.py starts a small HTTP server on
+# METRICS_HOST:METRICS_PORT (a daemon thread, so polling is never blocked by a scrape)
+# that answers GET /metrics with the text exposition format:
+#   casino_command_duration_seconds         histogram per command
+#   casino_sheets_request_duration_seconds  histogram per gspread operation and worksheet
+#   casino_sheets_*_total                   requests sent, retries, 429s, give-ups, shared reads, throttling
+#   casino_sheets_quota_tokens              tokens left in the read/write buckets
+#   casino_event_loop_lag_seconds           how late the asyncio loop wakes up
+#   casino_pending_*, casino_io_queue_depth buffered cells, log rows, mirror changes, I/O pool
+#   casino_active_cooldowns                 users on cooldown per game
+#   casino_cold_start_seconds               process start to ready, see utils/startup.py
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import storage
+from utils import aio, cooldown, log_sink, metrics, startup
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)  # 0 = no endpoint
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+        self._described = set()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        if name not in self._described:
+            self._described.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, labels: dict = None):
+        self.lines.append(f"{name}{_labels(labels)} {float(value):g}")
+
+    def histogram(self, name: str, help_text: str, series: dict, labels: dict = None):
+        """series is a metrics snapshot: per-bucket counts, count and total_seconds."""
+        labels = labels or {}
+        self.describe(name, "histogram", help_text)
+        cumulative = 0
+        for bound, count in zip(metrics.LATENCY_BUCKETS, series["buckets"]):
+            cumulative += count
+            self.sample(f"{name}_bucket", cumulative, {**labels, "le": f"{bound:g}"})
+        self.sample(f"{name}_bucket", series["count"], {**labels, "le": "+Inf"})
+        self.sample(f"{name}_sum", series["total_seconds"], labels)
+        self.sample(f"{name}_count", series["count"], labels)
+
+def render() -> str:
+    """Every metric in the Prometheus text format."""
+    w = _Writer()
+
+    commands = metrics.get_command_stats()
+    for command, s in sorted(commands.items()):
+        w.histogram("casino_command_duration_seconds", "Time spent in a command handler.", s, {"command": command})
+    w.describe("casino_command_errors_total", "counter", "Command handlers that raised.")
+    for command, s in sorted(commands.items()):
+        w.sample("casino_command_errors_total", s["errors"], {"command": command})
+
+    sheets = metrics.get_sheets_stats()
+    for (operation, sheet), s in sorted(sheets.items()):
+        w.histogram("casino_sheets_request_duration_seconds",
+                    "Sheets requests by gspread operation and worksheet, quota waits and retries included.",
+                    s, {"operation": operation, "sheet": sheet})
+    w.describe("casino_sheets_request_errors_total", "counter", "Sheets requests that failed after retries.")
+    for (operation, sheet), s in sorted(sheets.items()):
+        w.sample("casino_sheets_request_errors_total", s["errors"], {"operation": operation, "sheet": sheet})
+
+    if storage.STORAGE_BACKEND != "sqlite":
+        import google_sheet
+        sched = google_sheet.get_scheduler_stats()
+        w.describe("casino_sheets_api_requests_total", "counter", "Requests sent to the Sheets API, retries included.")
+        w.sample("casino_sheets_api_requests_total", sched["reads"], {"kind": "read"})
+        w.sample("casino_sheets_api_requests_total", sched["writes"], {"kind": "write"})
+        for key, help_text in (("retries", "429/5xx responses retried."),
+                               ("rate_limited", "429 (quota exceeded) responses."),
+                               ("gave_up", "Requests abandoned after SHEETS_MAX_RETRIES."),
+                               ("coalesced", "Reads answered by an identical read already in flight.")):
+            w.describe(f"casino_sheets_{key}_total", "counter", help_text)
+            w.sample(f"casino_sheets_{key}_total", sched[key])
+        w.describe("casino_sheets_throttled_seconds_total", "counter", "Time spent waiting for a quota token.")
+        w.sample("casino_sheets_throttled_seconds_total", sched["throttled_seconds"])
+        w.describe("casino_sheets_quota_tokens", "gauge", "Tokens left in the per-minute request buckets.")
+        w.sample("casino_sheets_quota_tokens", sched["read_tokens"], {"kind": "read"})
+        w.sample("casino_sheets_quota_tokens", sched["write_tokens"], {"kind": "write"})
+
+    lag = metrics.get_loop_lag_stats()
+    w.describe("casino_event_loop_lag_last_seconds", "gauge", "Lag of the latest event-loop probe.")
+    w.sample("casino_event_loop_lag_last_seconds", lag["last_seconds"])
+    w.histogram("casino_event_loop_lag_seconds", "How much later than scheduled the event loop woke up.", lag)
+
+    w.describe("casino_pending_cell_writes", "gauge", "Cell updates buffered for the next batch write.")
+    w.sample("casino_pending_cell_writes", storage.pending_write_count())
+    w.describe("casino_pending_log_rows", "gauge", "Log rows queued in the log sink.")
+    w.sample("casino_pending_log_rows", log_sink.pending_log_rows())
+    w.describe("casino_io_queue_depth", "gauge", "Calls waiting for a Sheets I/O worker.")
+    w.sample("casino_io_queue_depth", aio.pending_io())
+    mirror = storage.get_mirror_stats()
+    if mirror is not None:
+        w.describe("casino_mirror_pending_changes", "gauge", "Changes not yet mirrored to Google Sheets.")
+        w.sample("casino_mirror_pending_changes", mirror["pending_changes"])
+        w.describe("casino_mirror_lag_seconds", "gauge", "Age of the oldest change not yet mirrored.")
+        w.sample("casino_mirror_lag_seconds", mirror["lag_seconds"])
+
+    w.describe("casino_active_cooldowns", "gauge", "Users currently on cooldown per game.")
+    for game, count in sorted(cooldown.active_cooldowns().items()):
+        w.sample("casino_active_cooldowns", count, {"game": game})
+
+    cold_start = startup.get_startup_stats()["cold_start_seconds"]
+    if cold_start is not None:
+        w.describe("casino_cold_start_seconds", "gauge", "Process start to ready to poll.")
+        w.sample("casino_cold_start_seconds", cold_start)
+    return "\n".join(w.lines) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            body = render().encode()
+        except Exception as e:
+            print(f"Error rendering metrics: {e}")
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread. Returns the server (call shutdown() to stop it)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,133 @@
+# utils/profiling.py
+# Opt-in cProfile hooks. Functions wrapped with @profiled(name) (the game handlers,
+# settle_bet and claim_daily_reward) are profiled when either switch is on:
+#   PROFILE_SAMPLE_PERCENT  profile this share of runs (0-100) and keep every profile
+#   PROFILE_SLOW_MS         profile every run and keep only the profiles of runs that
+#                           took at least this many milliseconds
+# Both can be changed at runtime with the admin command /profile. Kept profiles are
+# written to PROFILE_DIR as <name>-<timestamp>-<ms>ms.prof (open with pstats or
+# snakeviz); only the newest PROFILE_MAX_FILES are kept.
+# cProfile allows one active profiler per thread (per process on Python 3.12+), so runs
+# that start while their thread is being profiled are not. A profile of an async
+# handler covers the event loop thread while the handler runs, other coroutines
+# included; the Sheets work it hands to the I/O pool is profiled on its own thread
+# (settle_bet, claim_daily_reward).
+import cProfile
+import datetime
+import functools
+import glob
+import inspect
+import os
+import random
+import threading
+import time
+
+PROFILE_SAMPLE_PERCENT = float(os.getenv("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+settings = {"sample_percent": PROFILE_SAMPLE_PERCENT, "slow_ms": PROFILE_SLOW_MS}
+
+profile_stats = {
+    "profiled": 0,      # runs executed under the profiler
+    "saved": 0,         # profiles written to PROFILE_DIR
+    "skipped_busy": 0,  # runs that qualified while another run was being profiled
+}
+
+_local = threading.local()  # .active is True while this thread has a profiler enabled
+_stats_lock = threading.Lock()
+
+def set_sample_percent(percent: float):
+    settings["sample_percent"] = min(max(float(percent), 0.0), 100.0)
+
+def set_slow_ms(ms: float):
+    settings["slow_ms"] = max(float(ms), 0.0)
+
+def enabled() -> bool:
+    return settings["sample_percent"] > 0 or settings["slow_ms"] > 0
+
+def _count(key: str):
+    with _stats_lock:
+        profile_stats[key] += 1
+
+def _start(name: str):
+    """Return (profiler, keep_always) for a run that should be profiled, or None."""
+    if not enabled():
+        return None
+    sampled = settings["sample_percent"] > 0 and random.random() * 100 < settings["sample_percent"]
+    if not sampled and settings["slow_ms"] <= 0:
+        return None
+    if getattr(_local, "active", False):
+        _count("skipped_busy")
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiler is active (Python 3.12+ allows one per process)
+        _count("skipped_busy")
+        return None
+    _local.active = True
+    _count("profiled")
+    return profiler, sampled
+
+def _finish(name: str, state: tuple, elapsed: float):
+    profiler, sampled = state
+    profiler.disable()
+    _local.active = False
+    elapsed_ms = elapsed * 1000
+    if not sampled and elapsed_ms < settings["slow_ms"]:
+        return
+    try:
+        _save(name, profiler, elapsed_ms)
+    except Exception as e:
+        print(f"Error saving profile of {name}: {e}")
+
+def _save(name: str, profiler: cProfile.Profile, elapsed_ms: float):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}-{stamp}-{elapsed_ms:.0f}ms.prof"))
+    _count("saved")
+    files = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.prof")), key=os.path.getmtime)
+    for old in files[:max(len(files) - PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+def profiled(name: str):
+    """Decorator for sync functions and async handlers; a no-op while profiling is off."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                state = _start(name)
+                if state is None:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _finish(name, state, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state = _start(name)
+            if state is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _finish(name, state, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def get_profile_stats() -> dict:
+    with _stats_lock:
+        stats = dict(profile_stats)
+    stats.update(settings)
+    stats["dir"] = PROFILE_DIR
+    return stats
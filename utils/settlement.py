@@ -0,0 +1,94 @@
+# utils/settlement.py
+# Bet settlement shared by /rps, /spin and /aviator.
+# The user is read once (from the Users cache), every column that changes -- Balance,
+# TotalBets, newly reached Milestone_* flags, XP and Level -- is computed up front and
+# written as one batch_update by update_user_fields(), on the condition that Balance
+# and TotalBets are still what was read; otherwise the round is computed again.
+# Log rows go to the background log sink.
+import datetime
+
+from utils.log_sink import log_row
+from utils.profiling import profiled
+from utils.helpers import UPDATE_ATTEMPTS, get_user, update_user_fields, _get_level_info
+
+def _to_int(value, default: int = 0) -> int:
+    try:
+        return int(value) if str(value).strip() != "" else default
+    except (TypeError, ValueError):
+        return default
+
+@profiled("settle_bet")
+def settle_bet(user_id: int, bet_amount: int, payout: int, log_sheet: str, round_row: list) -> dict:
+    """
+    Settle one game round: take the stake, pay out, add to TotalBets and award any
+    betting milestones the new total reaches.
+    Returns {ok: bool, reason: str, balance: int, total_bets: int, xp: int, level: int, milestones: list}
+    """
+    from commands.betrewards import pending_milestones
+
+    for _ in range(UPDATE_ATTEMPTS):
+        user = get_user(user_id)
+        if not user:
+            return {"ok": False, "reason": "User not found"}
+
+        balance = _to_int(user.get("Balance"))
+        if bet_amount > balance:
+            return {"ok": False, "reason": "Insufficient balance"}
+
+        total_bets = _to_int(user.get("TotalBets")) + bet_amount
+        xp = _to_int(user.get("XP"))
+        new_balance = balance - bet_amount + payout
+
+        fields = {"Balance": new_balance, "TotalBets": total_bets}
+        reached = pending_milestones(user, total_bets)
+        for milestone in reached:
+            new_balance += milestone["reward"]
+            xp += milestone["xp"]
+            fields[f"Milestone_{milestone['threshold']}"] = True
+        if reached:
+            fields["Balance"] = new_balance
+            fields["XP"] = xp
+            fields["Level"] = _get_level_info(xp)[0]["Level"]
+
+        expected = {"Balance": user.get("Balance", ""), "TotalBets": user.get("TotalBets", "")}
+        if reached:
+            expected["XP"] = user.get("XP", "")
+        if update_user_fields(user_id, fields, expected=expected):
+            break
+    else:
+        return {"ok": False, "reason": "Error updating balance in sheet"}
+
+    log_row(log_sheet, round_row)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for m in reached:
+        log_row("Logs_BetRewards", [f"AUTO-{m['threshold']}", str(user_id), user.get("Username", "Unknown"),
+                                    m["threshold"], m["reward"], m["xp"], timestamp])
+
+    return {
+        "ok": True,
+        "reason": "OK",
+        "balance": new_balance,
+        "total_bets": total_bets,
+        "xp": xp,
+        "level": fields.get("Level", _to_int(user.get("Level"), 1)),
+        "milestones": reached,
+    }
+
+def settle_failure_message(settled: dict) -> str:
+    """Reply for a round settle_bet() refused: what the player can fix, or the generic write failure."""
+    reason = settled.get("reason", "")
+    if reason == "Insufficient balance":
+        return "❌ Insufficient balance!"
+    if reason == "User not found":
+        return "You are not registered. Use /start first."
+    return "Error updating balance in sheet. Try again later."
+
+def format_milestone_notification(milestones: list) -> str:
+    """HTML block appended to a game reply when settle_bet() awarded milestones."""
+    if not milestones:
+        return ""
+    text = "\n🎉 <b>Milestone Rewards Earned!</b>\n"
+    for m in milestones:
+        text += f"🎁 {m['description']}: +{m['reward']:,} coins + {m['xp']:,} XP\n"
+    text += "💰 <b>Rewards automatically added to your balance!</b>"
+    return text